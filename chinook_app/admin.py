@@ -6,7 +6,16 @@ from django.http import HttpResponseRedirect
 from django.urls import path, reverse
 from django.utils.html import format_html
 from django.core.exceptions import PermissionDenied
-from .models import UserProfile, Artist, Album, Track, Review, SecurityQuestion
+from django.conf import settings
+from django.db.models import Count, F, Q
+from .lookups import GENRES, MEDIA_TYPES
+from .models import (
+    UserProfile, Artist, Album, Track, TrackListing, Genre, MediaType, Review,
+    SecurityQuestion
+)
+from .pagination import EstimatedCountPaginator
+from .pickers import ALBUM_PICKER, ARTIST_PICKER
+from .roles import can_access_admin, group_names, in_group
 
 
 # Unregister the default User admin if it's registered
@@ -59,22 +68,7 @@ class CustomUserAdmin(UserAdmin):
 
     def has_module_permission(self, request):
         """Check if user has permission to access this admin module."""
-        if not request.user.is_authenticated:
-            return False
-
-        # Superuser group members cannot access admin
-        if request.user.groups.filter(name='Superuser').exists():
-            return False
-
-        # Allow the protected admin user to access admin
-        if request.user.username.lower() == 'admin':
-            return True
-
-        # Only allow Admin group and actual Django superusers
-        return (
-            request.user.groups.filter(name='Admin').exists()
-            or request.user.is_superuser
-        )
+        return can_access_admin(request.user)
 
     def has_view_permission(self, request, obj=None):
         """Check if user has permission to view users."""
@@ -82,7 +76,7 @@ class CustomUserAdmin(UserAdmin):
             return False
 
         # Superuser group members cannot access admin
-        if request.user.groups.filter(name='Superuser').exists():
+        if in_group(request.user, 'Superuser'):
             return False
 
         # If the requesting user is the protected admin user
@@ -96,7 +90,7 @@ class CustomUserAdmin(UserAdmin):
                 return False
 
         return (
-            request.user.groups.filter(name='Admin').exists()
+            in_group(request.user, 'Admin')
             or request.user.is_superuser
         )
 
@@ -106,7 +100,7 @@ class CustomUserAdmin(UserAdmin):
             return False
 
         # Superuser group members cannot access admin
-        if request.user.groups.filter(name='Superuser').exists():
+        if in_group(request.user, 'Superuser'):
             return False
 
         # If the requesting user is the protected admin user
@@ -122,7 +116,7 @@ class CustomUserAdmin(UserAdmin):
             return False
 
         return (
-            request.user.groups.filter(name='Admin').exists()
+            in_group(request.user, 'Admin')
             or request.user.is_superuser
         )
 
@@ -132,7 +126,7 @@ class CustomUserAdmin(UserAdmin):
             return False
 
         # Superuser group members cannot access admin
-        if request.user.groups.filter(name='Superuser').exists():
+        if in_group(request.user, 'Superuser'):
             return False
 
         # If the requesting user is the protected admin user
@@ -148,7 +142,7 @@ class CustomUserAdmin(UserAdmin):
             return False
 
         return (
-            request.user.groups.filter(name='Admin').exists()
+            in_group(request.user, 'Admin')
             or request.user.is_superuser
         )
 
@@ -158,7 +152,7 @@ class CustomUserAdmin(UserAdmin):
             return False
 
         # Superuser group members cannot access admin
-        if request.user.groups.filter(name='Superuser').exists():
+        if in_group(request.user, 'Superuser'):
             return False
 
         # Allow the protected admin user to add users
@@ -166,7 +160,7 @@ class CustomUserAdmin(UserAdmin):
             return True
 
         return (
-            request.user.groups.filter(name='Admin').exists()
+            in_group(request.user, 'Admin')
             or request.user.is_superuser
         )
 
@@ -175,21 +169,23 @@ class CustomUserAdmin(UserAdmin):
         Store the current user for use in other methods.
 
         Filter out protected users except when the protected admin is viewing.
+        Groups are prefetched for the group column and the action links.
         """
         self._current_user = request.user
+        queryset = super().get_queryset(request).prefetch_related('groups')
         
         # If the protected admin user is viewing, show all users
         if request.user.username.lower() == 'admin':
-            return super().get_queryset(request)
+            return queryset
         
         # Otherwise, exclude protected admin user from queryset
-        return super().get_queryset(request).exclude(username__iexact='admin')
+        return queryset.exclude(username__iexact='admin')
 
     def group_display(self, obj):
         """Display user groups in admin list."""
-        groups = obj.groups.all()
+        groups = group_names(obj)
         if groups:
-            return ", ".join([group.name for group in groups])
+            return ", ".join(sorted(groups))
         return "No Group"
     group_display.short_description = 'Groups'
 
@@ -215,11 +211,11 @@ class CustomUserAdmin(UserAdmin):
         # Check if user is already in the group
         if not obj.is_superuser:
             links.append(f'<a href="{admin_url}">Make Admin</a>')
-        if not obj.groups.filter(name='Superuser').exists():
+        if not in_group(obj, 'Superuser'):
             links.append(f'<a href="{superuser_url}">Make Superuser</a>')
-        if not obj.groups.filter(name='Staff').exists():
+        if not in_group(obj, 'Staff'):
             links.append(f'<a href="{staff_url}">Make Staff</a>')
-        if not obj.groups.filter(name='Regular').exists():
+        if not in_group(obj, 'Regular'):
             links.append(f'<a href="{regular_url}">Make Regular</a>')
 
         return format_html(' | '.join(links)) if links else "No actions"
@@ -242,7 +238,7 @@ class CustomUserAdmin(UserAdmin):
         # Check permission first
         # Allow protected admin user
         if not (
-            request.user.groups.filter(name='Admin').exists()
+            in_group(request.user, 'Admin')
             or request.user.is_superuser
             or request.user.username.lower() == 'admin'
         ):
@@ -323,7 +319,7 @@ class CustomUserAdmin(UserAdmin):
         """Assign selected users to Admin group."""
         # Check permission
         if not (
-            request.user.groups.filter(name='Admin').exists()
+            in_group(request.user, 'Admin')
             or request.user.is_superuser
             or request.user.username.lower() == 'admin'
         ):
@@ -350,7 +346,7 @@ class CustomUserAdmin(UserAdmin):
         """Assign selected users to Superuser group."""
         # Check permission
         if not (
-            request.user.groups.filter(name='Admin').exists()
+            in_group(request.user, 'Admin')
             or request.user.is_superuser
             or request.user.username.lower() == 'admin'
         ):
@@ -377,7 +373,7 @@ class CustomUserAdmin(UserAdmin):
         """Assign selected users to Staff group."""
         # Check permission
         if not (
-            request.user.groups.filter(name='Admin').exists()
+            in_group(request.user, 'Admin')
             or request.user.is_superuser
             or request.user.username.lower() == 'admin'
         ):
@@ -404,7 +400,7 @@ class CustomUserAdmin(UserAdmin):
         """Assign selected users to Regular group."""
         # Check permission
         if not (
-            request.user.groups.filter(name='Admin').exists()
+            in_group(request.user, 'Admin')
             or request.user.is_superuser
             or request.user.username.lower() == 'admin'
         ):
@@ -434,26 +430,19 @@ class CustomGroupAdmin(admin.ModelAdmin):
 
     def has_module_permission(self, request):
         """Check if user has permission to access groups admin."""
-        if not request.user.is_authenticated:
-            return False
-
-        # Superuser group members cannot access admin
-        if request.user.groups.filter(name='Superuser').exists():
-            return False
+        return can_access_admin(request.user)
 
-        # Allow the protected admin user
-        if request.user.username.lower() == 'admin':
-            return True
-
-        # Only allow Admin group and actual Django superusers
-        return (
-            request.user.groups.filter(name='Admin').exists()
-            or request.user.is_superuser
-        )
+    def get_queryset(self, request):
+        """Annotate member counts, from the maintained counters if enabled."""
+        queryset = super().get_queryset(request)
+        if settings.GROUP_MEMBER_COUNTER:
+            return queryset.annotate(member_total=F('member_count__user_count'))
+        return queryset.annotate(member_total=Count('user'))
 
     def user_count(self, obj):
-        return obj.user_set.count()
+        return obj.member_total or 0
     user_count.short_description = 'Number of Users'
+    user_count.admin_order_field = 'member_total'
 
 
 # Register the custom admins
@@ -466,22 +455,7 @@ class BaseAdmin(admin.ModelAdmin):
 
     def has_module_permission(self, request):
         """Check if user has permission to access this admin module."""
-        if not request.user.is_authenticated:
-            return False
-
-        # Superuser group members cannot access admin
-        if request.user.groups.filter(name='Superuser').exists():
-            return False
-
-        # Allow the protected admin user
-        if request.user.username.lower() == 'admin':
-            return True
-
-        # Only allow Admin group and actual Django superusers
-        return (
-            request.user.groups.filter(name='Admin').exists()
-            or request.user.is_superuser
-        )
+        return can_access_admin(request.user)
 
     def has_view_permission(self, request, obj=None):
         return self.has_module_permission(request)
@@ -638,47 +612,182 @@ class SecurityQuestionAdmin(BaseAdmin):
     )
 
 
+# ===== CATALOGUE ADMINS =====
+# Catalogue changelists stay flat as the tables grow: no filter lists every
+# artist or album, related rows come from the same query, unfiltered lists
+# take their size from table statistics, and search is an indexed prefix
+# (or id) lookup instead of Django's per-word icontains scan.
+class CatalogueAdmin(BaseAdmin):
+    """Base admin for the large catalogue tables."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    search_help_text = 'Search by name prefix or id.'
+    # Field matched by prefix against its case-insensitive index
+    search_prefix_field = None
+
+    def search_filter(self, term):
+        return Q(**{f'{self.search_prefix_field}__istartswith': term})
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        if term.isdigit():
+            return queryset.filter(Q(pk=int(term)) | self.search_filter(term)), False
+        return queryset.filter(self.search_filter(term)), False
+
+
+class PickerListFilter(admin.SimpleListFilter):
+    """
+    List filter that searches its options through a ``Picker`` endpoint.
+
+    Only the selected row is loaded server-side; the filter template asks
+    the picker API for matches as the user types.
+    """
+    template = 'admin/chinook_app/picker_filter.html'
+    picker = None
+    picker_url_name = None
+    field = None
+
+    def lookups(self, request, model_admin):
+        selected = self.picker.get(self.value())
+        if selected is None:
+            return []
+        return [(str(selected.pk), self.picker.label(selected))]
+
+    def has_output(self):
+        return True
+
+    def picker_url(self):
+        return reverse(self.picker_url_name)
+
+    def queryset(self, request, queryset):
+        if self.value():
+            if not self.value().isdigit():
+                return queryset.none()
+            return queryset.filter(**{self.field: int(self.value())})
+        return queryset
+
+
+class ArtistFilter(PickerListFilter):
+    title = 'artist'
+    parameter_name = 'artist'
+    picker = ARTIST_PICKER
+    picker_url_name = 'api_artist_picker'
+    field = 'ArtistId'
+
+
+class AlbumFilter(PickerListFilter):
+    title = 'album'
+    parameter_name = 'album'
+    picker = ALBUM_PICKER
+    picker_url_name = 'api_album_picker'
+    field = 'AlbumId'
+
+
 @admin.register(Artist)
-class ArtistAdmin(BaseAdmin):
+class ArtistAdmin(CatalogueAdmin):
     list_display = ['ArtistId', 'Name']
-    list_filter = ['Name']
-    search_fields = ['Name']
+    search_fields = ['^Name']
+    search_prefix_field = 'Name'
     ordering = ['Name']
 
 
 @admin.register(Album)
-class AlbumAdmin(BaseAdmin):
+class AlbumAdmin(CatalogueAdmin):
     list_display = ['AlbumId', 'Title', 'ArtistId']
-    list_filter = ['ArtistId']
-    search_fields = ['Title', 'ArtistId__Name']
+    list_filter = [ArtistFilter]
+    list_select_related = ['ArtistId']
+    search_fields = ['^Title']
+    search_prefix_field = 'Title'
     raw_id_fields = ['ArtistId']
     ordering = ['Title']
 
 
+@admin.register(Genre)
+class GenreAdmin(BaseAdmin):
+    list_display = ['GenreId', 'Name']
+    search_fields = ['Name']
+    ordering = ['Name']
+
+
+@admin.register(MediaType)
+class MediaTypeAdmin(BaseAdmin):
+    list_display = ['MediaTypeId', 'Name']
+    search_fields = ['Name']
+    ordering = ['Name']
+
+
+class LookupListFilter(admin.SimpleListFilter):
+    """List filter whose choices come from a cached lookup table."""
+    lookup = None
+    field = None
+
+    def lookups(self, request, model_admin):
+        return self.lookup.get().choices()
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.field: self.value()})
+        return queryset
+
+
+class GenreListFilter(LookupListFilter):
+    title = 'genre'
+    parameter_name = 'genre'
+    lookup = GENRES
+    field = 'GenreId'
+
+
+class MediaTypeListFilter(LookupListFilter):
+    title = 'media type'
+    parameter_name = 'media_type'
+    lookup = MEDIA_TYPES
+    field = 'MediaTypeId'
+
+
+def _track_name_prefix(term):
+    """Track ids whose name starts with ``term``, via the listing's index."""
+    return TrackListing.objects.filter(name__istartswith=term).values('track_id')
+
+
 @admin.register(Track)
-class TrackAdmin(BaseAdmin):
+class TrackAdmin(CatalogueAdmin):
     list_display = [
-        'TrackId', 'Name', 'AlbumId', 'Composer',
+        'TrackId', 'Name', 'AlbumId', 'Composer', 'genre_name',
         'Milliseconds', 'UnitPrice'
     ]
-    list_filter = ['AlbumId', 'GenreId', 'MediaTypeId']
-    search_fields = ['Name', 'Composer', 'AlbumId__Title']
+    list_filter = [AlbumFilter, GenreListFilter, MediaTypeListFilter]
+    list_select_related = ['AlbumId']
+    search_fields = ['^Name']
     raw_id_fields = ['AlbumId']
     list_per_page = 50
 
+    def search_filter(self, term):
+        return Q(TrackId__in=_track_name_prefix(term))
+
     def duration_formatted(self, obj):
         return obj.duration_formatted()
     duration_formatted.short_description = 'Duration'
 
+    def genre_name(self, obj):
+        return GENRES.get().name(obj.GenreId_id, '-')
+    genre_name.short_description = 'Genre'
+
 
 @admin.register(Review)
-class ReviewAdmin(BaseAdmin):
+class ReviewAdmin(CatalogueAdmin):
     list_display = ['user', 'track', 'rating', 'created_at']
     list_filter = ['rating', 'created_at']
-    search_fields = ['user__username', 'track__Name', 'comment']
+    list_select_related = ['user', 'track']
+    search_fields = ['user__username', '^track__Name']
+    search_help_text = 'Search by exact username, track name prefix or id.'
     raw_id_fields = ['user', 'track']
     readonly_fields = ['created_at', 'updated_at']
 
+    def search_filter(self, term):
+        return Q(user__username=term) | Q(track_id__in=_track_name_prefix(term))
+
     fieldsets = (
         (None, {
             'fields': ('user', 'track', 'rating')
@@ -0,0 +1,56 @@
+"""
+Hashing of security-question answers.
+
+Answers are normalized (case-folded, whitespace collapsed) and stored as
+``hmac_sha256$<salt>$<hex digest>``: an HMAC-SHA256 of the salted answer
+keyed by ``SECRET_KEY``, so a copy of the database alone is not enough to
+guess answers offline. Digests are checked with ``constant_time_compare``
+against the current key and each of ``SECRET_KEY_FALLBACKS``.
+
+Security answers are short and low-entropy, so their protection against
+online guessing is the rate limiting in ``chinook_app.ratelimit``. A fast
+keyed hash keeps verification cheap; a deliberately slow password hasher
+would cost more per attempt without making the answers harder to guess.
+"""
+from django.conf import settings
+from django.utils.crypto import constant_time_compare, get_random_string, salted_hmac
+
+ALGORITHM = 'hmac_sha256'
+KEY_SALT = 'chinook_app.answers'
+SALT_LENGTH = 16
+
+
+def normalize_answer(answer):
+    """Case-folded answer with runs of whitespace collapsed to one space."""
+    return ' '.join((answer or '').split()).casefold()
+
+
+def is_answer_digest(value):
+    """True if ``value`` is a stored digest rather than a plaintext answer."""
+    parts = (value or '').split('$')
+    return len(parts) == 3 and parts[0] == ALGORITHM and len(parts[1]) == SALT_LENGTH
+
+
+def _digest(salt, answer, secret=None):
+    return salted_hmac(
+        KEY_SALT, f'{salt}${normalize_answer(answer)}', secret=secret, algorithm='sha256'
+    ).hexdigest()
+
+
+def hash_answer(answer, salt=None):
+    """Digest of ``answer`` in the stored ``algorithm$salt$hex`` format."""
+    salt = salt or get_random_string(SALT_LENGTH)
+    return f'{ALGORITHM}${salt}${_digest(salt, answer)}'
+
+
+def check_answer(answer, digest):
+    """True if ``answer`` matches ``digest``; compared in constant time."""
+    if not is_answer_digest(digest):
+        return False
+    _, salt, expected = digest.split('$')
+    secrets = [settings.SECRET_KEY, *getattr(settings, 'SECRET_KEY_FALLBACKS', [])]
+    matched = False
+    for secret in secrets:
+        # No early exit, so the time taken does not depend on which key matched
+        matched |= constant_time_compare(_digest(salt, answer, secret), expected)
+    return matched
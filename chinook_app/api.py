@@ -0,0 +1,278 @@
+"""
+Read-only JSON API for the Chinook catalogue.
+
+All endpoints are async views built on the helpers in ``async_views``:
+
+    GET /api/artists/?q=<prefix>&page=<n>
+    GET /api/artists/<id>/
+    GET /api/albums/<id>/
+    GET /api/tracks/<id>/
+    GET /api/search/?q=<text>
+    GET /api/batch/<artists|albums|tracks>/?ids=<id>,<id>,...
+    GET /api/picker/artists/?q=<prefix or id>&after=<cursor>
+    GET /api/picker/albums/?q=<prefix or id>&after=<cursor>
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.db.models import Count, Q
+from django.http import Http404, JsonResponse
+
+from .async_views import apaginate, gather_queries
+from .cache import add_cache_tags
+from .listing import ALBUM_LISTING_STATS, album_rating
+from .models import Artist, Album, TrackListing
+from .pickers import ALBUM_PICKER, ARTIST_PICKER
+
+API_PAGE_SIZE = 50
+SEARCH_LIMIT = 10
+
+
+def api_view(view):
+    """Allow only GET/HEAD and turn Http404 and BadRequest into JSON errors."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return JsonResponse({'error': 'Method not allowed'}, status=405)
+        try:
+            return await view(request, *args, **kwargs)
+        except Http404 as exc:
+            return JsonResponse({'error': str(exc) or 'Not found'}, status=404)
+        except BadRequest as exc:
+            return JsonResponse({'error': str(exc) or 'Bad request'}, status=400)
+    return wrapper
+
+
+# ===== SERIALIZERS =====
+def artist_data(artist):
+    return {'id': artist.ArtistId, 'name': artist.Name}
+
+
+def album_data(album):
+    return {'id': album.AlbumId, 'title': album.Title, 'artist_id': album.ArtistId_id}
+
+
+def listing_data(row):
+    """A track from its ``TrackListing`` row, with names and rating."""
+    return {
+        'id': row.track_id,
+        'name': row.name,
+        'album_id': row.album_id,
+        'composer': row.composer,
+        'milliseconds': row.milliseconds,
+        'unit_price': str(row.unit_price),
+        'album_title': row.album_title,
+        'artist_id': row.artist_id,
+        'artist_name': row.artist_name,
+        'genre': row.genre_name or None,
+        'media_type': row.media_type_name or None,
+        'duration': row.duration,
+        'avg_rating': row.avg_rating,
+        'review_count': row.review_count,
+    }
+
+
+def page_data(page):
+    return {
+        'page': page.number,
+        'num_pages': page.paginator.num_pages,
+        'count': page.paginator.count,
+    }
+
+
+# ===== ENDPOINTS =====
+@api_view
+async def artist_list(request):
+    """Artists ordered by name, optionally filtered by a name prefix."""
+    artists = Artist.objects.order_by('Name')
+    prefix = request.GET.get('q', '').strip()
+    if prefix:
+        artists = artists.filter(Name__istartswith=prefix)
+    page = await apaginate(artists, API_PAGE_SIZE, request.GET.get('page'))
+    add_cache_tags(request, 'artists')
+    return JsonResponse({
+        'results': [artist_data(artist) for artist in page],
+        **page_data(page),
+    })
+
+
+@api_view
+async def artist(request, artist_id):
+    """An artist with all of their albums."""
+    artist, albums = await gather_queries(
+        lambda: Artist.objects.filter(ArtistId=artist_id).first(),
+        lambda: list(Album.objects.filter(ArtistId=artist_id).order_by('Title')),
+    )
+    if artist is None:
+        raise Http404('Artist not found')
+    add_cache_tags(request, f'artist:{artist_id}')
+    return JsonResponse({
+        **artist_data(artist),
+        'albums': [album_data(album) for album in albums],
+    })
+
+
+@api_view
+async def album(request, album_id):
+    """An album with its tracks, running time and average rating."""
+    album, tracks = await gather_queries(
+        lambda: Album.objects.select_related('ArtistId').filter(AlbumId=album_id).first(),
+        lambda: list(TrackListing.objects.filter(album_id=album_id).order_by('track_id')),
+    )
+    if album is None:
+        raise Http404('Album not found')
+    review_count = sum(track.review_count for track in tracks)
+    rating_total = sum((track.avg_rating or 0) * track.review_count for track in tracks)
+    add_cache_tags(request, f'album:{album_id}', f'artist:{album.ArtistId_id}')
+    return JsonResponse({
+        **album_data(album),
+        'artist': artist_data(album.ArtistId) if album.ArtistId else None,
+        'total_milliseconds': sum(track.milliseconds for track in tracks),
+        'avg_rating': rating_total / review_count if review_count else None,
+        'review_count': review_count,
+        'tracks': [listing_data(track) for track in tracks],
+    })
+
+
+@api_view
+async def track(request, track_id):
+    """A track with album, artist and rating summary, from the listing."""
+    row = await TrackListing.objects.filter(track_id=track_id).afirst()
+    if row is None:
+        raise Http404('Track not found')
+    add_cache_tags(request, f'track:{track_id}', f'album:{row.album_id}')
+    return JsonResponse(listing_data(row))
+
+
+@api_view
+async def search(request):
+    """Search artists, albums and tracks at once."""
+    term = request.GET.get('q', '').strip()
+    if not term:
+        return JsonResponse({'artists': [], 'albums': [], 'tracks': []})
+    artists, albums, tracks = await gather_queries(
+        lambda: list(Artist.objects.filter(Q(Name__icontains=term)).order_by('Name')[:SEARCH_LIMIT]),
+        lambda: list(Album.objects.filter(Q(Title__icontains=term)).order_by('Title')[:SEARCH_LIMIT]),
+        lambda: list(TrackListing.objects.filter(Q(name__icontains=term)).order_by('name')[:SEARCH_LIMIT]),
+    )
+    return JsonResponse({
+        'artists': [artist_data(artist) for artist in artists],
+        'albums': [album_data(album) for album in albums],
+        'tracks': [listing_data(track) for track in tracks],
+    })
+
+
+@api_view
+async def artist_picker(request):
+    """One page of artists for the update/delete pickers."""
+    add_cache_tags(request, 'artists')
+    return JsonResponse(await sync_to_async(ARTIST_PICKER.search)(
+        request.GET.get('q'), request.GET.get('after')
+    ))
+
+
+@api_view
+async def album_picker(request):
+    """One page of albums for the update/delete pickers."""
+    add_cache_tags(request, 'albums', 'artists')
+    return JsonResponse(await sync_to_async(ALBUM_PICKER.search)(
+        request.GET.get('q'), request.GET.get('after')
+    ))
+
+
+# ===== BATCH ENDPOINTS =====
+def batch_ids(request):
+    """
+    Ids from ``?ids=3,1,2`` in request order, duplicates kept.
+
+    At most ``BATCH_API_MAX_IDS`` ids are accepted per request.
+    """
+    ids = []
+    for part in request.GET.get('ids', '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit():
+            raise BadRequest(f"Invalid id '{part}'")
+        ids.append(int(part))
+    if not ids:
+        raise BadRequest('No ids given')
+    if len(ids) > settings.BATCH_API_MAX_IDS:
+        raise BadRequest(f'At most {settings.BATCH_API_MAX_IDS} ids per request')
+    return ids
+
+
+def _grouped(queryset, key, **aggregates):
+    """One GROUP BY query: ``{key value: {alias: value}}``."""
+    return {
+        row.pop(key): row
+        for row in queryset.order_by().values(key).annotate(**aggregates)
+    }
+
+
+def _batch_response(ids, rows, serialize):
+    """Serialize ``rows`` (an in_bulk dict) in request order."""
+    return JsonResponse({
+        'results': [serialize(rows[pk]) for pk in ids if pk in rows],
+        'missing': [pk for pk in dict.fromkeys(ids) if pk not in rows],
+    })
+
+
+@api_view
+async def batch_tracks(request):
+    """Several tracks with album, artist and rating in one listing query."""
+    ids = batch_ids(request)
+    tracks = await sync_to_async(TrackListing.objects.in_bulk)(ids)
+    add_cache_tags(request, *(f'track:{pk}' for pk in tracks))
+    return _batch_response(ids, tracks, listing_data)
+
+
+@api_view
+async def batch_albums(request):
+    """Several albums with artist, track totals and rating."""
+    ids = batch_ids(request)
+    albums, totals = await gather_queries(
+        lambda: Album.objects.select_related('ArtistId').in_bulk(ids),
+        lambda: _grouped(
+            TrackListing.objects.filter(album_id__in=ids), 'album_id',
+            track_count=Count('pk'), **ALBUM_LISTING_STATS,
+        ),
+    )
+
+    def serialize(album):
+        stats = totals.get(album.AlbumId)
+        return {
+            **album_data(album),
+            'artist': artist_data(album.ArtistId) if album.ArtistId else None,
+            'track_count': stats['track_count'] if stats else 0,
+            'total_milliseconds': stats['duration'] if stats else 0,
+            'avg_rating': album_rating(stats) if stats else None,
+            'review_count': stats['review_count'] if stats else 0,
+        }
+
+    add_cache_tags(request, *(f'album:{pk}' for pk in albums))
+    return _batch_response(ids, albums, serialize)
+
+
+@api_view
+async def batch_artists(request):
+    """Several artists with their album counts."""
+    ids = batch_ids(request)
+    artists, counts = await gather_queries(
+        lambda: Artist.objects.in_bulk(ids),
+        lambda: _grouped(
+            Album.objects.filter(ArtistId__in=ids), 'ArtistId',
+            album_count=Count('pk'),
+        ),
+    )
+
+    def serialize(artist):
+        return {
+            **artist_data(artist),
+            'album_count': counts.get(artist.ArtistId, {}).get('album_count', 0),
+        }
+
+    add_cache_tags(request, *(f'artist:{pk}' for pk in artists))
+    return _batch_response(ids, artists, serialize)
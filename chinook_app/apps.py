@@ -11,4 +11,16 @@ class ChinookAppConfig(AppConfig):
             # Import error handlers
             from . import error_handlers
         except ImportError:
-            pass
\ No newline at end of file
+            pass
+
+        # Role cache invalidation on group membership changes
+        from . import roles  # noqa: F401
+
+        from django.db.models.signals import post_migrate
+        from .listing import populate_after_migrate
+        post_migrate.connect(populate_after_migrate, sender=self)
+
+        from django.conf import settings
+        if settings.TEMPLATE_PROFILER:
+            from .templating import install_profiler
+            install_profiler()
\ No newline at end of file
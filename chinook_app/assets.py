@@ -0,0 +1,331 @@
+"""
+Building blocks of the ``build_assets`` pipeline.
+
+* ``used_class_names`` scans templates and scripts for every word that
+  could be a CSS class. Classes built in templates as ``prefix-{{ var }}``
+  keep every class starting with ``prefix-`` (or just ``prefix-<default>``
+  when the variable has a ``|default:'...'``).
+* ``purge_css`` drops rules whose selectors all need a class that is never
+  used, recursing into ``@media`` and ``@supports`` blocks.
+* ``icon_codepoints`` lists the glyphs still referenced by Font Awesome
+  ``content``/``--fa`` declarations, and ``subset_font`` cuts a font down to
+  them when fontTools is installed.
+* ``minify_css`` and ``minify_js`` are conservative: whitespace and
+  comments go, nothing is renamed or reordered.
+* ``fold_class_names`` and ``critical_css`` cut the built stylesheet down
+  to the rules the top of a rendered page needs (``build_critical_css``).
+* ``asset_url`` resolves a logical bundle name through the manifest the
+  build writes, for ``{% asset_bundle %}``; ``critical_style`` returns a
+  page template's inlined critical CSS, for ``{% critical_css %}``.
+"""
+import json
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+
+from django.conf import settings
+
+MANIFEST_NAME = 'assets.json'
+CRITICAL_NAME = 'critical.json'
+
+# Classes that only Bootstrap's JavaScript adds at runtime
+SAFELIST = frozenset([
+    'show', 'showing', 'hiding', 'collapsing', 'collapse-horizontal', 'fade',
+    'active', 'disabled', 'modal-backdrop', 'modal-open', 'modal-static',
+    'offcanvas-backdrop', 'was-validated', 'is-valid', 'is-invalid',
+    'dropdown-menu-end', 'dropdown-menu-start', 'tooltip', 'tooltip-inner',
+    'tooltip-arrow', 'bs-tooltip-auto', 'popover', 'popover-arrow',
+    'popover-header', 'popover-body', 'bs-popover-auto',
+])
+
+_WORD = re.compile(r'[A-Za-z_][\w-]*')
+_DYNAMIC = re.compile(r'([A-Za-z_][\w-]*-)\{\{\s*[^}|]+(?:\|default:["\']([\w-]+)["\'])?')
+_CLASS = re.compile(r'\.(-?[A-Za-z_][\w-]*)')
+_NOT = re.compile(r':not\([^)]*\)')
+_ATTRIBUTE = re.compile(r'\[[^\]]*\]')
+_STRING = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+_COMMENT = re.compile(r'/\*(?!!).*?\*/', re.S)
+_ANY_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_ICON = re.compile(r'(?:content|--fa)\s*:\s*["\']\\([0-9a-fA-F]{4,5})["\']')
+
+
+# ===== CLASS SCAN =====
+def used_class_names(paths):
+    """Return ``(names, prefixes)`` of the classes ``paths`` may use."""
+    names = set(SAFELIST)
+    prefixes = set()
+    for path in paths:
+        text = Path(path).read_text(encoding='utf-8', errors='ignore')
+        for prefix, default in _DYNAMIC.findall(text):
+            if default:
+                names.add(prefix + default)
+            else:
+                prefixes.add(prefix)
+        names.update(_WORD.findall(text))
+    return names, tuple(sorted(prefixes))
+
+
+# ===== CSS PARSING AND PURGING =====
+def _skip_string(css, i):
+    quote = css[i]
+    i += 1
+    while i < len(css) and css[i] != quote:
+        i += 2 if css[i] == '\\' else 1
+    return i + 1
+
+
+def split_blocks(css):
+    """
+    Split a stylesheet into top-level ``(prelude, body)`` pairs.
+
+    ``body`` is the text between the braces, or None for statements such
+    as ``@charset ...;``.
+    """
+    blocks = []
+    start = i = 0
+    while i < len(css):
+        char = css[i]
+        if char in '"\'':
+            i = _skip_string(css, i)
+            continue
+        if char == ';':
+            prelude = css[start:i].strip()
+            if prelude:
+                blocks.append((prelude, None))
+            start = i = i + 1
+            continue
+        if char == '{':
+            depth, j = 1, i + 1
+            while j < len(css) and depth:
+                if css[j] in '"\'':
+                    j = _skip_string(css, j)
+                    continue
+                depth += {'{': 1, '}': -1}.get(css[j], 0)
+                j += 1
+            blocks.append((css[start:i].strip(), css[i + 1:j - 1]))
+            start = i = j
+            continue
+        if char == '}':
+            # Stray closing brace; skip it
+            start = i + 1
+        i += 1
+    return blocks
+
+
+def _selector_used(selector, names, prefixes):
+    bare = _ATTRIBUTE.sub('', _NOT.sub('', selector))
+    for name in _CLASS.findall(bare):
+        if name not in names and not name.startswith(prefixes):
+            return False
+    return True
+
+
+def purge_css(css, names, prefixes=()):
+    """
+    Drop the rules of ``css`` that can only match unused classes.
+
+    All comments, license banners included, are removed; callers prepend
+    the banners they need to keep.
+    """
+    css = _ANY_COMMENT.sub('', css)
+    out = []
+    for prelude, body in split_blocks(css):
+        if body is None:
+            # @charset is only valid first in a file; bundles add their own
+            if not prelude.startswith('@charset'):
+                out.append(prelude + ';')
+        elif prelude.startswith(('@media', '@supports', '@layer')):
+            inner = purge_css(body, names, prefixes)
+            if inner:
+                out.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@'):
+            # @font-face, @keyframes, @page ... are kept whole
+            out.append(f'{prelude}{{{body}}}')
+        else:
+            selectors = [
+                selector for selector in (s.strip() for s in prelude.split(','))
+                if selector and _selector_used(selector, names, prefixes)
+            ]
+            if selectors:
+                out.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(out)
+
+
+def minify_css(css):
+    """Strip comments (except ``/*!`` banners) and redundant whitespace."""
+    strings = []
+
+    def stash(match):
+        strings.append(match.group(0))
+        return f'\x00{len(strings) - 1}\x00'
+
+    css = _STRING.sub(stash, css)
+    css = _COMMENT.sub('', css)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+    return re.sub('\x00(\\d+)\x00', lambda m: strings[int(m.group(1))], css).strip()
+
+
+def minify_js(js):
+    """Drop blank lines, indentation and whole-line ``//`` comments."""
+    lines = []
+    for line in js.splitlines():
+        stripped = line.strip()
+        if stripped and not stripped.startswith('//'):
+            lines.append(stripped)
+    return '\n'.join(lines)
+
+
+# ===== ICON FONTS =====
+def icon_codepoints(css):
+    """Code points of the icon glyphs ``css`` still references."""
+    return sorted({int(code, 16) for code in _ICON.findall(css)})
+
+
+def subset_font(source, target, codepoints):
+    """
+    Write ``source`` cut down to ``codepoints`` as WOFF2 at ``target``.
+
+    Return False, after copying the font unchanged, if fontTools (with
+    brotli for WOFF2) is not installed.
+    """
+    try:
+        from fontTools import subset
+        import brotli  # noqa: F401  (needed by fontTools to write WOFF2)
+    except ImportError:
+        Path(target).write_bytes(Path(source).read_bytes())
+        return False
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['*']
+    font = subset.load_font(str(source), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    subset.save_font(font, str(target), options)
+    return True
+
+
+# ===== CRITICAL CSS =====
+class _FoldScanner(HTMLParser):
+    """Collect the classes of ``<body>`` elements above the fold."""
+
+    def __init__(self, fold):
+        super().__init__()
+        self.fold = fold
+        self.names = set()
+        self.in_body = self.in_main = False
+        self.seen = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'body':
+            self.in_body = True
+        if not self.in_body or self.seen >= self.fold:
+            return
+        if tag == 'main':
+            self.in_main = True
+        elif self.in_main:
+            # Everything before <main> (the navbar) is always above the fold
+            self.seen += 1
+        for name, value in attrs:
+            if name == 'class' and value:
+                self.names.update(value.split())
+
+
+def fold_class_names(html, fold):
+    """
+    Classes used by the part of ``html`` a first screen shows: the page
+    up to ``<main>`` and its first ``fold`` elements.
+    """
+    scanner = _FoldScanner(fold)
+    scanner.feed(html)
+    scanner.close()
+    return scanner.names
+
+
+def critical_css(css, names):
+    """
+    Rules of the built ``css`` that can match the classes ``names``.
+
+    ``@font-face`` rules are dropped: their URLs are relative to the
+    bundle, and the fonts arrive with the full stylesheet.
+    """
+    return ''.join(
+        f'{prelude}{{{body}}}' if body is not None else prelude + ';'
+        for prelude, body in split_blocks(purge_css(css, names))
+        if prelude != '@font-face'
+    )
+
+
+# ===== MANIFEST =====
+_manifest_cache = {}
+
+
+def dist_dir():
+    return Path(settings.ASSET_BUILD_DIR)
+
+
+def _read_json(name):
+    """Contents of build file ``name`` ({} if absent), reread when it changes."""
+    path = dist_dir() / name
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return {}
+    cached = _manifest_cache.get(name)
+    if cached is None or cached[0] != mtime:
+        cached = _manifest_cache[name] = (
+            mtime, json.loads(path.read_text(encoding='utf-8'))
+        )
+    return cached[1]
+
+
+def read_manifest():
+    """The ``{logical name: built file}`` map written by ``build_assets``."""
+    return _read_json(MANIFEST_NAME)
+
+
+def asset_url(name):
+    """URL of the built bundle ``name``, or '' if bundles are not in use."""
+    if not settings.ASSET_BUNDLES:
+        return ''
+    built = read_manifest().get(name)
+    if not built:
+        return ''
+    from django.templatetags.static import static
+    relative = dist_dir().relative_to(Path(settings.STATICFILES_DIRS[0]))
+    try:
+        return static(f'{relative.as_posix()}/{built}')
+    except ValueError:
+        # Built after the last collectstatic; not in its manifest yet
+        return ''
+
+
+def critical_style(template_name):
+    """
+    Critical CSS for pages rendered from ``template_name``, or ''.
+
+    Only returned while it was extracted from the current ``app.css``, so a
+    rebuilt bundle never pairs with stale critical rules.
+    """
+    if not (settings.CRITICAL_CSS and asset_url('app.css')):
+        return ''
+    critical = _read_json(CRITICAL_NAME)
+    if critical.get('app.css') != read_manifest().get('app.css'):
+        return ''
+    return critical.get('pages', {}).get(template_name, '')
+
+
+def asset_version():
+    """
+    Short tag of the asset build and settings in effect.
+
+    Part of the anonymous page cache key, so cached pages never keep a
+    ``<head>`` pointing at a previous build.
+    """
+    return '{}{}:{}:{}'.format(
+        int(settings.ASSET_BUNDLES), int(settings.CRITICAL_CSS),
+        read_manifest().get('app.css', ''), _read_json(CRITICAL_NAME).get('version', '')
+    )
@@ -0,0 +1,318 @@
+"""
+Async versions of the read-only catalogue views.
+
+They render the same templates with the same context as their counterparts
+in ``views.py`` and are switched on with ``ASYNC_READ_VIEWS`` (see
+``urls.py``). Under ASGI a slow query no longer occupies a worker, and
+independent queries on one page run concurrently.
+
+Django's async ORM methods (``aget``, ``acount``, ``async for``) all run on
+the request's single sync thread, so ``asyncio.gather`` over them would
+still execute one query at a time. Independent queries therefore go
+through ``gather_queries`` or ``QueryPlan.arun`` (see ``queries.py``),
+which give each its own executor thread and database connection.
+"""
+import logging
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import DatabaseError
+from django.db.models import Avg, Count, Q
+from django.http import Http404
+from django.shortcuts import render
+
+from .cache import add_cache_tags
+from .listing import ALBUM_LISTING_STATS, album_rating
+from .lookups import GENRES, MEDIA_TYPES
+from .models import Artist, Album, Track, TrackListing, Review
+from .queries import QueryPlan, gather_queries
+from .routers import replica_reads
+from .views import (
+    LIST_PAGE_SIZE, _dimension_entries, _dimension_tracks, _facet_browse
+)
+
+logger = logging.getLogger(__name__)
+
+
+# ===== ASYNC HELPERS =====
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def apaginate(queryset, per_page, page_number, count=None):
+    """Async equivalent of ``Paginator.get_page`` that evaluates the page."""
+    paginator = Paginator(queryset, per_page)
+    # Pre-fill the cached_property so the paginator never counts in sync code.
+    paginator.count = await queryset.acount() if count is None else count
+    try:
+        number = paginator.validate_number(page_number or 1)
+    except PageNotAnInteger:
+        number = 1
+    except EmptyPage:
+        number = paginator.num_pages
+    bottom = (number - 1) * per_page
+    items = await alist(queryset[bottom:bottom + per_page])
+    return Page(items, number, paginator)
+
+
+def _current_user(request):
+    # Resolving request.user hits the session store, which is sync-only.
+    return request.user if request.user.is_authenticated else None
+
+
+async def arender(request, template_name, context):
+    return await sync_to_async(render)(request, template_name, context)
+
+
+# ===== CORE VIEWS =====
+async def index(request):
+    """Homepage view with statistics and recent content."""
+    try:
+        (artists_count, albums_count, tracks_count,
+         recent_albums, recent_tracks, top_rated_tracks) = await gather_queries(
+            Artist.objects.count,
+            Album.objects.count,
+            Track.objects.count,
+            lambda: list(Album.objects.select_related('ArtistId').order_by('-AlbumId')[:5]),
+            lambda: list(TrackListing.objects.all()[:10]),
+            lambda: list(TrackListing.objects.filter(
+                avg_rating__gte=4
+            ).order_by('-avg_rating')[:5]),
+        )
+    except DatabaseError:
+        # A database without the catalogue tables still gets a home page
+        logger.exception('Could not load the home page statistics')
+        artists_count = albums_count = tracks_count = 0
+        recent_albums = recent_tracks = top_rated_tracks = []
+
+    add_cache_tags(request, 'artists', 'albums', 'tracks', 'reviews')
+    return await arender(request, 'chinook_app/index.html', {
+        'artists_count': artists_count,
+        'albums_count': albums_count,
+        'tracks_count': tracks_count,
+        'recent_albums': recent_albums,
+        'recent_tracks': recent_tracks,
+        'top_rated_tracks': top_rated_tracks
+    })
+
+
+async def all_artists(request):
+    """Display paginated list of all artists."""
+    page_obj = await apaginate(
+        Artist.objects.order_by('Name'), LIST_PAGE_SIZE, request.GET.get('page')
+    )
+    add_cache_tags(request, 'artists')
+    return await arender(request, 'chinook_app/artists.html', {
+        'artists': page_obj,
+        'ordering': 'Name'
+    })
+
+
+async def all_albums(request):
+    """Display paginated list of all albums."""
+    page_obj = await apaginate(
+        Album.objects.select_related('ArtistId').order_by('Title'),
+        LIST_PAGE_SIZE, request.GET.get('page')
+    )
+    add_cache_tags(request, 'albums', 'artists')
+    return await arender(request, 'chinook_app/albums.html', {
+        'albums': page_obj,
+        'ordering': 'Title'
+    })
+
+
+# ===== GENRE AND MEDIA TYPE BROWSE =====
+async def genres(request):
+    """List genres with their track counts."""
+    entries = await sync_to_async(_dimension_entries)(GENRES, 'genre_id')
+    add_cache_tags(request, 'genres', 'tracks')
+    return await arender(request, 'chinook_app/dimension_list.html', {
+        'title': 'Genres',
+        'entries': entries,
+        'detail_url': 'genre_tracks',
+    })
+
+
+async def genre_tracks(request, genre_id):
+    """Display paginated tracks of one genre."""
+    name, tracks = await sync_to_async(_dimension_tracks)(GENRES, 'genre_id', genre_id)
+    page_obj = await apaginate(tracks, LIST_PAGE_SIZE, request.GET.get('page'))
+    add_cache_tags(request, f'genre:{genre_id}', 'tracks')
+    return await arender(request, 'chinook_app/dimension_tracks.html', {
+        'title': name,
+        'kind': 'Genre',
+        'tracks': page_obj,
+        'list_url': 'genres',
+    })
+
+
+async def media_types(request):
+    """List media types with their track counts."""
+    entries = await sync_to_async(_dimension_entries)(MEDIA_TYPES, 'media_type_id')
+    add_cache_tags(request, 'media_types', 'tracks')
+    return await arender(request, 'chinook_app/dimension_list.html', {
+        'title': 'Media Types',
+        'entries': entries,
+        'detail_url': 'media_type_tracks',
+    })
+
+
+async def media_type_tracks(request, media_type_id):
+    """Display paginated tracks of one media type."""
+    name, tracks = await sync_to_async(_dimension_tracks)(
+        MEDIA_TYPES, 'media_type_id', media_type_id
+    )
+    page_obj = await apaginate(tracks, LIST_PAGE_SIZE, request.GET.get('page'))
+    add_cache_tags(request, f'media_type:{media_type_id}', 'tracks')
+    return await arender(request, 'chinook_app/dimension_tracks.html', {
+        'title': name,
+        'kind': 'Media Type',
+        'tracks': page_obj,
+        'list_url': 'media_types',
+    })
+
+
+# ===== FACETED TRACK BROWSER =====
+async def track_browser(request):
+    """Browse tracks by genre, media type, price, duration, size and composer."""
+    context = await sync_to_async(_facet_browse)(request.GET)
+    return await arender(request, 'chinook_app/track_browser.html', context)
+
+
+# ===== NAVIGATION VIEWS =====
+async def artist_detail(request, artist_id):
+    """Display artist details and their albums."""
+    # Track counts come with the page's rows instead of one query per album
+    albums = Album.objects.filter(ArtistId=artist_id).annotate(
+        num_tracks=Count('track')
+    ).order_by('Title')
+    data = await (
+        QueryPlan()
+        .get('artist', Artist.objects.filter(ArtistId=artist_id))
+        .page('albums', albums, 10, request.GET.get('page'))
+        .list('top_tracks', TrackListing.objects.filter(artist_id=artist_id)[:5])
+        .arun()
+    )
+    if data['artist'] is None:
+        raise Http404('No Artist matches the given query.')
+    page_obj = data['albums']
+
+    add_cache_tags(request, f'artist:{artist_id}', *(
+        f'album:{album.AlbumId}' for album in page_obj
+    ), *(
+        f'album:{track.album_id}' for track in data['top_tracks']
+    ))
+    return await arender(request, 'chinook_app/artist_detail.html', {
+        'artist': data['artist'],
+        'albums': page_obj,
+        'top_tracks': data['top_tracks'],
+        'album_count': page_obj.paginator.count,
+        'ordering': 'Title'
+    })
+
+
+async def album_detail(request, album_id):
+    """Display album details and tracks."""
+    tracks = TrackListing.objects.filter(album_id=album_id).order_by('track_id')
+    data = await (
+        QueryPlan()
+        .get('album', Album.objects.select_related('ArtistId').filter(AlbumId=album_id))
+        .page('tracks', tracks, 15, request.GET.get('page'))
+        .aggregate('tracks_stats', tracks, **ALBUM_LISTING_STATS)
+        .arun()
+    )
+    album = data['album']
+    if album is None:
+        raise Http404('No Album matches the given query.')
+    page_obj = data['tracks']
+
+    total_duration = data['tracks_stats']['duration'] or 0
+    minutes = total_duration // 60000
+    seconds = (total_duration % 60000) // 1000
+
+    add_cache_tags(request, f'album:{album_id}', f'artist:{album.ArtistId_id}')
+    return await arender(request, 'chinook_app/album_detail.html', {
+        'album': album,
+        'tracks': page_obj,
+        'total_duration': total_duration,
+        'duration_formatted': f"{minutes}:{seconds:02d}",
+        'avg_rating': album_rating(data['tracks_stats']),
+        'track_count': page_obj.paginator.count
+    })
+
+
+async def track_detail(request, track_id):
+    """Display track details and associated reviews."""
+    user = await sync_to_async(_current_user)(request)
+    reviews_qs = Review.objects.filter(track_id=track_id).select_related('user')
+    track, reviews, average_rating, user_review = await gather_queries(
+        lambda: Track.objects.select_related('AlbumId').filter(TrackId=track_id).first(),
+        lambda: list(reviews_qs),
+        lambda: reviews_qs.aggregate(Avg('rating'))['rating__avg'],
+        lambda: user and Review.objects.filter(track_id=track_id, user=user).first(),
+    )
+
+    if track is None:
+        reviews, user_review, average_rating = [], None, None
+        await sync_to_async(messages.error)(
+            request, 'Track not found or cannot be accessed.'
+        )
+    else:
+        album = track.AlbumId
+        add_cache_tags(request, f'track:{track_id}', *(
+            [f'album:{album.AlbumId}', f'artist:{album.ArtistId_id}']
+            if album else []
+        ))
+
+    return await arender(request, 'chinook_app/track_detail.html', {
+        'track': track,
+        'reviews': reviews,
+        'user_review': user_review or None,
+        'average_rating': average_rating
+    })
+
+
+# ===== SEARCH VIEWS =====
+async def _search(request, template_name, context_name, queryset_for):
+    results = None
+    search_term = ''
+    if request.method == 'POST':
+        search_term = request.POST.get('search_term', '')
+        if search_term:
+            results = await alist(queryset_for(search_term))
+    return await arender(request, template_name, {
+        context_name: results,
+        'search_term': search_term
+    })
+
+
+@replica_reads
+async def search_artist(request):
+    """Search artists by name."""
+    return await _search(
+        request, 'chinook_app/search_artist.html', 'artists',
+        lambda term: Artist.objects.filter(Q(Name__icontains=term)).order_by('Name')
+    )
+
+
+@replica_reads
+async def search_album(request):
+    """Search albums by title."""
+    return await _search(
+        request, 'chinook_app/search_album.html', 'albums',
+        lambda term: Album.objects.filter(
+            Q(Title__icontains=term)
+        ).select_related('ArtistId').order_by('Title')
+    )
+
+
+@replica_reads
+async def search_track(request):
+    """Search tracks by name."""
+    return await _search(
+        request, 'chinook_app/search_track.html', 'tracks',
+        lambda term: TrackListing.objects.filter(
+            Q(name__icontains=term)
+        ).order_by('name')
+    )
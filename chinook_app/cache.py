@@ -0,0 +1,154 @@
+"""
+Catalogue cache helpers for the Chinook Music Database application.
+
+Two invalidation schemes live here:
+
+* a single catalogue version used in template fragment cache keys, and
+* per-tag versions (``artist:<id>``, ``album:<id>``, ``track:<id>`` ...)
+  used by the anonymous page cache, so a write only expires the pages
+  that depend on the changed rows.
+
+Versions live in the default cache, so a bump only reaches other workers
+when that cache is shared (Redis). Without ``REDIS_URL`` both caches are
+off by default (``CATALOGUE_CACHE_TIMEOUT`` and ``PAGE_CACHE_TIMEOUT``).
+"""
+import time
+
+from django.core.cache import cache
+
+CATALOGUE_VERSION_KEY = 'catalogue:version'
+LAST_WRITE_KEY = 'catalogue:last-write'
+TAG_VERSION_PREFIX = 'page-tag:'
+
+# Carried by every cached page; purging it expires the whole page cache.
+GLOBAL_TAG = 'catalogue'
+
+
+def _fresh_version():
+    """Start from a time-based value so evicted versions are never reused."""
+    return int(time.time() * 1000)
+
+
+def _incr(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _fresh_version()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def get_catalogue_version():
+    """Return the current catalogue version used in fragment cache keys."""
+    version = cache.get(CATALOGUE_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOGUE_VERSION_KEY, _fresh_version(), timeout=None)
+        version = cache.get(CATALOGUE_VERSION_KEY)
+    return version
+
+
+def bump_catalogue_version():
+    """Invalidate all cached catalogue fragments after a write."""
+    return _incr(CATALOGUE_VERSION_KEY)
+
+
+# ===== DEPENDENCY TAGS =====
+def artist_tags(artist_id):
+    """Tags affected by a change to an artist row."""
+    return [f'artist:{artist_id}', 'artists']
+
+
+def album_tags(album_id, artist_id=None):
+    """Tags affected by a change to an album row."""
+    tags = [f'album:{album_id}', 'albums']
+    if artist_id is not None:
+        tags.append(f'artist:{artist_id}')
+    return tags
+
+
+def track_tags(track_id, album_id=None):
+    """Tags affected by a change to a track row."""
+    tags = [f'track:{track_id}', 'tracks']
+    if album_id is not None:
+        tags.append(f'album:{album_id}')
+    return tags
+
+
+def genre_tags(genre_id):
+    """Tags affected by a change to a genre row."""
+    return [f'genre:{genre_id}', 'genres']
+
+
+def media_type_tags(media_type_id):
+    """Tags affected by a change to a media type row."""
+    return [f'media_type:{media_type_id}', 'media_types']
+
+
+def review_tags(track_id, album_id=None):
+    """Tags affected by adding, editing or deleting a review."""
+    tags = [f'track:{track_id}', 'reviews']
+    if album_id is not None:
+        tags.append(f'album:{album_id}')
+    return tags
+
+
+def get_tag_versions(tags):
+    """Return the current version of each tag, initialising missing ones."""
+    keys = {TAG_VERSION_PREFIX + tag: tag for tag in tags}
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, _fresh_version(), timeout=None)
+        found.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in found.items()}
+
+
+def invalidate_tags(*tags):
+    """Expire every cached page that depends on any of the given tags."""
+    tags = set(tags)
+    for tag in tags:
+        _incr(TAG_VERSION_PREFIX + tag)
+    cache.set(LAST_WRITE_KEY, time.time(), timeout=None)
+    _log_changes(tags)
+    _sync_read_models(tags)
+
+
+def written_within(seconds):
+    """True if the catalogue changed in the last ``seconds`` seconds."""
+    last_write = cache.get(LAST_WRITE_KEY)
+    return last_write is not None and time.time() - last_write < seconds
+
+
+def _log_changes(tags):
+    """Append purged tags to the change log used by static snapshots."""
+    from .models import CatalogueChange
+
+    CatalogueChange.objects.bulk_create(
+        [CatalogueChange(tag=tag) for tag in sorted(tags)]
+    )
+
+
+def _sync_read_models(tags):
+    """Update the denormalized track listing once the write commits."""
+    from .listing import on_commit_sync
+
+    on_commit_sync(tags)
+
+
+def catalogue_changed(*tags):
+    """
+    Record a catalogue write.
+
+    Bumps the fragment version and purges the given page cache tags. Call it
+    after raw SQL writes; ORM saves and deletes are handled by signals.
+    """
+    bump_catalogue_version()
+    invalidate_tags(*tags)
+
+
+def add_cache_tags(request, *tags):
+    """Declare the tags the page being rendered for this request depends on."""
+    if not hasattr(request, 'page_cache_tags'):
+        request.page_cache_tags = {GLOBAL_TAG}
+    request.page_cache_tags.update(tags)
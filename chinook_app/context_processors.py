@@ -1,5 +1,8 @@
 from django.conf import settings
 
+from .roles import group_names, is_content_manager
+
+
 def site_settings(request):
     """Add site settings to all templates."""
     return {
@@ -9,4 +12,24 @@ def site_settings(request):
         'SITE_URL': getattr(settings, 'SITE_URL', 'http://localhost:8000'),
         'AVATAR_MAX_SIZE': getattr(settings, 'AVATAR_MAX_SIZE', 2 * 1024 * 1024),
         'AVATAR_ALLOWED_EXTENSIONS': getattr(settings, 'AVATAR_ALLOWED_EXTENSIONS', ['jpg', 'jpeg', 'png', 'gif']),
-    }
\ No newline at end of file
+        'CATALOGUE_CACHE_TIMEOUT': getattr(settings, 'CATALOGUE_CACHE_TIMEOUT', 0),
+    }
+
+
+def viewer_role(request):
+    """
+    Classify the visitor as guest, member or manager.
+
+    Cached catalogue list fragments include the role in their key and
+    render only that role's controls, so one copy is shared by everyone
+    with the same role. ``viewer_groups`` holds the user's group names
+    from the role resolver, for templates that need a specific group.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        role = 'guest'
+    elif is_content_manager(user):
+        role = 'manager'
+    else:
+        role = 'member'
+    return {'viewer_role': role, 'viewer_groups': group_names(user)}
@@ -0,0 +1,82 @@
+"""
+PostgreSQL backend that draws connections from a per-process pool.
+
+Enable it with ``ENGINE = 'chinook_app.db.backends.postgresql_pool'`` and an
+optional ``POOL`` dict in the database settings::
+
+    'POOL': {
+        'MIN_SIZE': 2,         # connections kept open while idle
+        'MAX_SIZE': 10,        # hard cap per process
+        'TIMEOUT': 10,         # seconds to wait for a free connection
+        'MAX_LIFETIME': 3600,  # recycle connections older than this
+        'MAX_IDLE': 600,       # close surplus connections idle this long
+        'CHECK_AFTER': 5,      # health-check connections idle this long
+    }
+
+Django's ``close()`` at the end of each request hands the connection back
+to the pool instead of closing it, so ``CONN_MAX_AGE`` should be ``0``.
+All threads of a process share one pool; forked workers start with an
+empty pool of their own (see ``chinook_app.db.pool``).
+"""
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresWrapper
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from chinook_app.db.pool import ConnectionPool, get_or_create_pool, get_pool
+
+# psycopg2 and psycopg 3 share these transaction status codes.
+TRANSACTION_IDLE = 0
+TRANSACTION_UNKNOWN = 4
+
+
+def _check(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+
+class DatabaseWrapper(PostgresWrapper):
+    def _get_pool(self, conn_params):
+        options = self.settings_dict.get('POOL', {})
+        connect = super().get_new_connection
+        return get_or_create_pool(self.alias, lambda: ConnectionPool(
+            lambda: connect(conn_params),
+            check=_check,
+            min_size=int(options.get('MIN_SIZE', 0)),
+            max_size=int(options.get('MAX_SIZE', 10)),
+            timeout=float(options.get('TIMEOUT', 10)),
+            max_lifetime=float(options.get('MAX_LIFETIME', 3600)),
+            max_idle=float(options.get('MAX_IDLE', 600)),
+            check_after=float(options.get('CHECK_AFTER', 5)),
+            name=self.alias,
+        ))
+
+    def get_new_connection(self, conn_params):
+        pool = self._get_pool(conn_params)
+        pool.fill()
+        connection = pool.acquire()
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        self.isolation_level = (
+            IsolationLevel.READ_COMMITTED if isolation_level is None
+            else IsolationLevel(isolation_level)
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = get_pool(self.alias)
+        if pool is None:
+            return super()._close()
+
+        connection = self.connection
+        # Closing inside an atomic block must really end the session.
+        discard = bool(connection.closed) or self.in_atomic_block
+        if not discard:
+            status = connection.info.transaction_status
+            if status == TRANSACTION_UNKNOWN:
+                discard = True
+            elif status != TRANSACTION_IDLE:
+                try:
+                    connection.rollback()
+                except self.Database.Error:
+                    discard = True
+        pool.release(connection, discard=discard)
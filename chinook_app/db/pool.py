@@ -0,0 +1,300 @@
+"""
+A small, thread-safe and fork-aware database connection pool.
+
+The pool knows nothing about Django or PostgreSQL: it is given a ``connect``
+callable that opens a raw DB-API connection and a ``check`` callable that
+raises if a connection is no longer usable. That keeps it usable with any
+driver, including ``sqlite3`` as a stand-in when no PostgreSQL server is
+available.
+
+Connections are handed out by ``acquire()`` and given back with
+``release()``. At most ``max_size`` connections exist per process; callers
+beyond that wait up to ``timeout`` seconds and then get ``PoolTimeout``.
+Idle connections are health-checked on checkout, recycled after
+``max_lifetime`` and trimmed back to ``min_size`` after ``max_idle``.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Connections inherited over fork() belong to the parent; they are parked
+# here so the child never closes (and thereby terminates) them.
+_INHERITED = []
+_POOLS = []
+
+# Pools created by the pooled database backend, keyed by database alias.
+_ALIASES = {}
+_aliases_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """No connection became available within the pool timeout."""
+
+
+class _Entry:
+    __slots__ = ('connection', 'created_at', 'released_at')
+
+    def __init__(self, connection):
+        now = time.monotonic()
+        self.connection = connection
+        self.created_at = now
+        self.released_at = now
+
+
+class ConnectionPool:
+    """Bounded pool of raw database connections."""
+
+    def __init__(self, connect, check=None, min_size=0, max_size=10,
+                 timeout=10.0, max_lifetime=3600.0, max_idle=600.0,
+                 check_after=5.0, name='default'):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError('Pool sizes must satisfy 0 <= min_size <= max_size >= 1.')
+        self.connect = connect
+        self.check = check
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.check_after = check_after
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._reset_state()
+        _POOLS.append(self)
+
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._idle = deque()
+        self._in_use = {}
+        self._pending = 0
+        self._stats = {
+            'connections_opened': 0,
+            'connections_closed': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'timeouts': 0,
+            'health_check_failures': 0,
+        }
+
+    # ----- public API -----
+    def acquire(self):
+        """Return a usable connection, opening or waiting for one if needed."""
+        self._check_pid()
+        deadline = time.monotonic() + self.timeout
+        waited_from = None
+
+        while True:
+            entry = None
+            with self._lock:
+                while True:
+                    if self._idle:
+                        entry = self._idle.pop()
+                        self._pending += 1
+                        break
+                    if self._size() < self.max_size:
+                        self._pending += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(
+                            f"No connection available in pool '{self.name}' "
+                            f"after {self.timeout:.1f}s (max_size={self.max_size})."
+                        )
+                    if waited_from is None:
+                        waited_from = time.monotonic()
+                        self._stats['waits'] += 1
+                    self._available.wait(remaining)
+
+            if entry is None:
+                entry = self._open()
+            elif not self._is_healthy(entry):
+                with self._lock:
+                    self._pending -= 1
+                self._discard(entry)
+                continue
+
+            with self._lock:
+                self._pending -= 1
+                self._in_use[id(entry.connection)] = entry
+                self._stats['checkouts'] += 1
+                if waited_from is not None:
+                    waited = time.monotonic() - waited_from
+                    self._stats['wait_time_total'] += waited
+                    self._stats['wait_time_max'] = max(self._stats['wait_time_max'], waited)
+            if waited_from is not None:
+                logger.debug(
+                    "Pool '%s' checkout waited %.3fs", self.name,
+                    time.monotonic() - waited_from,
+                )
+            return entry.connection
+
+    def release(self, connection, discard=False):
+        """Give a connection back; ``discard`` closes it instead of reusing it."""
+        with self._lock:
+            entry = self._in_use.pop(id(connection), None)
+        if entry is None:
+            # Checked out in the parent before a fork: leave it alone.
+            _INHERITED.append(connection)
+            return
+
+        now = time.monotonic()
+        if discard or now - entry.created_at > self.max_lifetime:
+            self._discard(entry)
+            return
+
+        entry.released_at = now
+        with self._lock:
+            self._idle.append(entry)
+            expired = self._trim_idle(now)
+            self._available.notify()
+        for stale in expired:
+            self._close(stale.connection)
+
+    def fill(self):
+        """Open connections until ``min_size`` exist."""
+        self._check_pid()
+        while True:
+            with self._lock:
+                if self._size() >= self.min_size:
+                    return
+                self._pending += 1
+            entry = self._open()
+            with self._lock:
+                self._pending -= 1
+                self._idle.appendleft(entry)
+                self._available.notify()
+
+    def close_idle(self):
+        """Close every idle connection (used before fork and on shutdown)."""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for entry in idle:
+            self._close(entry.connection)
+
+    def stats(self):
+        """Return pool size and wait metrics for this process."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(
+                name=self.name,
+                pid=self._pid,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                idle=len(self._idle),
+                in_use=len(self._in_use),
+            )
+        checkouts = stats['checkouts'] or 1
+        stats['wait_time_avg'] = stats['wait_time_total'] / checkouts
+        return stats
+
+    # ----- internals -----
+    def _size(self):
+        # Pending connections are being opened or health-checked.
+        return len(self._idle) + len(self._in_use) + self._pending
+
+    def _open(self):
+        try:
+            connection = self.connect()
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+                self._available.notify()
+            raise
+        with self._lock:
+            self._stats['connections_opened'] += 1
+        # Still counted as pending until the caller files it under the lock.
+        return _Entry(connection)
+
+    def _is_healthy(self, entry):
+        now = time.monotonic()
+        if now - entry.created_at > self.max_lifetime:
+            return False
+        if self.check is None or now - entry.released_at < self.check_after:
+            return True
+        try:
+            self.check(entry.connection)
+        except Exception:
+            with self._lock:
+                self._stats['health_check_failures'] += 1
+            logger.warning("Pool '%s' dropped a broken connection", self.name)
+            return False
+        return True
+
+    def _trim_idle(self, now):
+        """Pop idle connections beyond min_size that sat unused too long."""
+        expired = []
+        while (self._size() > self.min_size and self._idle
+               and now - self._idle[0].released_at > self.max_idle):
+            expired.append(self._idle.popleft())
+        return expired
+
+    def _discard(self, entry):
+        self._close(entry.connection)
+        with self._lock:
+            self._available.notify()
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._stats['connections_closed'] += 1
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._forget_inherited()
+
+    def _forget_inherited(self):
+        _INHERITED.extend(entry.connection for entry in self._idle)
+        _INHERITED.extend(entry.connection for entry in self._in_use.values())
+        self._reset_state()
+
+
+def get_pool(alias):
+    """Return the pool serving a database alias in this process, if any."""
+    return _ALIASES.get(alias)
+
+
+def pool_stats():
+    """Return ``stats()`` of every pool opened in this process, by alias."""
+    return {alias: pool.stats() for alias, pool in list(_ALIASES.items())}
+
+
+def get_or_create_pool(alias, factory):
+    """Return the pool for ``alias``, building it with ``factory()`` once."""
+    pool = _ALIASES.get(alias)
+    if pool is None:
+        with _aliases_lock:
+            pool = _ALIASES.get(alias)
+            if pool is None:
+                pool = _ALIASES[alias] = factory()
+    return pool
+
+
+def _before_fork():
+    for pool in _POOLS:
+        pool.close_idle()
+
+
+def _after_fork_in_child():
+    for pool in _POOLS:
+        pool._forget_inherited()
+        # The lock may have been held by another thread at fork time.
+        pool._lock = threading.Lock()
+        pool._available = threading.Condition(pool._lock)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=_before_fork, after_in_child=_after_fork_in_child)
@@ -0,0 +1,396 @@
+"""
+In-memory bitmap index behind the faceted track browser.
+
+Every facet value (a genre, a media type, a price, a duration or file size
+range, one of the most credited composers) owns a bitmap with bit ``n``
+set when track ``n`` has that value. Bitmaps are plain Python integers,
+so combining filters is a handful of ``&`` and ``|`` operations and a
+facet count is ``bit_count()`` of an intersection. Nothing re-scans or
+groups ``Track`` per request.
+
+Within a facet the selected values are OR-ed, across facets AND-ed. Each
+facet's counts are taken against the other facets' selections only, so
+users can see how many tracks picking another value would add.
+
+Each process builds the index from ``Track`` once and keeps it current
+from the ``CatalogueChange`` log (see ``cache.py``): at most once per
+``FACET_REFRESH_SECONDS`` it reads the entries it has not seen and
+re-indexes the tracks named by their ``track:<id>`` tags. A ``catalogue``
+entry (bulk loads) or a log pruned past its position rebuilds the index.
+Snapshots are never modified; updates build a new one and swap it in.
+
+Building collects each value's track ids into a ``bytearray`` and converts
+it to an integer once, so the cost is linear in the number of tracks. A
+web process builds the index at startup (``FACET_WARMUP``, see
+``startup.py``); rebuilds run in a background thread while requests keep
+using the previous snapshot.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Count, Max, Min
+
+from .cache import GLOBAL_TAG
+from .lookups import GENRES, MEDIA_TYPES
+from .models import CatalogueChange, Track
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# Bits counted, or scanned, per step when listing a bitmap's set bits
+_WINDOW_BITS = 1 << 16
+_WINDOW_MASK = (1 << _WINDOW_BITS) - 1
+
+# (key, label, lower bound, upper bound); the upper bound is exclusive
+DURATION_BUCKETS = [
+    ('0-2', 'Under 2 min', 0, 2 * 60000),
+    ('2-4', '2 to 4 min', 2 * 60000, 4 * 60000),
+    ('4-6', '4 to 6 min', 4 * 60000, 6 * 60000),
+    ('6-10', '6 to 10 min', 6 * 60000, 10 * 60000),
+    ('10+', '10 min and over', 10 * 60000, None),
+]
+SIZE_BUCKETS = [
+    ('0-2', 'Under 2 MB', 0, 2 * MB),
+    ('2-5', '2 to 5 MB', 2 * MB, 5 * MB),
+    ('5-10', '5 to 10 MB', 5 * MB, 10 * MB),
+    ('10-50', '10 to 50 MB', 10 * MB, 50 * MB),
+    ('50+', '50 MB and over', 50 * MB, None),
+]
+
+# (request parameter, heading) in display order
+FACETS = [
+    ('genre', 'Genre'),
+    ('media_type', 'Media Type'),
+    ('price', 'Price'),
+    ('duration', 'Duration'),
+    ('size', 'File Size'),
+    ('composer', 'Composer'),
+]
+
+TRACK_FIELDS = [
+    'TrackId', 'GenreId', 'MediaTypeId', 'UnitPrice', 'Milliseconds',
+    'Bytes', 'Composer',
+]
+
+
+def _bucket(buckets, value):
+    if value is None:
+        return None
+    for key, _, low, high in buckets:
+        if value >= low and (high is None or value < high):
+            return key
+    return None
+
+
+def _bucket_labels(buckets):
+    return {key: label for key, label, _, _ in buckets}
+
+
+def _set_bit(bits, n):
+    index = n >> 3
+    if index >= len(bits):
+        bits.extend(bytes(index + 1 - len(bits)))
+    bits[index] |= 1 << (n & 7)
+
+
+def _bitmap(bits):
+    return int.from_bytes(bits, 'little')
+
+
+def _set_bits(bitmap, offset=0, limit=None):
+    """
+    Positions of the set bits of ``bitmap`` in ascending order.
+
+    Works a window of bits at a time: windows holding only skipped bits are
+    passed over with one ``bit_count()``, and the bits of the others are
+    found by isolating the lowest one (``b & -b``) in the small window.
+    """
+    positions = []
+    base = 0
+    while bitmap and (limit is None or len(positions) < limit):
+        # Move to the lowest set bit, so empty stretches cost one step
+        gap = (bitmap & -bitmap).bit_length() - 1
+        bitmap >>= gap
+        base += gap
+        window = bitmap & _WINDOW_MASK
+        count = window.bit_count()
+        if count <= offset:
+            offset -= count
+        else:
+            while window and (limit is None or len(positions) < limit):
+                lowest = window & -window
+                if offset:
+                    offset -= 1
+                else:
+                    positions.append(base + lowest.bit_length() - 1)
+                window ^= lowest
+        bitmap >>= _WINDOW_BITS
+        base += _WINDOW_BITS
+    return positions
+
+
+class FacetSnapshot:
+    """
+    Bitmaps of every facet value as of log entry ``last_change``.
+
+    A snapshot is filled while it is built and never changed once
+    published; ``updated`` returns a modified copy.
+    """
+
+    def __init__(self, bitmaps, everything, composers, last_change):
+        self.bitmaps = bitmaps
+        self.everything = everything
+        self.composers = composers
+        self.last_change = last_change
+
+    def _keys(self, row):
+        track_id, genre_id, media_type_id, price, milliseconds, size, composer = row
+        return {
+            'genre': str(genre_id) if genre_id is not None else None,
+            'media_type': str(media_type_id) if media_type_id is not None else None,
+            'price': str(price) if price is not None else None,
+            'duration': _bucket(DURATION_BUCKETS, milliseconds),
+            'size': _bucket(SIZE_BUCKETS, size),
+            'composer': composer if composer in self.composers else None,
+        }
+
+    def _add(self, rows):
+        # One bytearray per value, turned into an integer at the end: OR-ing
+        # each track's bit into an integer would copy it every time
+        everything = bytearray()
+        values = {facet: {} for facet in self.bitmaps}
+        for row in rows:
+            _set_bit(everything, row[0])
+            for facet, key in self._keys(row).items():
+                if key is not None:
+                    _set_bit(values[facet].setdefault(key, bytearray()), row[0])
+        self.everything |= _bitmap(everything)
+        for facet, keys in values.items():
+            bitmaps = self.bitmaps[facet]
+            for key, bits in keys.items():
+                bitmaps[key] = bitmaps.get(key, 0) | _bitmap(bits)
+
+    def updated(self, track_ids, rows, last_change):
+        """Return a new snapshot with ``track_ids`` re-indexed from ``rows``."""
+        snapshot = FacetSnapshot(
+            {facet: dict(values) for facet, values in self.bitmaps.items()},
+            self.everything, self.composers, last_change,
+        )
+        removed = bytearray()
+        for track_id in track_ids:
+            _set_bit(removed, track_id)
+        removed = _bitmap(removed) & snapshot.everything
+        if removed:
+            snapshot.everything &= ~removed
+            for values in snapshot.bitmaps.values():
+                for key, bitmap in list(values.items()):
+                    if bitmap & removed:
+                        bitmap &= ~removed
+                        if bitmap:
+                            values[key] = bitmap
+                        else:
+                            del values[key]
+        snapshot._add(rows)
+        return snapshot
+
+    def _union(self, facet, keys):
+        values = self.bitmaps[facet]
+        union = 0
+        for key in keys:
+            union |= values.get(key, 0)
+        return union
+
+    def search(self, selected):
+        """
+        Return ``(matches, counts)`` for ``selected``, a dict of facet name
+        to the set of chosen value keys.
+
+        ``matches`` is the bitmap of matching track ids; ``counts`` maps
+        each facet to ``{key: count}`` under the other facets' filters.
+        """
+        unions = {
+            facet: self._union(facet, keys)
+            for facet, keys in selected.items() if keys
+        }
+        matches = self.everything
+        for union in unions.values():
+            matches &= union
+
+        counts = {}
+        for facet, _ in FACETS:
+            base = self.everything
+            for other, union in unions.items():
+                if other != facet:
+                    base &= union
+            counts[facet] = {
+                key: (bitmap & base).bit_count()
+                for key, bitmap in self.bitmaps[facet].items()
+            }
+        return matches, counts
+
+
+class BitmapIds:
+    """Sequence view of a bitmap's set bits, sliceable by ``Paginator``."""
+
+    def __init__(self, bitmap):
+        self.bitmap = bitmap
+
+    def __len__(self):
+        return self.bitmap.bit_count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('BitmapIds only supports slicing.')
+        start = index.start or 0
+        limit = None if index.stop is None else max(index.stop - start, 0)
+        return _set_bits(self.bitmap, start, limit)
+
+
+class FacetIndex:
+    """Process-wide, lazily built and incrementally refreshed facet index."""
+
+    def __init__(self):
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._rebuilding = False
+        self._lock = threading.Lock()
+
+    def _rows(self, queryset):
+        return queryset.order_by('TrackId').values_list(*TRACK_FIELDS)
+
+    def build(self):
+        """Index every track from scratch."""
+        # Taken first, so writes during the scan are replayed afterwards.
+        last_change = CatalogueChange.objects.aggregate(latest=Max('id'))['latest'] or 0
+        composers = frozenset(
+            Track.objects.exclude(Composer__isnull=True).exclude(Composer='')
+            .values('Composer').annotate(tracks=Count('TrackId'))
+            .order_by('-tracks', 'Composer')
+            .values_list('Composer', flat=True)[:settings.FACET_COMPOSER_LIMIT]
+        )
+        snapshot = FacetSnapshot(
+            {facet: {} for facet, _ in FACETS}, 0, composers, last_change
+        )
+        snapshot._add(self._rows(Track.objects.all()).iterator(chunk_size=5000))
+        return snapshot
+
+    def _rebuild(self):
+        try:
+            snapshot = self.build()
+        except DatabaseError:
+            logger.exception('Could not rebuild the facet index')
+            snapshot = None
+        finally:
+            # Not a request thread, so request_finished never closes it
+            connection.close()
+        with self._lock:
+            if snapshot is not None and self._snapshot is not None:
+                self._snapshot = snapshot
+            self._rebuilding = False
+
+    def _start_rebuild(self):
+        # Called with the lock held; requests keep the current snapshot
+        if not self._rebuilding:
+            self._rebuilding = True
+            threading.Thread(
+                target=self._rebuild, name='facet-rebuild', daemon=True
+            ).start()
+
+    def _catch_up(self, snapshot):
+        changes = list(
+            CatalogueChange.objects.filter(id__gt=snapshot.last_change)
+            .values_list('id', 'tag')
+        )
+        if not changes:
+            return snapshot
+        first = CatalogueChange.objects.aggregate(first=Min('id'))['first']
+        tags = {tag for _, tag in changes}
+        if GLOBAL_TAG in tags or first > snapshot.last_change + 1:
+            # Bulk load, or entries we never saw were pruned
+            self._start_rebuild()
+            return snapshot
+        track_ids = set()
+        for tag in tags:
+            kind, _, pk = tag.partition(':')
+            if kind == 'track' and pk.isdigit():
+                track_ids.add(int(pk))
+        last_change = max(change_id for change_id, _ in changes)
+        if not track_ids:
+            return snapshot.updated((), (), last_change)
+        rows = self._rows(Track.objects.filter(TrackId__in=track_ids))
+        return snapshot.updated(track_ids, rows, last_change)
+
+    def get(self):
+        """Return the current snapshot, applying any logged track changes."""
+        snapshot = self._snapshot
+        if (snapshot is not None
+                and time.monotonic() - self._checked_at < settings.FACET_REFRESH_SECONDS):
+            return snapshot
+        with self._lock:
+            if self._snapshot is None:
+                # Only when not built at startup (see warm)
+                self._snapshot = self.build()
+            elif not self._rebuilding:
+                self._snapshot = self._catch_up(self._snapshot)
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def warm(self):
+        """Build the index now, so no request waits for it; log failures."""
+        try:
+            self.get()
+        except DatabaseError:
+            logger.exception('Could not build the facet index')
+
+    def reset(self):
+        """Drop the index so the next ``get`` rebuilds it."""
+        with self._lock:
+            self._snapshot = None
+
+
+TRACK_FACETS = FacetIndex()
+
+
+def facet_groups(counts, selected):
+    """
+    Sidebar data: one ``{'name', 'title', 'values'}`` dict per facet.
+
+    ``values`` lists ``{'key', 'label', 'count', 'selected'}`` for every
+    value with matches or currently selected; ranges keep their natural
+    order, prices sort by amount and named values by name.
+    """
+    labels = {
+        'genre': {str(pk): name for pk, name in GENRES.get().names.items()},
+        'media_type': {str(pk): name for pk, name in MEDIA_TYPES.get().names.items()},
+        'duration': _bucket_labels(DURATION_BUCKETS),
+        'size': _bucket_labels(SIZE_BUCKETS),
+    }
+    orders = {
+        'duration': [bucket[0] for bucket in DURATION_BUCKETS],
+        'size': [bucket[0] for bucket in SIZE_BUCKETS],
+    }
+    groups = []
+    for facet, title in FACETS:
+        chosen = selected.get(facet, set())
+        names = labels.get(facet, {})
+        values = [
+            {
+                'key': key,
+                'label': (f'${key}' if facet == 'price' else names.get(key, key)),
+                'count': count,
+                'selected': key in chosen,
+            }
+            for key, count in counts[facet].items() if count or key in chosen
+        ]
+        if facet in orders:
+            values.sort(key=lambda value: orders[facet].index(value['key']))
+        elif facet == 'price':
+            values.sort(key=lambda value: float(value['key']))
+        else:
+            values.sort(key=lambda value: value['label'].lower())
+        groups.append({'name': facet, 'title': title, 'values': values})
+    return groups
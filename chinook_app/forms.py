@@ -410,21 +410,8 @@ class CustomSignupForm(SignupForm):
     def save(self, request):
         user = super().save(request)
 
-        # Create security questions
-        security_questions = SecurityQuestion(
-            user=user,
-            question_1=self.cleaned_data['question_1'],
-            answer_1=self.cleaned_data['answer_1'].lower().strip(),
-            question_2=self.cleaned_data['question_2'],
-            answer_2=self.cleaned_data['answer_2'].lower().strip(),
-            question_3=self.cleaned_data['question_3'],
-            answer_3=self.cleaned_data['answer_3'].lower().strip(),
-            question_4=self.cleaned_data['question_4'],
-            answer_4=self.cleaned_data['answer_4'].lower().strip(),
-            question_5=self.cleaned_data['question_5'],
-            answer_5=self.cleaned_data['answer_5'].lower().strip(),
-        )
-        security_questions.save()
+        # Create security questions (answers are hashed on save)
+        SecurityQuestion.from_answers(user, self.cleaned_data).save()
 
         return user
 
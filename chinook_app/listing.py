@@ -0,0 +1,202 @@
+"""
+Maintenance of the denormalized ``TrackListing`` read model.
+
+Every catalogue write already reports the rows it touched as cache tags
+(``artist:<id>``, ``album:<id>``, ``track:<id>``, see ``cache.py``), and
+``invalidate_tags`` hands those tags to ``sync_tags`` once the write has
+committed:
+
+* ``track:<id>`` re-reads the track, its album, artist and rating summary
+  and upserts the listing row, or deletes it if the track is gone;
+* ``album:<id>`` copies the album title and artist onto its tracks' rows;
+* ``artist:<id>`` copies the artist name onto its tracks' rows;
+* ``genre:<id>`` and ``media_type:<id>`` reload the lookup tables (see
+  ``lookups.py``) and copy the new name onto the matching rows.
+
+``rebuild`` recreates the whole table in chunks; it backs
+``manage.py rebuild_track_listing`` and fills the table after the
+migration that creates it.
+"""
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Avg, Count, F, Sum
+
+from .lookups import GENRES, MEDIA_TYPES
+from .models import Album, Artist, Review, Track, TrackListing
+
+REBUILD_CHUNK_SIZE = 5000
+
+UPDATE_FIELDS = [
+    'name', 'composer', 'album_id', 'album_title', 'artist_id', 'artist_name',
+    'genre_id', 'genre_name', 'media_type_id', 'media_type_name',
+    'milliseconds', 'duration', 'unit_price', 'avg_rating', 'review_count',
+]
+
+
+# Album totals over its listing rows, for QueryPlan.aggregate()
+ALBUM_LISTING_STATS = {
+    'duration': Sum('milliseconds'),
+    'rating_total': Sum(F('avg_rating') * F('review_count')),
+    'review_count': Sum('review_count'),
+}
+
+
+def album_rating(stats):
+    """Average review rating of an album from ``ALBUM_LISTING_STATS``."""
+    if not stats['review_count']:
+        return None
+    return stats['rating_total'] / stats['review_count']
+
+
+def format_duration(milliseconds):
+    minutes = milliseconds // 60000
+    seconds = (milliseconds % 60000) // 1000
+    return f"{minutes}:{seconds:02d}"
+
+
+def _listing_rows(tracks):
+    """Build listing rows for ``tracks`` with one grouped rating query."""
+    ratings = {
+        row['track_id']: row
+        for row in Review.objects.filter(
+            track_id__in=[track.TrackId for track in tracks]
+        ).order_by().values('track_id').annotate(
+            avg_rating=Avg('rating'), review_count=Count('id')
+        )
+    }
+    genres, media_types = GENRES.get(), MEDIA_TYPES.get()
+    rows = []
+    for track in tracks:
+        album = track.AlbumId
+        artist = album.ArtistId if album else None
+        rating = ratings.get(track.TrackId, {})
+        rows.append(TrackListing(
+            track_id=track.TrackId,
+            name=track.Name,
+            composer=track.Composer,
+            album_id=album.AlbumId if album else None,
+            album_title=album.Title if album else '',
+            artist_id=artist.ArtistId if artist else None,
+            artist_name=artist.Name if artist else '',
+            genre_id=track.GenreId_id,
+            genre_name=genres.name(track.GenreId_id),
+            media_type_id=track.MediaTypeId_id,
+            media_type_name=media_types.name(track.MediaTypeId_id),
+            milliseconds=track.Milliseconds,
+            duration=format_duration(track.Milliseconds),
+            unit_price=track.UnitPrice,
+            avg_rating=rating.get('avg_rating'),
+            review_count=rating.get('review_count', 0),
+        ))
+    return rows
+
+
+def refresh_tracks(track_ids):
+    """Upsert the listing rows of ``track_ids``; drop rows of deleted tracks."""
+    tracks = list(Track.objects.select_related(
+        'AlbumId__ArtistId'
+    ).filter(TrackId__in=track_ids))
+    TrackListing.objects.bulk_create(
+        _listing_rows(tracks),
+        update_conflicts=True,
+        unique_fields=['track_id'],
+        update_fields=UPDATE_FIELDS,
+    )
+    gone = set(track_ids) - {track.TrackId for track in tracks}
+    if gone:
+        TrackListing.objects.filter(track_id__in=gone).delete()
+
+
+def refresh_albums(album_ids):
+    """Copy album titles and artists onto their tracks' listing rows."""
+    for album in Album.objects.select_related('ArtistId').filter(AlbumId__in=album_ids):
+        TrackListing.objects.filter(album_id=album.AlbumId).update(
+            album_title=album.Title,
+            artist_id=album.ArtistId_id,
+            artist_name=album.ArtistId.Name if album.ArtistId else '',
+        )
+
+
+def refresh_artists(artist_ids):
+    """Copy artist names onto their tracks' listing rows."""
+    for artist in Artist.objects.filter(ArtistId__in=artist_ids):
+        TrackListing.objects.filter(artist_id=artist.ArtistId).update(
+            artist_name=artist.Name
+        )
+
+
+def refresh_lookup_names(lookup, id_field, name_field, ids):
+    """Reload ``lookup`` and copy its names for ``ids`` onto listing rows."""
+    lookup.reset()
+    table = lookup.get()
+    for pk in ids:
+        TrackListing.objects.filter(**{id_field: pk}).update(
+            **{name_field: table.name(pk)}
+        )
+
+
+def sync_tags(tags):
+    """Bring the listing up to date with a write that purged ``tags``."""
+    ids = {'track': set(), 'album': set(), 'artist': set(),
+           'genre': set(), 'media_type': set()}
+    for tag in tags:
+        kind, sep, pk = tag.partition(':')
+        if sep and kind in ids and pk.isdigit():
+            ids[kind].add(int(pk))
+    if ids['track']:
+        refresh_tracks(ids['track'])
+    if ids['album']:
+        refresh_albums(ids['album'])
+    if ids['artist']:
+        refresh_artists(ids['artist'])
+    if ids['genre']:
+        refresh_lookup_names(GENRES, 'genre_id', 'genre_name', ids['genre'])
+    if ids['media_type']:
+        refresh_lookup_names(
+            MEDIA_TYPES, 'media_type_id', 'media_type_name', ids['media_type']
+        )
+
+
+def on_commit_sync(tags):
+    """Run ``sync_tags`` after the current transaction commits."""
+    tags = set(tags)
+    transaction.on_commit(lambda: sync_tags(tags))
+
+
+def rebuild(chunk_size=REBUILD_CHUNK_SIZE, progress=None):
+    """
+    Recreate every listing row from the source tables.
+
+    Tracks are read in primary key chunks so memory stays flat on large
+    catalogues. The table is replaced inside one transaction, so readers
+    keep seeing the old rows until the new ones are complete. Returns the
+    number of rows written.
+    """
+    GENRES.reset()
+    MEDIA_TYPES.reset()
+    total = 0
+    with transaction.atomic():
+        TrackListing.objects.all().delete()
+        last_id = 0
+        while True:
+            tracks = list(Track.objects.select_related(
+                'AlbumId__ArtistId'
+            ).filter(TrackId__gt=last_id).order_by('TrackId')[:chunk_size])
+            if not tracks:
+                break
+            TrackListing.objects.bulk_create(_listing_rows(tracks))
+            last_id = tracks[-1].TrackId
+            total += len(tracks)
+            if progress:
+                progress(total)
+    return total
+
+
+def populate_after_migrate(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Fill an empty listing once the migrations have created its table."""
+    if using != DEFAULT_DB_ALIAS:
+        return
+    tables = connections[using].introspection.table_names()
+    if TrackListing._meta.db_table not in tables or Track._meta.db_table not in tables:
+        return
+    if not TrackListing.objects.exists() and Track.objects.exists():
+        rebuild()
@@ -0,0 +1,88 @@
+"""
+Process-wide lookup tables for the small catalogue dimensions.
+
+Genres and media types are a few dozen rows that almost never change, yet
+every track refers to one of each. Rather than joining them into every
+query, each process loads a table once into an immutable ``LookupTable``
+snapshot and serves names and choices from memory.
+
+Snapshots are refreshed on change. Writes to ``Genre`` and ``MediaType``
+purge the ``genres`` and ``media_types`` cache tags (see ``models.py``),
+and every process compares the tag version its snapshot was loaded at
+with the shared one at most once per ``LOOKUP_REFRESH_SECONDS``. The
+process that made the write reloads straight away, from ``listing.sync_tags``.
+"""
+import threading
+import time
+from types import MappingProxyType
+
+from django.conf import settings
+
+from .cache import get_tag_versions
+from .models import Genre, MediaType
+
+
+class LookupTable:
+    """Immutable ``id -> name`` snapshot of one dimension table."""
+
+    __slots__ = ('names', 'version')
+
+    def __init__(self, names, version):
+        object.__setattr__(self, 'names', MappingProxyType(dict(names)))
+        object.__setattr__(self, 'version', version)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('LookupTable snapshots are immutable.')
+
+    def __contains__(self, pk):
+        return pk in self.names
+
+    def __len__(self):
+        return len(self.names)
+
+    def name(self, pk, default=''):
+        """Name of row ``pk``, or ``default`` for None and unknown ids."""
+        return self.names.get(pk, default) or default
+
+    def choices(self):
+        """``(id, name)`` pairs ordered by name, for filters and lists."""
+        return sorted(self.names.items(), key=lambda item: (item[1] or '', item[0]))
+
+
+class Lookup:
+    """Lazily loaded, version-checked ``LookupTable`` for ``model``."""
+
+    def __init__(self, model, name_field, tag):
+        self.model = model
+        self.name_field = name_field
+        self.tag = tag
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the current snapshot, reloading it if the table changed."""
+        snapshot = self._snapshot
+        if (snapshot is not None
+                and time.monotonic() - self._checked_at < settings.LOOKUP_REFRESH_SECONDS):
+            return snapshot
+        with self._lock:
+            # Read the version first: a write racing the load leaves the
+            # snapshot one version behind, so the next check reloads it.
+            version = get_tag_versions([self.tag])[self.tag]
+            if self._snapshot is None or self._snapshot.version != version:
+                self._snapshot = LookupTable(
+                    self.model.objects.order_by().values_list('pk', self.name_field),
+                    version,
+                )
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def reset(self):
+        """Drop the snapshot so the next ``get`` reloads it."""
+        with self._lock:
+            self._snapshot = None
+
+
+GENRES = Lookup(Genre, 'Name', 'genres')
+MEDIA_TYPES = Lookup(MediaType, 'Name', 'media_types')
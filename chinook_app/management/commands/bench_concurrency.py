@@ -0,0 +1,121 @@
+"""
+Load-test running servers with concurrent clients and compare them.
+
+Each ``--target`` is ``label=base_url``; every target receives the same
+request mix, cycling through ``--path`` values, from ``--concurrency``
+client threads. Throughput and latency percentiles are reported side by
+side, so a WSGI and an ASGI deployment can be compared directly:
+
+    gunicorn chinook_project.wsgi -w 4 -b 127.0.0.1:8000
+    gunicorn chinook_project.asgi -w 4 -k uvicorn.workers.UvicornWorker -b 127.0.0.1:8001
+    python manage.py bench_concurrency \\
+        --target wsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001 \\
+        --concurrency 64 --requests 2000
+"""
+import threading
+import time
+import urllib.error
+import urllib.request
+from itertools import count
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = [
+    '/', '/artists/', '/albums/', '/artist/1/', '/album/1/',
+    '/api/albums/1/', '/api/search/?q=the',
+]
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = 'Compare throughput and latency of running servers under concurrency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', action='append', required=True,
+            help='label=base_url, e.g. asgi=http://127.0.0.1:8001 (repeatable).'
+        )
+        parser.add_argument(
+            '--path', action='append',
+            help='Path to request (repeatable); defaults to a catalogue mix.'
+        )
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--timeout', type=float, default=30.0)
+        parser.add_argument(
+            '--warmup', type=int, default=20,
+            help='Unmeasured requests sent to each target first.'
+        )
+
+    def handle(self, *args, **options):
+        targets = []
+        for spec in options['target']:
+            label, sep, base = spec.partition('=')
+            if not sep or not base.startswith('http'):
+                raise CommandError(f"Invalid --target '{spec}'; expected label=http://host:port")
+            targets.append((label, base.rstrip('/')))
+        paths = options['path'] or DEFAULT_PATHS
+
+        self.stdout.write(
+            f"{options['requests']} requests per target, "
+            f"{options['concurrency']} concurrent clients, {len(paths)} path(s)\n"
+        )
+        self.stdout.write(
+            f"{'target':<10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'max ms':>8} {'errors':>7}"
+        )
+        for label, base in targets:
+            self._run(base, paths, options['warmup'], 1, options['timeout'])
+            result = self._run(
+                base, paths, options['requests'], options['concurrency'],
+                options['timeout']
+            )
+            latencies = sorted(result['latencies'])
+            self.stdout.write(
+                f"{label:<10} {len(latencies) / result['elapsed']:>8.1f} "
+                f"{percentile(latencies, 0.50) * 1000:>8.1f} "
+                f"{percentile(latencies, 0.95) * 1000:>8.1f} "
+                f"{percentile(latencies, 0.99) * 1000:>8.1f} "
+                f"{(latencies[-1] if latencies else 0) * 1000:>8.1f} "
+                f"{result['errors']:>7}"
+            )
+
+    def _run(self, base, paths, total, concurrency, timeout):
+        counter = count()
+        lock = threading.Lock()
+        latencies, errors = [], [0]
+
+        def client():
+            while True:
+                index = next(counter)
+                if index >= total:
+                    return
+                url = base + paths[index % len(paths)]
+                started = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(url, timeout=timeout) as response:
+                        response.read()
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        latencies.append(elapsed)
+                except (urllib.error.URLError, OSError):
+                    with lock:
+                        errors[0] += 1
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {
+            'latencies': latencies,
+            'errors': errors[0],
+            'elapsed': time.perf_counter() - started,
+        }
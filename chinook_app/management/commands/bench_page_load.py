@@ -0,0 +1,325 @@
+"""
+Compare first paint of the catalogue pages across asset modes.
+
+Every page in ``build_critical_css.PAGES`` is rendered in each mode:
+
+    cdn       ASSET_BUNDLES=False: the CDN stylesheets base.html used before
+    bundle    the built app.css as one render-blocking stylesheet
+    critical  inlined critical CSS, app.css loaded without blocking
+
+By default the load is simulated the way Lighthouse's throttled runs are:
+the page is rendered in-process, its render-blocking stylesheets and
+scripts are read from the HTML, and their gzipped sizes are timed on a
+network of ``--rtt`` ms round trips and ``--kbps`` throughput (Lighthouse's
+mobile "Slow 4G" profile by default). Each new origin costs DNS, TCP and
+TLS round trips. Reported per page:
+
+    blocking  requests (and gzipped KB) that must arrive before first paint
+    inline    KB of CSS inlined into the page
+    FCP       simulated first contentful paint
+    styled    all stylesheets applied
+    DCL       all scripts loaded (DOMContentLoaded)
+
+With ``--browser`` the pages are served by an in-process live server and
+loaded in headless Chromium via Playwright (``pip install playwright &&
+playwright install chromium``), with the same network throttling applied
+through the DevTools protocol; FCP, DOMContentLoaded and load are read
+from the browser's performance timeline. The cdn mode needs internet
+access in this case.
+
+Usage:
+    python manage.py build_assets && python manage.py build_critical_css
+    python manage.py bench_page_load
+    python manage.py bench_page_load --mode cdn --mode critical --rtt 40 --kbps 10000
+    python manage.py bench_page_load --browser --runs 5
+"""
+import gzip
+import statistics
+import time
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from chinook_app.management.commands.build_assets import VENDOR_FILES
+from chinook_app.management.commands.build_critical_css import PAGES
+
+MODES = {
+    'cdn': {'ASSET_BUNDLES': False},
+    'bundle': {'ASSET_BUNDLES': True, 'CRITICAL_CSS': False},
+    'critical': {'ASSET_BUNDLES': True, 'CRITICAL_CSS': True},
+}
+# Approximate gzipped sizes of the pinned CDN files, for when they have
+# not been vendored by build_assets
+CDN_TRANSFER_BYTES = {
+    'bootstrap.min.css': 31_000,
+    'all.min.css': 19_000,
+    'bootstrap.bundle.min.js': 23_600,
+}
+# DNS, TCP and TLS before the first request to an origin
+CONNECT_ROUND_TRIPS = 3
+
+BROWSER_TIMING = """() => {
+    const nav = performance.getEntriesByType('navigation')[0];
+    const paint = performance.getEntriesByName('first-contentful-paint')[0];
+    return {
+        fcp: paint ? paint.startTime : null,
+        dcl: nav.domContentLoadedEventEnd,
+        load: nav.loadEventEnd,
+    };
+}"""
+
+
+class _ResourceScanner(HTMLParser):
+    """Collect a page's stylesheets, scripts and inline CSS."""
+
+    def __init__(self):
+        super().__init__()
+        self.in_head = False
+        self.in_style = False
+        self.in_noscript = False
+        self.stylesheets = []   # (url, blocking)
+        self.scripts = []       # (url, blocking)
+        self.inline_css = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'noscript':
+            # Only used with scripting off; a browser ignores its content
+            self.in_noscript = True
+        elif self.in_noscript:
+            return
+        elif tag == 'head':
+            self.in_head = True
+        elif tag == 'body':
+            self.in_head = False
+        elif tag == 'link' and attrs.get('href'):
+            rel = (attrs.get('rel') or '').split()
+            if 'stylesheet' in rel:
+                blocking = attrs.get('media', 'all') in ('all', 'screen')
+                self.stylesheets.append((attrs['href'], blocking))
+            elif 'preload' in rel and attrs.get('as') == 'style':
+                self.stylesheets.append((attrs['href'], False))
+        elif tag == 'script' and attrs.get('src'):
+            deferred = 'defer' in attrs or 'async' in attrs or attrs.get('type') == 'module'
+            # Only a synchronous script in <head> holds up the first paint
+            self.scripts.append((attrs['src'], self.in_head and not deferred))
+        elif tag == 'style' and self.in_head:
+            self.in_style = True
+
+    def handle_endtag(self, tag):
+        if tag == 'style':
+            self.in_style = False
+        elif tag == 'noscript':
+            self.in_noscript = False
+
+    def handle_data(self, data):
+        if self.in_style:
+            self.inline_css += len(data.encode('utf-8'))
+
+
+def _static_content(url):
+    """Bytes of a local static URL or a vendored CDN URL, or None."""
+    if url.startswith(settings.STATIC_URL):
+        name = url[len(settings.STATIC_URL):].split('?')[0]
+        path = finders.find(name)
+        if not path and staticfiles_storage.exists(name):
+            path = staticfiles_storage.path(name)
+        return Path(path).read_bytes() if path else None
+    for relative, source in VENDOR_FILES.items():
+        if source == url:
+            path = Path(settings.ASSET_VENDOR_DIR) / relative
+            return path.read_bytes() if path.exists() else None
+    return None
+
+
+def transfer_bytes(url):
+    content = _static_content(url)
+    if content is not None:
+        return len(gzip.compress(content))
+    return CDN_TRANSFER_BYTES.get(url.rsplit('/', 1)[-1], 0)
+
+
+class Command(BaseCommand):
+    help = 'Compare simulated (or headless-browser) first paint across asset modes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode', action='append', choices=list(MODES),
+            help='Mode to measure (repeatable); defaults to all.'
+        )
+        parser.add_argument('--rtt', type=float, default=150.0, help='Round trip, ms.')
+        parser.add_argument('--kbps', type=float, default=1638.4, help='Throughput, Kbit/s.')
+        parser.add_argument('--runs', type=int, default=3, help='Loads per page; the median is kept.')
+        parser.add_argument(
+            '--browser', action='store_true',
+            help='Measure in headless Chromium (needs Playwright) instead of simulating.'
+        )
+        parser.add_argument(
+            '--host', default='localhost',
+            help='Host header used for rendering (must be in ALLOWED_HOSTS).'
+        )
+
+    def page_urls(self):
+        urls = []
+        for template_name, url_name, model in PAGES:
+            args = []
+            if model is not None:
+                pk = model.objects.order_by('pk').values_list('pk', flat=True).first()
+                if pk is None:
+                    continue
+                args = [pk]
+            urls.append((template_name.rsplit('/', 1)[-1], reverse(url_name, args=args)))
+        return urls
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs must be positive.')
+        modes = options['mode'] or list(MODES)
+        pages = self.page_urls()
+        if options['browser']:
+            results = self.measure_browser(modes, pages, options)
+            columns = ('FCP', 'DCL', 'load')
+        else:
+            results = self.simulate(modes, pages, options)
+            columns = ('blocking', 'inline', 'FCP', 'styled', 'DCL')
+
+        self.stdout.write(
+            f"RTT {options['rtt']:.0f} ms, {options['kbps']:.0f} Kbit/s, "
+            f"median of {options['runs']} run(s); times in ms\n"
+        )
+        self.stdout.write(f"{'page':<20} {'mode':<9}" + ''.join(f"{c:>12}" for c in columns))
+        for page, _ in pages:
+            for mode in modes:
+                row = results[mode][page]
+                self.stdout.write(
+                    f"{page:<20} {mode:<9}" + ''.join(f"{row[c]:>12}" for c in columns)
+                )
+        self.stdout.write('')
+        for mode in modes:
+            fcps = [results[mode][page]['fcp_ms'] for page, _ in pages]
+            if fcps and None not in fcps:
+                self.stdout.write(f"{mode:<9} median FCP {statistics.median(fcps):.0f} ms")
+
+    # ----- simulation -----
+    def simulate(self, modes, pages, options):
+        rtt = options['rtt']
+        ms_per_byte = 8 / options['kbps']
+        client = Client(raise_request_exception=False, HTTP_HOST=options['host'])
+        document_origin = options['host']
+        results = {}
+        for mode in modes:
+            results[mode] = {}
+            with override_settings(**MODES[mode]):
+                for page, url in pages:
+                    server_ms = []
+                    for _ in range(options['runs']):
+                        started = time.perf_counter()
+                        response = client.get(url)
+                        server_ms.append((time.perf_counter() - started) * 1000)
+                    if response.status_code != 200:
+                        raise CommandError(f"{url} returned {response.status_code}")
+                    html = response.content
+                    scanner = _ResourceScanner()
+                    scanner.feed(html.decode(response.charset))
+
+                    # The document: connect, request, render, transfer
+                    document_end = (
+                        (CONNECT_ROUND_TRIPS + 1) * rtt + statistics.median(server_ms)
+                        + len(gzip.compress(html)) * ms_per_byte
+                    )
+
+                    def fetch_time(resources):
+                        """Time for ``resources`` fetched in parallel after the document."""
+                        if not resources:
+                            return 0.0
+                        origins = {urlsplit(u).netloc or document_origin for u in resources}
+                        new_origins = origins - {document_origin}
+                        latency = (CONNECT_ROUND_TRIPS * rtt if new_origins else 0) + rtt
+                        size = sum(transfer_bytes(u) for u in resources)
+                        return latency + size * ms_per_byte
+
+                    blocking = [
+                        u for u, is_blocking in scanner.stylesheets + scanner.scripts
+                        if is_blocking
+                    ]
+                    all_css = [u for u, _ in scanner.stylesheets]
+                    scripts = [u for u, _ in scanner.scripts]
+                    blocking_bytes = sum(transfer_bytes(u) for u in blocking)
+                    fcp = document_end + fetch_time(blocking)
+                    results[mode][page] = {
+                        'blocking': f"{len(blocking)} / {blocking_bytes / 1024:.0f}KB",
+                        'inline': f"{scanner.inline_css / 1024:.1f}KB",
+                        'fcp_ms': fcp,
+                        'FCP': f"{fcp:.0f}",
+                        'styled': f"{document_end + fetch_time(all_css):.0f}",
+                        'DCL': f"{document_end + fetch_time(all_css + scripts):.0f}",
+                    }
+        return results
+
+    # ----- headless browser -----
+    def measure_browser(self, modes, pages, options):
+        try:
+            from playwright.sync_api import sync_playwright
+        except ImportError:
+            raise CommandError(
+                'Playwright is not installed: pip install playwright && playwright install chromium'
+            )
+        from django.contrib.staticfiles.handlers import StaticFilesHandler
+        from django.test.testcases import LiveServerThread
+
+        server = LiveServerThread(options['host'], StaticFilesHandler, port=0)
+        server.daemon = True
+        server.start()
+        server.is_ready.wait()
+        if server.error:
+            raise CommandError(f"Could not start the live server: {server.error}")
+        base = f"http://{options['host']}:{server.port}"
+        throughput = options['kbps'] * 1000 / 8
+        conditions = {
+            'offline': False, 'latency': options['rtt'],
+            'downloadThroughput': throughput, 'uploadThroughput': throughput,
+        }
+        results = {}
+        try:
+            with sync_playwright() as playwright:
+                browser = playwright.chromium.launch(headless=True)
+                for mode in modes:
+                    results[mode] = {}
+                    # The server thread reads the same settings object
+                    with override_settings(**MODES[mode]):
+                        for page_name, url in pages:
+                            timings = []
+                            for _ in range(options['runs']):
+                                context = browser.new_context()
+                                page = context.new_page()
+                                devtools = context.new_cdp_session(page)
+                                devtools.send('Network.enable')
+                                devtools.send('Network.setCacheDisabled', {'cacheDisabled': True})
+                                devtools.send('Network.emulateNetworkConditions', conditions)
+                                page.goto(base + url, wait_until='load')
+                                timings.append(page.evaluate(BROWSER_TIMING))
+                                context.close()
+                            row = {
+                                key: statistics.median(
+                                    t[key] for t in timings if t[key] is not None
+                                ) if any(t[key] is not None for t in timings) else None
+                                for key in ('fcp', 'dcl', 'load')
+                            }
+                            results[mode][page_name] = {
+                                'fcp_ms': row['fcp'],
+                                'FCP': f"{row['fcp']:.0f}" if row['fcp'] is not None else '-',
+                                'DCL': f"{row['dcl']:.0f}",
+                                'load': f"{row['load']:.0f}",
+                            }
+                browser.close()
+        finally:
+            server.terminate()
+        return results
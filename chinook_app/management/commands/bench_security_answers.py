@@ -0,0 +1,96 @@
+"""
+Time security-question verification.
+
+Compares, per verification of two answers:
+
+* ``plaintext``: the former path, a ``getattr`` scan of the five fields
+  and a ``.lower().strip()`` comparison with stored plaintext;
+* ``digest``: ``SecurityQuestion.check_answers`` on salted digests;
+* ``fetch+digest`` (with ``--username``): the reset flow's indexed fetch
+  of the user's row followed by ``check_answers``.
+
+Nothing is written to the database.
+
+Usage:
+    python manage.py bench_security_answers --iterations 20000
+    python manage.py bench_security_answers --username alice
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from chinook_app.answers import hash_answer
+from chinook_app.models import SecurityQuestion
+
+SAMPLE = {
+    'question_1': 'birth_year', 'answer_1': '1980',
+    'question_2': 'father_birth_year', 'answer_2': '1950',
+    'question_3': 'mother_name', 'answer_3': 'Mary',
+    'question_4': 'father_name', 'answer_4': 'John',
+    'question_5': 'favourite_colour', 'answer_5': 'Dark Blue',
+}
+ATTEMPTS = [('mother_name', ' mary '), ('favourite_colour', 'DARK BLUE')]
+
+
+def _plaintext_check(row, attempts):
+    correct = 0
+    for question, answer in attempts:
+        for question_field, answer_field in SecurityQuestion.QUESTION_FIELDS:
+            if getattr(row, question_field) == question:
+                if getattr(row, answer_field).lower() == answer.strip().lower():
+                    correct += 1
+                break
+    return correct == len(attempts)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark security-question answer verification.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=10000)
+        parser.add_argument(
+            '--username',
+            help='Also time fetching and checking this user\'s row (answers will not match).'
+        )
+
+    def _time(self, label, iterations, func):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{label:<14} {elapsed / iterations * 1e6:>10.1f} us/verification"
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        if iterations < 1:
+            raise CommandError('--iterations must be positive.')
+
+        plaintext = SecurityQuestion(**SAMPLE)
+        # Hashed in memory the way save() would, without writing a row
+        hashed = SecurityQuestion.from_answers(None, SAMPLE)
+        for _, answer_field in SecurityQuestion.QUESTION_FIELDS:
+            setattr(hashed, answer_field, hash_answer(SAMPLE[answer_field]))
+        if not (_plaintext_check(plaintext, ATTEMPTS) and hashed.check_answers(ATTEMPTS)):
+            raise CommandError('Sample answers did not verify.')
+
+        self.stdout.write(f"{iterations} verifications of {len(ATTEMPTS)} answers")
+        self._time('plaintext', iterations, lambda: _plaintext_check(plaintext, ATTEMPTS))
+        self._time('digest', iterations, lambda: hashed.check_answers(ATTEMPTS))
+
+        username = options['username']
+        if username:
+            if not SecurityQuestion.objects.filter(user__username=username).exists():
+                raise CommandError(f"No security questions for '{username}'.")
+
+            def fetch_and_check():
+                row = SecurityQuestion.objects.get(user__username=username)
+                row.check_answers(ATTEMPTS)
+
+            with CaptureQueriesContext(connection) as queries:
+                fetch_and_check()
+            self._time('fetch+digest', iterations, fetch_and_check)
+            self.stdout.write(f"Queries per fetch+digest verification: {len(queries)}")
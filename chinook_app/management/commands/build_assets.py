@@ -0,0 +1,190 @@
+"""
+Build self-hosted, purged and fingerprinted CSS/JS bundles.
+
+Bootstrap and Font Awesome are downloaded once (pinned versions) into
+``ASSET_VENDOR_DIR`` (``assets/vendor/``). The stylesheets are purged of selectors for classes no
+template or script uses, the Font Awesome fonts are subset to the icons
+still referenced, and everything is concatenated and minified into
+``ASSET_BUILD_DIR`` (``static/dist/``) under content-hashed names:
+
+    app.<hash>.css   Bootstrap + Font Awesome + css/style.css
+    app.<hash>.js    Bootstrap bundle + js/script.js
+    fa-*.<hash>.woff2
+
+``assets.json`` maps ``app.css``/``app.js`` to the current files, which
+base.html loads through ``{% asset_bundle %}``. ``collectstatic`` then
+copies them into ``STATIC_ROOT`` where
+``CompressedManifestStaticFilesStorage`` adds gzip/brotli variants.
+
+Usage:
+    python manage.py build_assets
+    python manage.py build_assets --offline     # never download
+    python manage.py build_assets && python manage.py collectstatic --noinput
+"""
+import hashlib
+import json
+import re
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from chinook_app.assets import (
+    MANIFEST_NAME, icon_codepoints, minify_css, minify_js, purge_css,
+    split_blocks, subset_font, used_class_names
+)
+
+BOOTSTRAP = 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist'
+FONT_AWESOME = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0'
+
+# Vendored file (under ASSET_VENDOR_DIR) -> source URL
+VENDOR_FILES = {
+    'bootstrap-5.3.2/bootstrap.min.css': f'{BOOTSTRAP}/css/bootstrap.min.css',
+    'bootstrap-5.3.2/bootstrap.bundle.min.js': f'{BOOTSTRAP}/js/bootstrap.bundle.min.js',
+    'fontawesome-6.4.0/all.min.css': f'{FONT_AWESOME}/css/all.min.css',
+    'fontawesome-6.4.0/webfonts/fa-solid-900.woff2': f'{FONT_AWESOME}/webfonts/fa-solid-900.woff2',
+    'fontawesome-6.4.0/webfonts/fa-regular-400.woff2': f'{FONT_AWESOME}/webfonts/fa-regular-400.woff2',
+    'fontawesome-6.4.0/webfonts/fa-brands-400.woff2': f'{FONT_AWESOME}/webfonts/fa-brands-400.woff2',
+}
+CSS_SOURCES = [
+    ('vendor', 'bootstrap-5.3.2/bootstrap.min.css', 'Bootstrap v5.3.2 | MIT'),
+    ('vendor', 'fontawesome-6.4.0/all.min.css', 'Font Awesome Free 6.4.0 | https://fontawesome.com/license/free'),
+    ('static', 'css/style.css', None),
+]
+JS_SOURCES = [
+    ('vendor', 'bootstrap-5.3.2/bootstrap.bundle.min.js', 'Bootstrap v5.3.2 | MIT'),
+    ('static', 'js/script.js', None),
+]
+FONT_URL = re.compile(r'url\(["\']?\.\./webfonts/([\w-]+)\.woff2["\']?\)')
+
+
+def fingerprint(content):
+    return hashlib.sha256(content).hexdigest()[:12]
+
+
+class Command(BaseCommand):
+    help = 'Vendor, purge, subset, minify and fingerprint the CSS/JS bundles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--offline', action='store_true',
+            help='Fail instead of downloading missing vendor files.'
+        )
+
+    # ----- steps -----
+    def fetch_vendor(self, vendor_dir, offline):
+        for relative, url in VENDOR_FILES.items():
+            path = vendor_dir / relative
+            if path.exists():
+                continue
+            if offline:
+                raise CommandError(f"Missing {path}; run without --offline to download it.")
+            self.stdout.write(f"  downloading {url}")
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    content = response.read()
+            except (urllib.error.URLError, OSError) as exc:
+                raise CommandError(f"Could not download {url}: {exc}")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+
+    def write(self, dist, stem, suffix, content):
+        name = f'{stem}.{fingerprint(content)}{suffix}'
+        (dist / name).write_bytes(content)
+        return name
+
+    def build_fonts(self, dist, font_dir, codepoints):
+        built = {}
+        for source in sorted(font_dir.glob('*.woff2')):
+            target = dist / f'{source.stem}.tmp.woff2'
+            subsetted = subset_font(source, target, codepoints)
+            content = target.read_bytes()
+            target.unlink()
+            built[source.stem] = self.write(dist, source.stem, '.woff2', content)
+            self.stdout.write(
+                f"  {source.name}: {source.stat().st_size // 1024} KB -> "
+                f"{len(content) // 1024} KB{'' if subsetted else ' (fontTools not installed, not subset)'}"
+            )
+        return built
+
+    def point_font_faces(self, css, fonts):
+        """Load each @font-face from its built WOFF2 only; drop the unbuilt."""
+        out = []
+        for prelude, body in split_blocks(css):
+            if body is None:
+                out.append(prelude + ';')
+                continue
+            if prelude == '@font-face':
+                match = FONT_URL.search(body)
+                if not match or match.group(1) not in fonts:
+                    continue
+                body = re.sub(
+                    r'src:[^;}]+', f'src:url({fonts[match.group(1)]}) format("woff2")', body
+                )
+            out.append(f'{prelude}{{{body}}}')
+        return ''.join(out)
+
+    def handle(self, *args, **options):
+        static_dir = Path(settings.STATICFILES_DIRS[0])
+        vendor_dir = Path(settings.ASSET_VENDOR_DIR)
+        dist = Path(settings.ASSET_BUILD_DIR)
+        self.fetch_vendor(vendor_dir, options['offline'])
+        roots = {'vendor': vendor_dir, 'static': static_dir}
+
+        scanned = [
+            *Path(settings.BASE_DIR, 'templates').rglob('*.html'),
+            *Path(settings.BASE_DIR, 'chinook_app').rglob('*.html'),
+            static_dir / 'js' / 'script.js',
+        ]
+        names, prefixes = used_class_names(scanned)
+        self.stdout.write(
+            f"Scanned {len(scanned)} files: {len(names)} names, "
+            f"dynamic prefixes {', '.join(prefixes) or 'none'}"
+        )
+
+        # Remove the previous build; names change with content
+        dist.mkdir(parents=True, exist_ok=True)
+        for old in dist.iterdir():
+            if old.is_file():
+                old.unlink()
+
+        parts = []
+        for root, relative, banner in CSS_SOURCES:
+            source = (roots[root] / relative).read_text(encoding='utf-8')
+            purged = purge_css(source, names, prefixes)
+            self.stdout.write(
+                f"  {relative}: {len(source) // 1024} KB -> {len(purged) // 1024} KB after purge"
+            )
+            parts.append((f'/*! {banner} */' if banner else '') + purged)
+        css = '@charset "UTF-8";' + ''.join(parts)
+
+        codepoints = icon_codepoints(css)
+        fonts = self.build_fonts(
+            dist, vendor_dir / 'fontawesome-6.4.0' / 'webfonts', codepoints
+        )
+        self.stdout.write(f"  {len(codepoints)} icons referenced")
+        css = minify_css(self.point_font_faces(css, fonts))
+
+        js_parts = []
+        for root, relative, banner in JS_SOURCES:
+            source = (roots[root] / relative).read_text(encoding='utf-8')
+            js_parts.append(
+                (f'/*! {banner} */\n' if banner else '')
+                + (source if relative.endswith('.min.js') else minify_js(source))
+            )
+        js = ';\n'.join(js_parts)
+
+        manifest = {
+            'app.css': self.write(dist, 'app', '.css', css.encode('utf-8')),
+            'app.js': self.write(dist, 'app', '.js', js.encode('utf-8')),
+        }
+        (dist / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+
+        for logical, built in manifest.items():
+            size = (dist / built).stat().st_size
+            self.stdout.write(f"  {logical} -> {built} ({size // 1024} KB)")
+        self.stdout.write(self.style.SUCCESS(
+            f"Assets built in {dist}. Run collectstatic to publish them."
+        ))
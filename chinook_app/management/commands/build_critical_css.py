@@ -0,0 +1,91 @@
+"""
+Extract the above-the-fold CSS of each catalogue page template.
+
+Each page in ``PAGES`` is rendered as an anonymous visitor sees it. The
+classes of its navbar and of the first ``--fold`` elements of ``<main>``
+select the rules of the built ``app.css`` that the first screen needs.
+The result is written to ``critical.json`` next to the bundles, keyed by
+template name. base.html inlines it through ``{% critical_css %}`` and
+loads ``app.css`` without blocking the first paint.
+
+Run after ``build_assets``; rebuilding the bundles invalidates the
+critical CSS until this runs again.
+
+Usage:
+    python manage.py build_assets && python manage.py build_critical_css
+    python manage.py build_critical_css --fold 60
+"""
+import hashlib
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from chinook_app.assets import (
+    CRITICAL_NAME, critical_css, dist_dir, fold_class_names, minify_css, read_manifest
+)
+from chinook_app.models import Album, Artist
+
+# (template, url name, model whose first row the page shows)
+PAGES = [
+    ('chinook_app/index.html', 'home', None),
+    ('chinook_app/artists.html', 'all_artists', None),
+    ('chinook_app/albums.html', 'all_albums', None),
+    ('chinook_app/artist_detail.html', 'artist_detail', Artist),
+    ('chinook_app/album_detail.html', 'album_detail', Album),
+]
+DEFAULT_FOLD = 40
+
+
+class Command(BaseCommand):
+    help = 'Extract per-page critical CSS from the built app.css.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fold', type=int, default=DEFAULT_FOLD,
+            help='Elements of <main> counted as above the fold.'
+        )
+        parser.add_argument(
+            '--host', default='localhost',
+            help='Host header used for rendering (must be in ALLOWED_HOSTS).'
+        )
+
+    def handle(self, *args, **options):
+        built = read_manifest().get('app.css')
+        if not built:
+            raise CommandError('No app.css bundle; run build_assets first.')
+        css = (dist_dir() / built).read_text(encoding='utf-8')
+        client = Client(raise_request_exception=False, HTTP_HOST=options['host'])
+
+        pages = {}
+        for template_name, url_name, model in PAGES:
+            args = []
+            if model is not None:
+                pk = model.objects.order_by('pk').values_list('pk', flat=True).first()
+                if pk is None:
+                    self.stdout.write(f"  {template_name}: skipped, no {model.__name__} rows")
+                    continue
+                args = [pk]
+            url = reverse(url_name, args=args)
+            response = client.get(url)
+            if response.status_code != 200:
+                self.stdout.write(f"  {template_name}: skipped, {url} returned {response.status_code}")
+                continue
+            names = fold_class_names(response.content.decode(response.charset), options['fold'])
+            pages[template_name] = minify_css(critical_css(css, names))
+            self.stdout.write(
+                f"  {template_name}: {len(names)} classes, "
+                f"{len(pages[template_name]) // 1024} KB of {len(css) // 1024} KB"
+            )
+
+        content = json.dumps(pages, sort_keys=True)
+        (dist_dir() / CRITICAL_NAME).write_text(json.dumps({
+            'app.css': built,
+            'version': hashlib.sha256(content.encode('utf-8')).hexdigest()[:12],
+            'pages': pages,
+        }), encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(
+            f"Critical CSS for {len(pages)} page templates written to "
+            f"{dist_dir() / CRITICAL_NAME}."
+        ))
@@ -0,0 +1,258 @@
+"""
+Pre-render the public catalogue to gzip/brotli-compressed static HTML.
+
+Pages are rendered exactly as an anonymous visitor would see them and written
+to ``STATIC_SITE_ROOT`` (``/artist/1/`` -> ``artist/1/index.html``, paginated
+lists under ``page/<n>/``). With ``--incremental`` only the pages affected by
+entries in the ``CatalogueChange`` log since the previous build are rendered.
+``StaticSnapshotMiddleware`` or a front proxy can then serve the files.
+
+Usage:
+    python manage.py build_static_site --workers 4
+    python manage.py build_static_site --incremental
+"""
+import json
+import math
+import os
+import time
+from multiprocessing import get_all_start_methods, get_context
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Max
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from whitenoise.compress import Compressor
+
+from chinook_app.cache import GLOBAL_TAG
+from chinook_app.models import Artist, Album, Track, CatalogueChange
+from chinook_app.views import LIST_PAGE_SIZE
+
+MANIFEST_NAME = '.snapshot.json'
+URLS_PER_TASK = 200
+
+# Worker process state, populated by _init_worker.
+_STATE = {}
+
+
+def output_path(root, url):
+    """Return the index.html path a snapshot URL is written to."""
+    path, _, query = url.partition('?')
+    relative = path.strip('/')
+    if query:
+        page = query.split('=', 1)[1]
+        relative = f'{relative}/page/{page}'.lstrip('/')
+    return Path(root) / relative / 'index.html'
+
+
+def _remove(path):
+    for candidate in (path, f'{path}.gz', f'{path}.br'):
+        try:
+            os.remove(candidate)
+        except FileNotFoundError:
+            pass
+
+
+def _init_worker(root, host):
+    # Snapshot files must never be used as the source of a new snapshot.
+    override = override_settings(STATIC_SNAPSHOT_MODE=False)
+    override.enable()
+    _STATE['root'] = root
+    _STATE['client'] = Client(raise_request_exception=False, HTTP_HOST=host)
+    _STATE['compressor'] = Compressor(quiet=True)
+
+
+def _render_urls(urls):
+    """Render a batch of URLs; return (written, removed, failed) counts."""
+    client = _STATE['client']
+    compressor = _STATE['compressor']
+    written = removed = failed = 0
+
+    for url in urls:
+        path = output_path(_STATE['root'], url)
+        response = client.get(url)
+        if response.status_code == 404:
+            _remove(path)
+            removed += 1
+            continue
+        if response.status_code != 200:
+            failed += 1
+            continue
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix('.tmp')
+        temporary.write_bytes(response.content)
+        _remove(path)
+        os.replace(temporary, path)
+        compressor.compress(str(path))
+        written += 1
+
+    return written, removed, failed
+
+
+class Command(BaseCommand):
+    help = 'Pre-render public catalogue pages to compressed static HTML.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Only rebuild pages affected by changes since the last build.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Number of rendering processes.'
+        )
+        parser.add_argument(
+            '--output', default=str(settings.STATIC_SITE_ROOT),
+            help='Directory the snapshot is written to.'
+        )
+        parser.add_argument(
+            '--host', default='localhost',
+            help='Host header used for rendering (must be in ALLOWED_HOSTS).'
+        )
+
+    def handle(self, *args, **options):
+        root = Path(options['output'])
+        root.mkdir(parents=True, exist_ok=True)
+        manifest_path = root / MANIFEST_NAME
+        started = time.monotonic()
+
+        last_change = CatalogueChange.objects.aggregate(
+            latest=Max('id')
+        )['latest'] or 0
+
+        urls = None
+        if options['incremental'] and manifest_path.exists():
+            since = json.loads(manifest_path.read_text())['last_change_id']
+            tags = set(
+                CatalogueChange.objects.filter(
+                    id__gt=since, id__lte=last_change
+                ).values_list('tag', flat=True).distinct()
+            )
+            if GLOBAL_TAG not in tags:
+                urls = self._urls_for_tags(tags)
+                self.stdout.write(
+                    f"{len(tags)} changed tag(s) since change #{since}."
+                )
+        if urls is None:
+            urls = self._all_urls()
+
+        written, removed, failed = self._render(
+            sorted(urls), root, options['workers'], options['host']
+        )
+
+        manifest_path.write_text(json.dumps({
+            'last_change_id': last_change,
+            'built_at': time.time(),
+        }))
+        # Entries up to this build are no longer needed here; facet indexes
+        # that had not read them yet notice the gap and rebuild.
+        CatalogueChange.objects.filter(id__lte=last_change).delete()
+
+        elapsed = time.monotonic() - started
+        message = (
+            f"Rendered {written} page(s), removed {removed}, "
+            f"{failed} failed in {elapsed:.1f}s -> {root}"
+        )
+        if failed:
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
+
+    def _list_urls(self, name, total):
+        base = reverse(name)
+        pages = max(1, math.ceil(total / LIST_PAGE_SIZE))
+        return [base] + [f'{base}?page={page}' for page in range(2, pages + 1)]
+
+    def _artist_urls(self, artist_ids):
+        return {reverse('artist_detail', args=[pk]) for pk in artist_ids}
+
+    def _album_urls(self, album_ids):
+        return {reverse('album_detail', args=[pk]) for pk in album_ids}
+
+    def _track_urls(self, track_ids):
+        return {reverse('track_detail', args=[pk]) for pk in track_ids}
+
+    def _all_urls(self):
+        urls = {reverse('home')}
+        urls.update(self._list_urls('all_artists', Artist.objects.count()))
+        urls.update(self._list_urls('all_albums', Album.objects.count()))
+        urls |= self._artist_urls(
+            Artist.objects.values_list('ArtistId', flat=True).iterator()
+        )
+        urls |= self._album_urls(
+            Album.objects.values_list('AlbumId', flat=True).iterator()
+        )
+        urls |= self._track_urls(
+            Track.objects.values_list('TrackId', flat=True).iterator()
+        )
+        return urls
+
+    def _urls_for_tags(self, tags):
+        """Return every snapshot URL whose page carries one of the tags."""
+        urls = set()
+        artist_ids, album_ids, track_ids = set(), set(), set()
+        for tag in tags:
+            kind, _, value = tag.partition(':')
+            if value.isdigit():
+                {'artist': artist_ids, 'album': album_ids,
+                 'track': track_ids}.get(kind, set()).add(int(value))
+            elif kind in ('artists', 'albums', 'tracks', 'reviews'):
+                urls.add(reverse('home'))
+                if kind == 'artists':
+                    urls.update(self._list_urls(
+                        'all_artists', Artist.objects.count()
+                    ))
+                if kind in ('artists', 'albums'):
+                    urls.update(self._list_urls(
+                        'all_albums', Album.objects.count()
+                    ))
+
+        # Album and track pages also carry their artist's and album's tags.
+        if artist_ids:
+            album_ids |= set(Album.objects.filter(
+                ArtistId__in=artist_ids
+            ).values_list('AlbumId', flat=True))
+        if album_ids:
+            artist_ids |= set(Album.objects.filter(
+                AlbumId__in=album_ids
+            ).values_list('ArtistId', flat=True))
+            track_ids |= set(Track.objects.filter(
+                AlbumId__in=album_ids
+            ).values_list('TrackId', flat=True))
+
+        return (
+            urls | self._artist_urls(artist_ids)
+            | self._album_urls(album_ids) | self._track_urls(track_ids)
+        )
+
+    def _render(self, urls, root, workers, host):
+        batches = [
+            urls[start:start + URLS_PER_TASK]
+            for start in range(0, len(urls), URLS_PER_TASK)
+        ]
+        self.stdout.write(
+            f"Rendering {len(urls)} page(s) in {len(batches)} batch(es)."
+        )
+        totals = [0, 0, 0]
+
+        if workers <= 1 or len(batches) <= 1 or (
+                'fork' not in get_all_start_methods()):
+            _init_worker(str(root), host)
+            results = map(_render_urls, batches)
+            for result in results:
+                totals = [a + b for a, b in zip(totals, result)]
+            return totals
+
+        # Forked children must open their own database connections.
+        connections.close_all()
+        with get_context('fork').Pool(
+            workers, initializer=_init_worker, initargs=(str(root), host)
+        ) as pool:
+            for result in pool.imap_unordered(_render_urls, batches):
+                totals = [a + b for a, b in zip(totals, result)]
+                self.stdout.write(f"  {totals[0]} written")
+        return totals
@@ -0,0 +1,118 @@
+"""
+Exercise the database connection pool from many threads and report metrics.
+
+Runs ``--threads`` workers that each perform ``--queries`` checkouts of a
+short query, then prints the pool's checkout, wait and health-check
+counters. ``--stand-in`` drives a pool of in-memory SQLite connections
+instead of the configured database, so the pool logic can be checked
+without a PostgreSQL server.
+
+Usage:
+    python manage.py db_pool_benchmark --threads 32 --queries 50
+    python manage.py db_pool_benchmark --stand-in --max-size 4
+"""
+import sqlite3
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from chinook_app.db.pool import ConnectionPool, get_pool
+
+
+def _select_one(connection):
+    cursor = connection.cursor()
+    try:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+class Command(BaseCommand):
+    help = 'Measure connection pool checkout waits under concurrent load.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--database', default='default')
+        parser.add_argument(
+            '--stand-in', action='store_true',
+            help='Use a pool of in-memory SQLite connections.'
+        )
+        parser.add_argument(
+            '--max-size', type=int, default=4,
+            help='Pool size for --stand-in.'
+        )
+        parser.add_argument(
+            '--hold', type=float, default=0.005,
+            help='Seconds each checkout keeps its connection.'
+        )
+
+    def handle(self, *args, **options):
+        if options['stand_in']:
+            pool = ConnectionPool(
+                lambda: sqlite3.connect(':memory:', check_same_thread=False),
+                check=_select_one,
+                max_size=options['max_size'],
+                check_after=0,
+                name='stand-in',
+            )
+            work = self._pool_worker(pool, options)
+        else:
+            engine = connections[options['database']].settings_dict['ENGINE']
+            if not engine.endswith('postgresql_pool'):
+                raise CommandError(
+                    f"Database '{options['database']}' does not use the pooled "
+                    "backend; set DB_POOL=True or pass --stand-in."
+                )
+            work = self._django_worker(options)
+
+        started = time.monotonic()
+        threads = [threading.Thread(target=work) for _ in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        if not options['stand_in']:
+            pool = get_pool(options['database'])
+        stats = pool.stats()
+        total = options['threads'] * options['queries']
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} checkouts in {elapsed:.2f}s ({total / elapsed:.0f}/s)"
+        ))
+        for key in sorted(stats):
+            value = stats[key]
+            if isinstance(value, float):
+                value = f'{value * 1000:.2f} ms' if key.startswith('wait_time') else f'{value:.2f}'
+            self.stdout.write(f"  {key:<22} {value}")
+
+    def _pool_worker(self, pool, options):
+        def work():
+            for _ in range(options['queries']):
+                connection = pool.acquire()
+                try:
+                    _select_one(connection)
+                    time.sleep(options['hold'])
+                finally:
+                    pool.release(connection)
+        return work
+
+    def _django_worker(self, options):
+        alias = options['database']
+
+        def work():
+            connection = connections[alias]
+            try:
+                for _ in range(options['queries']):
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT 1')
+                        time.sleep(options['hold'])
+                    # End of "request": hand the connection back to the pool.
+                    connection.close()
+            finally:
+                connection.close()
+        return work
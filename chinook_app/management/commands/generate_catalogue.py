@@ -0,0 +1,464 @@
+"""
+Generate a synthetic Chinook catalogue for load and scale testing.
+
+Artists, albums, tracks, users and reviews are produced with realistic skew:
+album and track counts are heavy-tailed, artist popularity follows a Zipf
+distribution and the number of reviews per user is Pareto distributed.
+The output is fully determined by ``--seed``, so two runs against an empty
+database produce identical catalogues.
+
+Usage:
+    python manage.py generate_catalogue --artists 100000 --users 20000
+    python manage.py generate_catalogue --artists 1000000 --workers 8 --seed 7
+"""
+import os
+import random
+import time
+from array import array
+from bisect import bisect_left
+from decimal import Decimal
+from itertools import accumulate
+from multiprocessing import get_all_start_methods, get_context
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from chinook_app.cache import GLOBAL_TAG, catalogue_changed
+from chinook_app.listing import rebuild as rebuild_listing
+from chinook_app.models import Artist, Album, Track, Review, UserProfile
+
+
+ADJECTIVES = [
+    'Electric', 'Silent', 'Velvet', 'Broken', 'Golden', 'Midnight', 'Crimson',
+    'Hollow', 'Wild', 'Neon', 'Frozen', 'Burning', 'Lonely', 'Distant',
+    'Restless', 'Savage', 'Gentle', 'Hidden', 'Iron', 'Paper', 'Cosmic',
+    'Northern', 'Faded', 'Lucky', 'Sacred', 'Bitter', 'Endless', 'Quiet',
+]
+NOUNS = [
+    'Hearts', 'Wolves', 'Rivers', 'Echoes', 'Machines', 'Shadows', 'Kings',
+    'Dreams', 'Horizons', 'Strangers', 'Saints', 'Engines', 'Mirrors',
+    'Storms', 'Ghosts', 'Lights', 'Roads', 'Tides', 'Satellites', 'Flowers',
+    'Thieves', 'Signals', 'Oceans', 'Embers', 'Cities', 'Sparrows', 'Waves',
+]
+FIRST_NAMES = [
+    'Ana', 'Ben', 'Carla', 'Dmitri', 'Elena', 'Farid', 'Grace', 'Hugo',
+    'Ines', 'Jonas', 'Keiko', 'Luis', 'Maya', 'Nils', 'Omar', 'Priya',
+    'Quinn', 'Rosa', 'Sami', 'Tomas', 'Uma', 'Viktor', 'Wen', 'Yara',
+]
+LAST_NAMES = [
+    'Almeida', 'Brooks', 'Castro', 'Dubois', 'Eriksen', 'Fischer', 'Garcia',
+    'Hayes', 'Ivanova', 'Jansen', 'Kowalski', 'Lindqvist', 'Moreau',
+    'Nakamura', 'Okafor', 'Petrov', 'Rossi', 'Schmidt', 'Tanaka', 'Varga',
+]
+
+# Standard Chinook genre (1-25) and media type (1-5) ids, weighted so that a
+# handful of genres dominate the catalogue as they do in the sample data.
+GENRE_IDS = list(range(1, 26))
+GENRE_WEIGHTS = [1.0 / rank for rank in range(1, 26)]
+MEDIA_TYPE_IDS = [1, 2, 3, 4, 5]
+MEDIA_TYPE_WEIGHTS = [70, 15, 6, 4, 5]
+VIDEO_MEDIA_TYPE_ID = 3
+RATING_VALUES = [1, 2, 3, 4, 5]
+RATING_WEIGHTS = [5, 8, 17, 35, 35]
+
+MAX_ALBUMS_PER_ARTIST = 60
+MAX_TRACKS_PER_ALBUM = 40
+MAX_REVIEWS_PER_USER = 500
+
+# Worker process state, populated by _init_worker.
+_STATE = {}
+
+
+def _rng(seed, *parts):
+    """Return a Random instance seeded from the base seed and a task key."""
+    return random.Random(':'.join(str(part) for part in (seed,) + parts))
+
+
+def _heavy_tail(rng, mean, cap, alpha=1.5):
+    """Draw a Pareto-distributed integer >= 1 with roughly the given mean."""
+    scale = mean * (alpha - 1) / alpha
+    return max(1, min(cap, int(rng.paretovariate(alpha) * scale)))
+
+
+def _plan_chunk(options, chunk_index, artist_count):
+    """Return album counts per artist and track counts per album for a chunk."""
+    rng = _rng(options['seed'], 'plan', chunk_index)
+    album_counts = [
+        _heavy_tail(rng, options['albums_per_artist'], MAX_ALBUMS_PER_ARTIST)
+        for _ in range(artist_count)
+    ]
+    track_counts = [
+        _heavy_tail(rng, options['tracks_per_album'], MAX_TRACKS_PER_ALBUM)
+        for _ in range(sum(album_counts))
+    ]
+    return album_counts, track_counts
+
+
+def _words(rng, *pools):
+    return ' '.join(rng.choice(pool) for pool in pools)
+
+
+def _init_worker(state):
+    """Store shared read-only state in the worker process."""
+    _STATE.update(state)
+
+
+def _zipf_table():
+    """Cumulative Zipf weights over artist rank, built once per worker."""
+    if 'zipf' not in _STATE:
+        exponent = _STATE['options']['zipf_exponent']
+        artist_count = len(_STATE['track_bounds']) - 1
+        _STATE['zipf'] = array('d', accumulate(
+            1.0 / (rank ** exponent) for rank in range(1, artist_count + 1)
+        ))
+    return _STATE['zipf']
+
+
+def _build_catalogue_chunk(task):
+    """Insert the artists, albums and tracks belonging to one chunk."""
+    chunk_index, artist_id, album_id, track_id, artist_count = task
+    options = _STATE['options']
+    batch_size = options['batch_size']
+    album_counts, track_counts = _plan_chunk(options, chunk_index, artist_count)
+    rng = _rng(options['seed'], 'rows', chunk_index)
+
+    artists, albums, tracks = [], [], []
+    album_iter = iter(track_counts)
+    for offset, album_count in enumerate(album_counts):
+        artist_pk = artist_id + offset
+        artists.append(Artist(
+            ArtistId=artist_pk,
+            Name=f"The {_words(rng, ADJECTIVES, NOUNS)}",
+        ))
+        for _ in range(album_count):
+            albums.append(Album(
+                AlbumId=album_id,
+                Title=_words(rng, ADJECTIVES, NOUNS),
+                ArtistId_id=artist_pk,
+            ))
+            genre_id = rng.choices(GENRE_IDS, GENRE_WEIGHTS)[0]
+            for _ in range(next(album_iter)):
+                media_type_id = rng.choices(
+                    MEDIA_TYPE_IDS, MEDIA_TYPE_WEIGHTS
+                )[0]
+                milliseconds = int(min(
+                    rng.lognormvariate(12.35, 0.35), 1800000
+                ))
+                if rng.random() < 0.3:
+                    composer = None
+                else:
+                    composer = _words(rng, FIRST_NAMES, LAST_NAMES)
+                tracks.append(Track(
+                    TrackId=track_id,
+                    Name=_words(rng, ADJECTIVES, NOUNS),
+                    AlbumId_id=album_id,
+                    MediaTypeId_id=media_type_id,
+                    GenreId_id=genre_id,
+                    Composer=composer,
+                    Milliseconds=milliseconds,
+                    Bytes=milliseconds * 32 + rng.randrange(0, 65536),
+                    UnitPrice=(
+                        Decimal('1.99')
+                        if media_type_id == VIDEO_MEDIA_TYPE_ID
+                        else Decimal('0.99')
+                    ),
+                ))
+                track_id += 1
+            album_id += 1
+
+    with transaction.atomic():
+        Artist.objects.bulk_create(artists, batch_size=batch_size)
+        Album.objects.bulk_create(albums, batch_size=batch_size)
+        Track.objects.bulk_create(tracks, batch_size=batch_size)
+    return 'catalogue', len(artists), len(albums), len(tracks)
+
+
+def _build_user_chunk(task):
+    """Insert one chunk of users together with their profiles."""
+    chunk_index, user_id, user_count = task
+    options = _STATE['options']
+    rng = _rng(options['seed'], 'users', chunk_index)
+    joined = timezone.now()
+
+    users, profiles = [], []
+    for pk in range(user_id, user_id + user_count):
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        username = f"{options['username_prefix']}{pk}"
+        users.append(User(
+            id=pk,
+            username=username,
+            email=f"{username}@example.com",
+            first_name=first_name,
+            last_name=last_name,
+            password=options['password_hash'],
+            date_joined=joined,
+        ))
+        profiles.append(UserProfile(user_id=pk))
+
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=options['batch_size'])
+        UserProfile.objects.bulk_create(
+            profiles, batch_size=options['batch_size']
+        )
+    return 'users', len(users)
+
+
+def _build_review_chunk(task):
+    """Insert reviews for one chunk of users, favouring popular artists."""
+    chunk_index, user_id, user_count = task
+    options = _STATE['options']
+    rng = _rng(options['seed'], 'reviews', chunk_index)
+    track_bounds = _STATE['track_bounds']
+    zipf = _zipf_table()
+    total_weight = zipf[-1]
+    total_tracks = track_bounds[-1] - track_bounds[0]
+
+    reviews = []
+    for pk in range(user_id, user_id + user_count):
+        wanted = min(
+            _heavy_tail(
+                rng, options['reviews_per_user'], MAX_REVIEWS_PER_USER
+            ),
+            total_tracks,
+        )
+        reviewed = set()
+        attempts = 0
+        while len(reviewed) < wanted and attempts < wanted * 4:
+            attempts += 1
+            artist_index = bisect_left(zipf, rng.random() * total_weight)
+            track_pk = rng.randrange(
+                track_bounds[artist_index], track_bounds[artist_index + 1]
+            )
+            if track_pk in reviewed:
+                continue
+            reviewed.add(track_pk)
+            reviews.append(Review(
+                user_id=pk,
+                track_id=track_pk,
+                rating=rng.choices(RATING_VALUES, RATING_WEIGHTS)[0],
+                comment='' if rng.random() < 0.6 else _words(
+                    rng, ADJECTIVES, NOUNS
+                ),
+            ))
+
+    Review.objects.bulk_create(reviews, batch_size=options['batch_size'])
+    return 'reviews', len(reviews)
+
+
+class Command(BaseCommand):
+    help = 'Generate a large, skewed, reproducible synthetic Chinook catalogue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--artists', type=int, default=1000)
+        parser.add_argument(
+            '--albums-per-artist', type=float, default=3.0,
+            help='Mean of the heavy-tailed album count per artist.'
+        )
+        parser.add_argument(
+            '--tracks-per-album', type=float, default=10.0,
+            help='Mean of the heavy-tailed track count per album.'
+        )
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument(
+            '--reviews-per-user', type=float, default=8.0,
+            help='Mean of the Pareto-distributed review count per user.'
+        )
+        parser.add_argument(
+            '--zipf-exponent', type=float, default=1.1,
+            help='Skew of artist popularity when choosing reviewed tracks.'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Parallel worker processes (forced to 1 on SQLite).'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Artists (or users) handled by one worker task.'
+        )
+        parser.add_argument('--username-prefix', default='loadtest_')
+        parser.add_argument(
+            '--user-password', default='loadtest-password',
+            help='Password shared by every generated user.'
+        )
+
+    def handle(self, *args, **options):
+        if options['artists'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--artists and --chunk-size must be positive.')
+
+        workers = self._worker_count(options['workers'])
+        self._ensure_catalogue_tables()
+
+        worker_options = {
+            'seed': options['seed'],
+            'albums_per_artist': options['albums_per_artist'],
+            'tracks_per_album': options['tracks_per_album'],
+            'reviews_per_user': options['reviews_per_user'],
+            'zipf_exponent': options['zipf_exponent'],
+            'batch_size': options['batch_size'],
+            'username_prefix': options['username_prefix'],
+            'password_hash': make_password(options['user_password']),
+        }
+
+        started = time.monotonic()
+        catalogue_tasks, track_bounds = self._plan_catalogue(
+            worker_options, options['artists'], options['chunk_size']
+        )
+        user_tasks = self._plan_users(options['users'], options['chunk_size'])
+        self.stdout.write(
+            f"Planned {options['artists']} artists, "
+            f"{track_bounds[-1] - track_bounds[0]} tracks and "
+            f"{options['users']} users across {workers} worker(s)."
+        )
+
+        state = {'options': worker_options, 'track_bounds': track_bounds}
+        totals = {'artists': 0, 'albums': 0, 'tracks': 0, 'users': 0,
+                  'reviews': 0}
+
+        for result in self._run(
+            workers, state, _build_catalogue_chunk, catalogue_tasks,
+            _build_user_chunk, user_tasks
+        ):
+            self._accumulate(totals, result)
+
+        # Reviews reference both users and tracks, so they run afterwards.
+        for result in self._run(
+            workers, state, _build_review_chunk, user_tasks
+        ):
+            self._accumulate(totals, result)
+
+        self._reset_sequences()
+        # bulk_create skips signals, so expire every cached page explicitly
+        # and rebuild the denormalized track listing.
+        catalogue_changed(GLOBAL_TAG)
+        self.stdout.write('Rebuilding track listing...')
+        rebuild_listing()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {totals['artists']} artists, {totals['albums']} albums, "
+            f"{totals['tracks']} tracks, {totals['users']} users and "
+            f"{totals['reviews']} reviews in {elapsed:.1f}s."
+        ))
+
+    def _worker_count(self, requested):
+        """Clamp the worker count to what the database and platform allow."""
+        if connection.vendor == 'sqlite' and requested > 1:
+            self.stdout.write(self.style.WARNING(
+                'SQLite allows a single writer; using one worker.'
+            ))
+            return 1
+        if requested > 1 and 'fork' not in get_all_start_methods():
+            self.stdout.write(self.style.WARNING(
+                'Parallel workers need the fork start method; using one worker.'
+            ))
+            return 1
+        return max(1, requested)
+
+    def _ensure_catalogue_tables(self):
+        """Create the unmanaged Chinook tables when they are missing."""
+        existing = set(connection.introspection.table_names())
+        missing = [
+            model for model in (Artist, Album, Track)
+            if model._meta.db_table not in existing
+        ]
+        if not missing:
+            return
+        with connection.schema_editor() as editor:
+            for model in missing:
+                editor.create_model(model)
+        names = ', '.join(model._meta.db_table for model in missing)
+        self.stdout.write(f"Created missing tables: {names}")
+
+    def _next_id(self, model):
+        current = model.objects.aggregate(
+            highest=Max(model._meta.pk.attname)
+        )['highest']
+        return (current or 0) + 1
+
+    def _plan_catalogue(self, options, artist_total, chunk_size):
+        """Assign id ranges to each chunk and record track ranges per artist."""
+        artist_id = self._next_id(Artist)
+        album_id = self._next_id(Album)
+        track_id = self._next_id(Track)
+        track_bounds = array('q', [track_id])
+        tasks = []
+
+        for chunk_index, start in enumerate(range(0, artist_total, chunk_size)):
+            artist_count = min(chunk_size, artist_total - start)
+            album_counts, track_counts = _plan_chunk(
+                options, chunk_index, artist_count
+            )
+            tasks.append(
+                (chunk_index, artist_id, album_id, track_id, artist_count)
+            )
+            position = 0
+            for album_count in album_counts:
+                artist_tracks = sum(
+                    track_counts[position:position + album_count]
+                )
+                track_bounds.append(track_bounds[-1] + artist_tracks)
+                position += album_count
+            artist_id += artist_count
+            album_id += len(track_counts)
+            track_id += sum(track_counts)
+
+        return tasks, track_bounds
+
+    def _plan_users(self, user_total, chunk_size):
+        user_id = self._next_id(User)
+        return [
+            (chunk_index, user_id + start, min(chunk_size, user_total - start))
+            for chunk_index, start in enumerate(range(0, user_total, chunk_size))
+        ]
+
+    def _run(self, workers, state, *jobs):
+        """Run (function, tasks) pairs, in a process pool when workers > 1."""
+        pairs = list(zip(jobs[::2], jobs[1::2]))
+        if workers == 1:
+            _init_worker(state)
+            for function, tasks in pairs:
+                for task in tasks:
+                    yield function(task)
+            return
+
+        # Forked children must open their own database connections.
+        connections.close_all()
+        with get_context('fork').Pool(
+            workers, initializer=_init_worker, initargs=(state,)
+        ) as pool:
+            pending = [
+                pool.imap_unordered(function, tasks)
+                for function, tasks in pairs
+            ]
+            for results in pending:
+                yield from results
+
+    def _accumulate(self, totals, result):
+        kind = result[0]
+        if kind == 'catalogue':
+            totals['artists'] += result[1]
+            totals['albums'] += result[2]
+            totals['tracks'] += result[3]
+            self.stdout.write(
+                f"  catalogue: {totals['artists']} artists, "
+                f"{totals['tracks']} tracks"
+            )
+        else:
+            totals[kind] += result[1]
+            self.stdout.write(f"  {kind}: {totals[kind]}")
+
+    def _reset_sequences(self):
+        """Move id sequences past the explicitly assigned primary keys."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [Artist, Album, Track, User]
+        )
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
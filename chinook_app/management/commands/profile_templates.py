@@ -0,0 +1,161 @@
+"""
+Profile template rendering of a set of pages.
+
+Templates are first precompiled with ``warm_templates`` (as a worker
+does at boot), then each path is requested ``--runs`` times with the
+render profiler installed. Two tables are printed, slowest first by self
+time:
+
+* per template: pages, ``base.html``, includes such as
+  ``components/picker.html`` and crispy-forms' ``bootstrap5/*`` field
+  templates;
+* per include: each ``parent > child`` pair, so the cost of an
+  ``{% include %}``, ``{% extends %}`` or ``|crispy`` render is shown
+  where it is used.
+
+Most crispy forms only appear after a POST, so the forms in
+``CRISPY_FORMS`` are also rendered on their own, as ``crispy <Form>``.
+
+``total`` includes nested templates; ``self`` does not. A page's
+``{% block %}`` content is rendered by the ``base.html`` it extends, so
+it counts toward ``base.html``'s self time. With ``--path``, pages are
+requested as ``--user`` when given. The anonymous
+page cache is bypassed so every request renders; catalogue fragments
+still come from their cache after the first run, as in production.
+
+Usage:
+    python manage.py profile_templates
+    python manage.py profile_templates --user alice --runs 50
+    python manage.py profile_templates --path /accounts/signup/ --limit 10
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Context, Template, engines
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from chinook_app import forms
+from chinook_app.templating import (
+    TEMPLATE_STATS, install_profiler, profiler_installed, uninstall_profiler, warm_templates
+)
+
+ANONYMOUS_URLS = [
+    ('home', []), ('all_artists', []), ('all_albums', []),
+    ('artist_detail', [1]), ('album_detail', [1]),
+    ('account_login', []), ('account_signup', []), ('security_question_reset', []),
+]
+# Crispy-forms pages that need a signed-in user
+USER_URLS = [
+    ('profile', []), ('change_password_with_security', []), ('setup_security_questions', []),
+]
+
+# Unbound forms rendered on their own through crispy's |crispy filter
+CRISPY_FORMS = [
+    'CustomSignupForm', 'SecurityQuestionSetupForm', 'SecurityQuestionResetForm',
+    'SetNewPasswordForm', 'UserProfileForm', 'ArtistForm', 'AlbumForm', 'ReviewForm',
+]
+
+
+class Command(BaseCommand):
+    help = 'Report per-template and per-include render times for a set of pages.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', action='append',
+            help='Path to render (repeatable); defaults to catalogue and account pages.'
+        )
+        parser.add_argument(
+            '--user',
+            help='Also render the profile and password pages signed in as this username.'
+        )
+        parser.add_argument(
+            '--no-forms', action='store_true',
+            help='Skip rendering CRISPY_FORMS directly.'
+        )
+        parser.add_argument('--runs', type=int, default=20, help='Requests per path.')
+        parser.add_argument('--limit', type=int, default=25, help='Rows per table.')
+        parser.add_argument(
+            '--host', default='localhost',
+            help='Host header used for rendering (must be in ALLOWED_HOSTS).'
+        )
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs must be positive.')
+        anonymous = Client(raise_request_exception=False, HTTP_HOST=options['host'])
+        client = anonymous
+        requests = [(anonymous, name, args) for name, args in ANONYMOUS_URLS]
+        if options['user']:
+            User = get_user_model()
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"No user '{options['user']}'.")
+            client = Client(raise_request_exception=False, HTTP_HOST=options['host'])
+            client.force_login(user)
+            requests += [(client, name, args) for name, args in USER_URLS]
+        if options['path']:
+            requests = [(client, path) for path in options['path']]
+        else:
+            requests = [(c, reverse(name, args=args)) for c, name, args in requests]
+
+        started = time.perf_counter()
+        compiled, failed = warm_templates()
+        self.stdout.write(
+            f"Precompiled {compiled} templates in "
+            f"{(time.perf_counter() - started) * 1000:.0f} ms"
+            + (f" ({failed} failed, see log)" if failed else '')
+        )
+
+        was_installed = profiler_installed()
+        install_profiler()
+        TEMPLATE_STATS.reset()
+        try:
+            with override_settings(PAGE_CACHE_VIEWS=[]):
+                for request_client, path in requests:
+                    statuses = set()
+                    for _ in range(options['runs']):
+                        statuses.add(request_client.get(path).status_code)
+                    if statuses != {200}:
+                        self.stdout.write(self.style.WARNING(
+                            f"  {path}: status {', '.join(map(str, sorted(statuses)))}"
+                        ))
+            if not options['no_forms']:
+                self._render_forms(options['runs'])
+            stats = TEMPLATE_STATS.stats()
+        finally:
+            if not was_installed:
+                uninstall_profiler()
+
+        self.stdout.write(f"{len(requests)} paths x {options['runs']} runs\n")
+        self._table('template', stats['templates'], options['limit'])
+        self.stdout.write('')
+        self._table('include (parent > child)', stats['includes'], options['limit'])
+
+    def _render_forms(self, runs):
+        engine = engines['django'].engine
+        for name in CRISPY_FORMS:
+            # Named so its renders are reported as "crispy <Form>"
+            template = Template(
+                '{% load crispy_forms_tags %}{{ form|crispy }}',
+                engine=engine, name=f'crispy {name}'
+            )
+            form = getattr(forms, name)()
+            for _ in range(runs):
+                template.render(Context({'form': form}))
+
+    def _table(self, label, rows, limit):
+        ordered = sorted(rows.items(), key=lambda item: item[1]['self_ms'], reverse=True)[:limit]
+        width = max([len(label)] + [len(key) for key, _ in ordered])
+        self.stdout.write(
+            f"{label:<{width}} {'renders':>8} {'total ms':>10} {'self ms':>10} "
+            f"{'mean ms':>9} {'max ms':>9}"
+        )
+        for key, row in ordered:
+            self.stdout.write(
+                f"{key:<{width}} {row['renders']:>8} {row['total_ms']:>10.1f} "
+                f"{row['self_ms']:>10.1f} {row['mean_ms']:>9.2f} {row['max_ms']:>9.2f}"
+            )
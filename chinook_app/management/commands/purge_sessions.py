@@ -0,0 +1,64 @@
+"""
+Delete expired sessions in batches, once or as a background worker.
+
+Works with any session engine whose ``SessionStore.clear_expired`` accepts
+a ``batch_size`` (``chinook_app.sessions`` does); other engines are
+cleared with their own ``clear_expired``. ``--every`` keeps the command
+running and purges on that interval, for a worker process such as a
+Procfile ``worker:`` entry.
+
+Usage:
+    python manage.py purge_sessions
+    python manage.py purge_sessions --batch-size 5000
+    python manage.py purge_sessions --every 3600
+"""
+import inspect
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions in batches, optionally on an interval.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.SESSION_PURGE_BATCH_SIZE,
+            help='Rows deleted per statement.'
+        )
+        parser.add_argument(
+            '--every', type=int, default=0,
+            help='Keep running and purge every N seconds.'
+        )
+
+    def purge(self, store, batch_size):
+        started = time.monotonic()
+        try:
+            if 'batch_size' in inspect.signature(store.clear_expired).parameters:
+                deleted = store.clear_expired(batch_size=batch_size)
+            else:
+                deleted = store.clear_expired()
+        finally:
+            close_old_connections()
+        elapsed = time.monotonic() - started
+        if deleted is None:
+            self.stdout.write(f"Cleared expired sessions in {elapsed:.1f}s.")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Deleted {deleted} expired sessions in {elapsed:.1f}s."
+            ))
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        if options['every'] < 0:
+            raise CommandError('--every must not be negative.')
+
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        self.purge(store, options['batch_size'])
+        while options['every']:
+            time.sleep(options['every'])
+            self.purge(store, options['batch_size'])
@@ -0,0 +1,52 @@
+"""
+Rebuild the denormalized track listing from the catalogue tables.
+
+The listing is kept current on every write, so a rebuild is only needed
+after bulk loads that bypass signals (raw SQL imports, restores) or to
+repair drift. ``--check`` compares row counts without writing.
+
+Usage:
+    python manage.py rebuild_track_listing
+    python manage.py rebuild_track_listing --chunk-size 20000
+    python manage.py rebuild_track_listing --check
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chinook_app.listing import REBUILD_CHUNK_SIZE, rebuild
+from chinook_app.models import Track, TrackListing
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the TrackListing read model.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=REBUILD_CHUNK_SIZE,
+            help='Tracks read and written per batch.'
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only report whether the listing and Track row counts match.'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive.')
+
+        if options['check']:
+            tracks = Track.objects.count()
+            listed = TrackListing.objects.count()
+            style = self.style.SUCCESS if tracks == listed else self.style.WARNING
+            self.stdout.write(style(f"{listed} listing rows for {tracks} tracks."))
+            return
+
+        started = time.monotonic()
+        total = rebuild(
+            chunk_size=options['chunk_size'],
+            progress=lambda done: self.stdout.write(f"  {done} tracks..."),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {total} listing rows in {time.monotonic() - started:.1f}s."
+        ))
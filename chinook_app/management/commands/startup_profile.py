@@ -0,0 +1,141 @@
+"""
+Profile worker cold start: wall time and cumulative import time per module.
+
+Each run starts a fresh interpreter with ``python -X importtime`` that
+does what a gunicorn worker without ``preload_app`` does before serving:
+set up Django, import ``--target`` (the WSGI module by default) and load
+the URLconf with every view. The report gives the median wall time of
+``--runs`` starts, the modules with the largest cumulative import time,
+and self time per top-level package, so the cost of each dependency
+(allauth, crispy, Pillow, dotenv...) is visible. ``--target django
+--no-urls`` profiles what every management command pays.
+
+Usage:
+    python manage.py startup_profile
+    python manage.py startup_profile --runs 10 --limit 40
+    python manage.py startup_profile --target django --no-urls --env DEBUG=False
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# python -X importtime: "import time: <self us> | <cumulative us> | <indented name>"
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| \s*(\S+)')
+
+BOOT = """
+import os, sys
+sys.path.insert(0, {base!r})
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings!r})
+import importlib
+import django
+django.setup()
+importlib.import_module({target!r})
+if {urls!r}:
+    # Workers import the URLconf, and with it every view, on the first request
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+"""
+
+
+def parse_importtime(stderr):
+    """Return ``[(module, self_us, cumulative_us)]`` from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            own, cumulative, module = match.groups()
+            rows.append((module, int(own), int(cumulative)))
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Report cold-start time and cumulative import time per module.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', default='chinook_project.wsgi',
+            help='Module a worker imports at boot (default: the WSGI module).'
+        )
+        parser.add_argument(
+            '--no-urls', action='store_true',
+            help='Do not load the URLconf (and views) after the target.'
+        )
+        parser.add_argument('--runs', type=int, default=5, help='Cold starts to time.')
+        parser.add_argument('--limit', type=int, default=25, help='Modules listed.')
+        parser.add_argument(
+            '--env', action='append', default=[],
+            help='KEY=VALUE set in the profiled interpreter (repeatable).'
+        )
+
+    def _start(self, target, urls, env):
+        code = BOOT.format(
+            base=str(settings.BASE_DIR),
+            settings=os.environ.get('DJANGO_SETTINGS_MODULE', 'chinook_project.settings'),
+            target=target,
+            urls=urls,
+        )
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            env=env, capture_output=True, text=True,
+        )
+        elapsed = time.perf_counter() - started
+        if result.returncode:
+            raise CommandError(f"Importing {target} failed:\n{result.stderr[-2000:]}")
+        return elapsed, parse_importtime(result.stderr)
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs must be positive.')
+        env = dict(os.environ)
+        for item in options['env']:
+            key, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f"Invalid --env '{item}'; expected KEY=VALUE")
+            env[key] = value
+
+        # Untimed start so the timed ones all find the bytecode caches warm
+        self._start(options['target'], not options['no_urls'], env)
+        walls, runs = [], []
+        for _ in range(options['runs']):
+            elapsed, rows = self._start(options['target'], not options['no_urls'], env)
+            walls.append(elapsed)
+            runs.append(rows)
+
+        # Median cumulative and self time per module across runs
+        cumulative, own = {}, {}
+        for rows in runs:
+            for module, self_us, cumulative_us in rows:
+                cumulative.setdefault(module, []).append(cumulative_us)
+                own.setdefault(module, []).append(self_us)
+        medians = {
+            module: (statistics.median(own[module]), statistics.median(values))
+            for module, values in cumulative.items()
+        }
+
+        self.stdout.write(
+            f"Cold start of {options['target']}: median {statistics.median(walls) * 1000:.0f} ms "
+            f"(min {min(walls) * 1000:.0f}, max {max(walls) * 1000:.0f}) over "
+            f"{options['runs']} runs; {len(medians)} modules imported\n"
+        )
+        self.stdout.write(f"{'module':<50} {'cumulative ms':>14} {'self ms':>9}")
+        ordered = sorted(medians.items(), key=lambda item: item[1][1], reverse=True)
+        for module, (self_us, cumulative_us) in ordered[:options['limit']]:
+            self.stdout.write(f"{module:<50} {cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}")
+
+        # Self time summed per top-level package: what each dependency costs
+        packages = {}
+        for module, (self_us, _) in medians.items():
+            package = module.split('.')[0]
+            count, total = packages.get(package, (0, 0))
+            packages[package] = (count + 1, total + self_us)
+        self.stdout.write(f"\n{'package':<30} {'modules':>8} {'self ms':>9}")
+        for package, (count, total) in sorted(
+                packages.items(), key=lambda item: item[1][1], reverse=True)[:options['limit']]:
+            self.stdout.write(f"{package:<30} {count:>8} {total / 1000:>9.1f}")
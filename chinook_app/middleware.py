@@ -0,0 +1,169 @@
+"""
+Middleware for the Chinook Music Database application.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+from whitenoise.base import WhiteNoise
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .assets import asset_version
+from .cache import get_tag_versions, written_within
+from .routers import pin_to_primary
+
+PAGE_CACHE_PREFIX = 'page:'
+DEFAULT_PAGE_CACHE_VIEWS = [
+    'home', 'all_artists', 'all_albums',
+    'artist_detail', 'album_detail', 'track_detail',
+    'artist_albums', 'album_tracks',
+]
+
+
+def is_anonymous_request(request):
+    """True when the request carries no session or pending messages."""
+    return (
+        settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and 'messages' not in request.COOKIES
+    )
+
+
+class AnonymousPageCacheMiddleware:
+    """
+    Serve whole catalogue pages to anonymous visitors from the cache.
+
+    A request counts as anonymous when it carries neither a session nor a
+    messages cookie, so the check never touches the session store. Views
+    declare the rows a page depends on with ``add_cache_tags``; an entry is
+    served only while the versions of all its tags are unchanged, so a write
+    expires exactly the pages that show the changed rows.
+
+    Not installed when ``PAGE_CACHE_TIMEOUT`` is 0, the default without a
+    shared cache: tag versions in a per-process cache would only be bumped
+    in the worker that handled the write.
+    """
+
+    def __init__(self, get_response):
+        self.timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', 0)
+        if not self.timeout:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.view_names = set(
+            getattr(settings, 'PAGE_CACHE_VIEWS', DEFAULT_PAGE_CACHE_VIEWS)
+        )
+
+    def __call__(self, request):
+        if not self._is_cacheable_request(request):
+            return self.get_response(request)
+
+        key = self._cache_key(request)
+        entry = cache.get(key)
+        if entry is not None and self._is_fresh(entry):
+            response = self._build_response(entry)
+            return get_conditional_response(
+                request, etag=response.get('ETag'), response=response
+            )
+
+        if written_within(getattr(settings, 'DATABASE_PRIMARY_PIN_SECONDS', 10)):
+            # A lagging replica could put pre-write content under the new
+            # tag versions; render fresh pages from the primary instead.
+            pin_to_primary()
+        response = self.get_response(request)
+        tags = getattr(request, 'page_cache_tags', None)
+        if (tags and request.method == 'GET'
+                and self._is_cacheable_response(response)):
+            cache.set(key, {
+                'content': response.content,
+                'status': response.status_code,
+                'headers': list(response.items()),
+                'tags': get_tag_versions(tags),
+            }, self.timeout)
+            response['X-Page-Cache'] = 'MISS'
+        return response
+
+    def _is_cacheable_request(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if not is_anonymous_request(request):
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.url_name in self.view_names
+
+    def _is_cacheable_response(self, response):
+        if response.status_code != 200 or response.streaming:
+            return False
+        # Vary: Cookie is expected here (templates read request.user); the
+        # request was already known to carry no session, so it is safe.
+        if response.cookies:
+            return False
+        cache_control = response.get('Cache-Control', '').lower()
+        return 'private' not in cache_control and 'no-store' not in cache_control
+
+    def _cache_key(self, request):
+        # The asset build is part of the key: cached pages embed its URLs
+        url = f'{asset_version()} {request.build_absolute_uri()}'
+        return PAGE_CACHE_PREFIX + hashlib.md5(url.encode()).hexdigest()
+
+    def _is_fresh(self, entry):
+        return get_tag_versions(entry['tags']) == entry['tags']
+
+    def _build_response(self, entry):
+        response = HttpResponse(entry['content'], status=entry['status'])
+        for header, value in entry['headers']:
+            response[header] = value
+        response['X-Page-Cache'] = 'HIT'
+        return response
+
+
+class StaticSnapshotMiddleware:
+    """
+    Serve pre-rendered catalogue pages written by ``build_static_site``.
+
+    Only active when ``STATIC_SNAPSHOT_MODE`` is enabled. Anonymous GET and
+    HEAD requests are answered straight from ``STATIC_SITE_ROOT`` by
+    WhiteNoise, which also picks the ``.br``/``.gz`` variants, so Django
+    views and the database are never reached. ``?page=N`` maps to the
+    ``page/N/`` directory the builder writes paginated lists to. Requests
+    without a matching file fall through to the normal stack.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'STATIC_SNAPSHOT_MODE', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.snapshot = WhiteNoise(
+            None,
+            root=str(settings.STATIC_SITE_ROOT),
+            autorefresh=True,
+            index_file=True,
+            max_age=getattr(settings, 'STATIC_SNAPSHOT_MAX_AGE', 60),
+        )
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and is_anonymous_request(request):
+            path = snapshot_path(request.path_info, request.GET)
+            static_file = self.snapshot.find_file(path) if path else None
+            if static_file is not None:
+                return WhiteNoiseMiddleware.serve(static_file, request)
+        return self.get_response(request)
+
+
+def snapshot_path(path, query):
+    """Map a request path and query to its snapshot URL, or None."""
+    if not query:
+        return path
+    if list(query) != ['page']:
+        return None
+    page = query.get('page', '')
+    if not page.isdigit():
+        return None
+    if int(page) == 1:
+        return path
+    return f"{path.rstrip('/')}/page/{int(page)}/"
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:43
+
+import chinook_app.models
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chinook_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogueChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='album',
+            options={'managed': False, 'ordering': ['Title']},
+        ),
+        migrations.AlterModelOptions(
+            name='artist',
+            options={'managed': True, 'ordering': ['Name']},
+        ),
+        migrations.AlterModelOptions(
+            name='review',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AlterModelOptions(
+            name='track',
+            options={'managed': False, 'ordering': ['TrackId']},
+        ),
+        migrations.AlterField(
+            model_name='userprofile',
+            name='avatar',
+            field=models.ImageField(blank=True, help_text='Upload a profile picture. Max size: 2MB', null=True, upload_to=chinook_app.models.user_avatar_path, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png', 'gif']), chinook_app.models.validate_image_size]),
+        ),
+    ]
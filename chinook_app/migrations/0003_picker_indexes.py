@@ -0,0 +1,66 @@
+"""
+Indexes behind the update/delete pickers (see ``chinook_app/pickers.py``).
+
+Album is unmanaged, so its indexes cannot be declared on the model and the
+whole set is created with SQL. ``(name, id)`` serves the keyset-paginated
+ordering. The prefix filter (``istartswith``) needs a case-insensitive
+index: a NOCASE index on SQLite, where LIKE ignores case, and an
+``UPPER(...) text_pattern_ops`` index on PostgreSQL, matching the SQL Django
+generates there. Album (like Track) comes from the Chinook sample and is
+not created by migrations, so indexes on a table that does not exist yet
+(a fresh database, including the test database) are skipped.
+"""
+from django.db import migrations
+
+INDEXES = [
+    ('Artist', 'Name', 'ArtistId'),
+    ('Album', 'Title', 'AlbumId'),
+]
+
+
+def _statements(vendor):
+    for table, name, pk in INDEXES:
+        prefix = table.lower()
+        yield (
+            table,
+            f'{prefix}_picker_idx',
+            f'CREATE INDEX IF NOT EXISTS "{prefix}_picker_idx" ON "{table}" ("{name}", "{pk}")',
+        )
+        if vendor == 'sqlite':
+            yield (
+                table,
+                f'{prefix}_prefix_idx',
+                f'CREATE INDEX IF NOT EXISTS "{prefix}_prefix_idx" '
+                f'ON "{table}" ("{name}" COLLATE NOCASE, "{pk}")',
+            )
+        elif vendor == 'postgresql':
+            yield (
+                table,
+                f'{prefix}_prefix_idx',
+                f'CREATE INDEX IF NOT EXISTS "{prefix}_prefix_idx" '
+                f'ON "{table}" (UPPER("{name}"::text) text_pattern_ops)',
+            )
+
+
+def create_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    tables = connection.introspection.table_names()
+    for table, _, sql in _statements(connection.vendor):
+        if table in tables:
+            schema_editor.execute(sql)
+
+
+def drop_indexes(apps, schema_editor):
+    for _, index, _ in _statements(schema_editor.connection.vendor):
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{index}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chinook_app', '0002_cataloguechange'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
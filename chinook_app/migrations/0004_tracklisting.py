@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chinook_app', '0003_picker_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrackListing',
+            fields=[
+                ('track_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(db_index=True, max_length=200)),
+                ('composer', models.CharField(blank=True, max_length=220, null=True)),
+                ('album_id', models.IntegerField(blank=True, null=True)),
+                ('album_title', models.CharField(blank=True, max_length=160)),
+                ('artist_id', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('artist_name', models.CharField(blank=True, max_length=120)),
+                ('genre_id', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('genre_name', models.CharField(blank=True, max_length=120)),
+                ('media_type_id', models.IntegerField(db_index=True)),
+                ('media_type_name', models.CharField(blank=True, max_length=120)),
+                ('milliseconds', models.IntegerField()),
+                ('duration', models.CharField(max_length=12)),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('avg_rating', models.FloatField(blank=True, db_index=True, null=True)),
+                ('review_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['track_id'],
+                'indexes': [models.Index(fields=['album_id', 'track_id'], name='listing_album_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:10
+"""
+Genre and MediaType over the standard Chinook dimension tables.
+
+Both models are unmanaged like Album and Track. Databases loaded from the
+Chinook sample already have the tables; anything else (a fresh SQLite file,
+a generated catalogue) gets them created here and seeded with the standard
+Chinook rows that the track ids refer to. Existing tables are left alone,
+and the reverse operation never drops them.
+"""
+from django.core.management.color import no_style
+from django.db import migrations, models
+
+GENRES = [
+    'Rock', 'Jazz', 'Metal', 'Alternative & Punk', 'Rock And Roll', 'Blues',
+    'Latin', 'Reggae', 'Pop', 'Soundtrack', 'Bossa Nova', 'Easy Listening',
+    'Heavy Metal', 'R&B/Soul', 'Electronica/Dance', 'World', 'Hip Hop/Rap',
+    'Science Fiction', 'TV Shows', 'Sci Fi & Fantasy', 'Drama', 'Comedy',
+    'Alternative', 'Classical', 'Opera',
+]
+MEDIA_TYPES = [
+    'MPEG audio file', 'Protected AAC audio file',
+    'Protected MPEG-4 video file', 'Purchased AAC audio file',
+    'AAC audio file',
+]
+
+
+def create_tables(apps, schema_editor):
+    connection = schema_editor.connection
+    tables = connection.introspection.table_names()
+    for model_name, names in (('Genre', GENRES), ('MediaType', MEDIA_TYPES)):
+        model = apps.get_model('chinook_app', model_name)
+        if model._meta.db_table in tables:
+            continue
+        schema_editor.create_model(model)
+        model.objects.using(connection.alias).bulk_create(
+            model(pk=pk, Name=name) for pk, name in enumerate(names, start=1)
+        )
+        # Move PostgreSQL sequences past the seeded ids
+        for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chinook_app', '0004_tracklisting'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('GenreId', models.AutoField(primary_key=True, serialize=False)),
+                ('Name', models.CharField(blank=True, max_length=120, null=True)),
+            ],
+            options={
+                'db_table': 'Genre',
+                'ordering': ['Name'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='MediaType',
+            fields=[
+                ('MediaTypeId', models.AutoField(primary_key=True, serialize=False)),
+                ('Name', models.CharField(blank=True, max_length=120, null=True)),
+            ],
+            options={
+                'db_table': 'MediaType',
+                'ordering': ['Name'],
+                'managed': False,
+            },
+        ),
+        migrations.AlterField(
+            model_name='tracklisting',
+            name='genre_id',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='tracklisting',
+            name='media_type_id',
+            field=models.IntegerField(),
+        ),
+        migrations.AddIndex(
+            model_name='tracklisting',
+            index=models.Index(fields=['genre_id', 'name', 'track_id'], name='listing_genre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tracklisting',
+            index=models.Index(fields=['media_type_id', 'name', 'track_id'], name='listing_media_type_idx'),
+        ),
+        migrations.RunPython(create_tables, migrations.RunPython.noop),
+    ]
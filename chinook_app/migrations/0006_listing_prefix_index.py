@@ -0,0 +1,48 @@
+"""
+Case-insensitive prefix index on the track listing's name.
+
+Admin track and review search match track names with ``istartswith`` via
+``TrackListing``. As for the picker indexes in 0003, that needs a NOCASE
+index on SQLite and an ``UPPER(...) text_pattern_ops`` index on PostgreSQL;
+the plain ``name`` index only serves exact and ordered lookups.
+"""
+from django.db import migrations
+
+INDEX = 'listing_name_prefix_idx'
+TABLE = 'chinook_app_tracklisting'
+
+
+def _statement(vendor):
+    if vendor == 'sqlite':
+        return (
+            f'CREATE INDEX IF NOT EXISTS "{INDEX}" '
+            f'ON "{TABLE}" ("name" COLLATE NOCASE, "track_id")'
+        )
+    if vendor == 'postgresql':
+        return (
+            f'CREATE INDEX IF NOT EXISTS "{INDEX}" '
+            f'ON "{TABLE}" (UPPER("name"::text) text_pattern_ops)'
+        )
+    return None
+
+
+def create_index(apps, schema_editor):
+    sql = _statement(schema_editor.connection.vendor)
+    if sql:
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if _statement(schema_editor.connection.vendor):
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{INDEX}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chinook_app', '0005_genre_mediatype'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
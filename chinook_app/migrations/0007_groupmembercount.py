@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def count_members(apps, schema_editor):
+    """Start every group's counter from its current membership."""
+    Group = apps.get_model('auth', 'Group')
+    GroupMemberCount = apps.get_model('chinook_app', 'GroupMemberCount')
+    GroupMemberCount.objects.bulk_create([
+        GroupMemberCount(group_id=pk, user_count=total)
+        for pk, total in Group.objects.annotate(total=models.Count('user'))
+        .values_list('pk', 'total')
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('chinook_app', '0006_listing_prefix_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupMemberCount',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='member_count', serialize=False, to='auth.group')),
+                ('user_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_members, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:25
+
+from django.db import migrations, models
+from django.utils.crypto import get_random_string, salted_hmac
+
+ANSWER_FIELDS = [f'answer_{n}' for n in range(1, 6)]
+
+# A frozen copy of the hashing in chinook_app.answers, so this migration
+# keeps producing the same digests if that module changes
+ALGORITHM = 'hmac_sha256'
+KEY_SALT = 'chinook_app.answers'
+SALT_LENGTH = 16
+
+
+def is_answer_digest(value):
+    parts = (value or '').split('$')
+    return len(parts) == 3 and parts[0] == ALGORITHM and len(parts[1]) == SALT_LENGTH
+
+
+def hash_answer(answer):
+    salt = get_random_string(SALT_LENGTH)
+    normalized = ' '.join((answer or '').split()).casefold()
+    digest = salted_hmac(KEY_SALT, f'{salt}${normalized}', algorithm='sha256').hexdigest()
+    return f'{ALGORITHM}${salt}${digest}'
+
+
+def hash_answers(apps, schema_editor):
+    """Replace plaintext answers with salted digests, 1000 rows at a time."""
+    SecurityQuestion = apps.get_model('chinook_app', 'SecurityQuestion')
+    rows = SecurityQuestion.objects.only('pk', *ANSWER_FIELDS).order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(rows.filter(pk__gt=last_pk)[:1000])
+        if not batch:
+            break
+        for row in batch:
+            for field in ANSWER_FIELDS:
+                answer = getattr(row, field)
+                if not is_answer_digest(answer):
+                    setattr(row, field, hash_answer(answer))
+        SecurityQuestion.objects.bulk_update(batch, ANSWER_FIELDS)
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chinook_app', '0007_groupmembercount'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='securityquestion',
+            name='answer_1',
+            field=models.CharField(help_text='Stored as a salted hash. Enter a new answer to replace it.', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='securityquestion',
+            name='answer_2',
+            field=models.CharField(help_text='Stored as a salted hash. Enter a new answer to replace it.', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='securityquestion',
+            name='answer_3',
+            field=models.CharField(help_text='Stored as a salted hash. Enter a new answer to replace it.', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='securityquestion',
+            name='answer_4',
+            field=models.CharField(help_text='Stored as a salted hash. Enter a new answer to replace it.', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='securityquestion',
+            name='answer_5',
+            field=models.CharField(help_text='Stored as a salted hash. Enter a new answer to replace it.', max_length=255),
+        ),
+        # Digests cannot be turned back into answers
+        migrations.RunPython(hash_answers, migrations.RunPython.noop),
+    ]
@@ -2,19 +2,30 @@ import os
 import uuid
 from django.db import models
 from django.contrib.auth.models import User, Group
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.core.validators import FileExtensionValidator
-from django.core.exceptions import ValidationError
+from django.core.exceptions import ValidationError, ObjectDoesNotExist
+from .answers import check_answer, hash_answer, is_answer_digest
+from .cache import (
+    album_tags, artist_tags, catalogue_changed, genre_tags, invalidate_tags,
+    media_type_tags, review_tags, track_tags
+)
+
+
+ANSWER_HELP_TEXT = 'Stored as a salted hash. Enter a new answer to replace it.'
 
 
 class SecurityQuestion(models.Model):
     """
     Security questions for user authentication and password recovery.
+
+    Answers are stored as salted digests (see ``chinook_app.answers``);
+    plaintext assigned to an answer field is hashed on ``save``.
     """
     QUESTION_CHOICES = [
         ('birth_year', '1. What is your birth year?'),
@@ -23,24 +34,68 @@ class SecurityQuestion(models.Model):
         ('father_name', '4. What is your father\'s name?'),
         ('favourite_colour', '5. What is your favourite colour?'),
     ]
+    QUESTION_TEXT = dict(QUESTION_CHOICES)
+    QUESTION_FIELDS = [(f'question_{n}', f'answer_{n}') for n in range(1, 6)]
 
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE
     )
     question_1 = models.CharField(max_length=50, choices=QUESTION_CHOICES)
-    answer_1 = models.CharField(max_length=255)
+    answer_1 = models.CharField(max_length=255, help_text=ANSWER_HELP_TEXT)
     question_2 = models.CharField(max_length=50, choices=QUESTION_CHOICES)
-    answer_2 = models.CharField(max_length=255)
+    answer_2 = models.CharField(max_length=255, help_text=ANSWER_HELP_TEXT)
     question_3 = models.CharField(max_length=50, choices=QUESTION_CHOICES)
-    answer_3 = models.CharField(max_length=255)
+    answer_3 = models.CharField(max_length=255, help_text=ANSWER_HELP_TEXT)
     question_4 = models.CharField(max_length=50, choices=QUESTION_CHOICES)
-    answer_4 = models.CharField(max_length=255)
+    answer_4 = models.CharField(max_length=255, help_text=ANSWER_HELP_TEXT)
     question_5 = models.CharField(max_length=50, choices=QUESTION_CHOICES)
-    answer_5 = models.CharField(max_length=255)
+    answer_5 = models.CharField(max_length=255, help_text=ANSWER_HELP_TEXT)
 
     def __str__(self):
         return f"Security Questions for {self.user.username}"
 
+    @classmethod
+    def from_answers(cls, user, data):
+        """Unsaved row for ``user`` from ``question_N``/``answer_N`` form data."""
+        row = cls(user=user)
+        for question_field, answer_field in cls.QUESTION_FIELDS:
+            setattr(row, question_field, data[question_field])
+            setattr(row, answer_field, data[answer_field])
+        return row
+
+    def save(self, *args, **kwargs):
+        for _, answer_field in self.QUESTION_FIELDS:
+            answer = getattr(self, answer_field)
+            if not is_answer_digest(answer):
+                setattr(self, answer_field, hash_answer(answer))
+        super().save(*args, **kwargs)
+
+    @property
+    def answer_digests(self):
+        """``{question key: answer digest}`` for every question that is set."""
+        return {
+            getattr(self, question_field): getattr(self, answer_field)
+            for question_field, answer_field in self.QUESTION_FIELDS
+            if getattr(self, question_field)
+        }
+
+    def questions(self):
+        """Keys of the questions that are set, in field order."""
+        return list(self.answer_digests)
+
+    def check_answers(self, attempts):
+        """
+        True if every ``(question key, answer)`` pair in ``attempts`` is
+        right. The questions must be distinct; every answer is checked,
+        so the time taken does not reveal which one was wrong.
+        """
+        digests = self.answer_digests
+        questions = [question for question, _ in attempts]
+        correct = bool(attempts) and len(set(questions)) == len(questions)
+        for question, answer in attempts:
+            correct &= check_answer(answer, digests.get(question, ''))
+        return correct
+
     def get_available_questions(self):
         """Returns a list of available questions that haven't been used yet."""
         used_questions = [
@@ -180,6 +235,24 @@ def send_admin_registration_notification(new_user):
         logger.error(f"Error sending admin notification: {e}")
 
 
+class GroupMemberCount(models.Model):
+    """
+    Maintained number of users in each auth group.
+
+    Kept in step with every membership change by ``chinook_app.roles``,
+    so the group admin can show member counts without counting the
+    membership table for every page.
+    """
+    group = models.OneToOneField(
+        Group, on_delete=models.CASCADE, primary_key=True,
+        related_name='member_count',
+    )
+    user_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.group.name}: {self.user_count}"
+
+
 class Artist(models.Model):
     """Artist model representing music artists."""
     ArtistId = models.AutoField(primary_key=True)
@@ -233,6 +306,42 @@ class Album(models.Model):
         return total or 0
 
 
+class Genre(models.Model):
+    """Genre model over the Chinook genre table."""
+    GenreId = models.AutoField(primary_key=True)
+    Name = models.CharField(max_length=120, null=True, blank=True)
+
+    class Meta:
+        db_table = 'Genre'
+        managed = False
+        ordering = ['Name']
+
+    def __str__(self):
+        return self.Name or f"Genre {self.GenreId}"
+
+    def get_absolute_url(self):
+        from django.urls import reverse
+        return reverse('genre_tracks', args=[str(self.GenreId)])
+
+
+class MediaType(models.Model):
+    """Media type model over the Chinook media type table."""
+    MediaTypeId = models.AutoField(primary_key=True)
+    Name = models.CharField(max_length=120, null=True, blank=True)
+
+    class Meta:
+        db_table = 'MediaType'
+        managed = False
+        ordering = ['Name']
+
+    def __str__(self):
+        return self.Name or f"Media type {self.MediaTypeId}"
+
+    def get_absolute_url(self):
+        from django.urls import reverse
+        return reverse('media_type_tracks', args=[str(self.MediaTypeId)])
+
+
 class Track(models.Model):
     """Track model representing individual music tracks."""
     TrackId = models.AutoField(primary_key=True)
@@ -241,8 +350,13 @@ class Track(models.Model):
         Album, on_delete=models.CASCADE, db_column='AlbumId',
         null=True, blank=True
     )
-    MediaTypeId = models.IntegerField()
-    GenreId = models.IntegerField(null=True, blank=True)
+    MediaTypeId = models.ForeignKey(
+        MediaType, on_delete=models.PROTECT, db_column='MediaTypeId'
+    )
+    GenreId = models.ForeignKey(
+        Genre, on_delete=models.SET_NULL, db_column='GenreId',
+        null=True, blank=True
+    )
     Composer = models.CharField(max_length=220, null=True, blank=True)
     Milliseconds = models.IntegerField()
     Bytes = models.IntegerField(null=True, blank=True)
@@ -301,4 +415,107 @@ class Review(models.Model):
 
     def get_rating_display(self):
         """Get star representation of rating."""
-        return '★' * self.rating
\ No newline at end of file
+        return '★' * self.rating
+
+
+class CatalogueChange(models.Model):
+    """
+    Append-only log of purged cache tags.
+
+    build_static_site reads entries newer than its last build to re-render
+    only the affected snapshot pages.
+    """
+    tag = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.tag} @ {self.created_at:%Y-%m-%d %H:%M:%S}"
+
+
+class TrackListing(models.Model):
+    """
+    Denormalized read model holding one row per track.
+
+    Album title, artist name, genre and media type names, the formatted
+    duration and the rating summary are copied onto the row, so listing and
+    search pages read a single indexed table instead of joining Track,
+    Album, Artist and Review. Rows are kept in step with every catalogue
+    write by ``chinook_app.listing`` and can be rebuilt from scratch with
+    ``manage.py rebuild_track_listing``.
+    """
+    track_id = models.IntegerField(primary_key=True)
+    name = models.CharField(max_length=200, db_index=True)
+    composer = models.CharField(max_length=220, null=True, blank=True)
+    album_id = models.IntegerField(null=True, blank=True)
+    album_title = models.CharField(max_length=160, blank=True)
+    artist_id = models.IntegerField(null=True, blank=True, db_index=True)
+    artist_name = models.CharField(max_length=120, blank=True)
+    genre_id = models.IntegerField(null=True, blank=True)
+    genre_name = models.CharField(max_length=120, blank=True)
+    media_type_id = models.IntegerField()
+    media_type_name = models.CharField(max_length=120, blank=True)
+    milliseconds = models.IntegerField()
+    duration = models.CharField(max_length=12)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    avg_rating = models.FloatField(null=True, blank=True, db_index=True)
+    review_count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['track_id']
+        indexes = [
+            models.Index(fields=['album_id', 'track_id'], name='listing_album_idx'),
+            # Genre and media type browse pages, ordered by track name
+            models.Index(fields=['genre_id', 'name', 'track_id'], name='listing_genre_idx'),
+            models.Index(
+                fields=['media_type_id', 'name', 'track_id'], name='listing_media_type_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def get_absolute_url(self):
+        from django.urls import reverse
+        return reverse('track_detail', args=[str(self.track_id)])
+
+
+# ===== CACHE INVALIDATION =====
+# ORM writes (admin, front-end deletes, reviews) purge the page cache tags of
+# the rows they touch. Raw SQL writes in views call catalogue_changed().
+@receiver([post_save, post_delete], sender=Artist)
+def artist_changed(sender, instance, **kwargs):
+    catalogue_changed(*artist_tags(instance.ArtistId))
+
+
+@receiver([post_save, post_delete], sender=Album)
+def album_changed(sender, instance, **kwargs):
+    catalogue_changed(*album_tags(instance.AlbumId, instance.ArtistId_id))
+
+
+@receiver([post_save, post_delete], sender=Genre)
+def genre_changed(sender, instance, **kwargs):
+    catalogue_changed(*genre_tags(instance.GenreId))
+
+
+@receiver([post_save, post_delete], sender=MediaType)
+def media_type_changed(sender, instance, **kwargs):
+    catalogue_changed(*media_type_tags(instance.MediaTypeId))
+
+
+@receiver([post_save, post_delete], sender=Track)
+def track_changed(sender, instance, **kwargs):
+    catalogue_changed(*track_tags(instance.TrackId, instance.AlbumId_id))
+
+
+@receiver([post_save, post_delete], sender=Review)
+def review_changed(sender, instance, **kwargs):
+    # Reviews do not appear in the cached list fragments, so only the
+    # dependent pages are purged.
+    try:
+        album_id = instance.track.AlbumId_id
+    except ObjectDoesNotExist:
+        album_id = None
+    invalidate_tags(*review_tags(instance.track_id, album_id))
@@ -0,0 +1,58 @@
+"""
+Paginator that avoids counting large tables.
+
+Django's admin counts the whole changelist queryset to number its pages.
+On an unfiltered changelist that is a ``COUNT(*)`` over the entire table,
+which grows with the catalogue. ``EstimatedCountPaginator`` answers that
+case from the planner statistics instead: ``pg_class.reltuples`` on
+PostgreSQL, and ``sqlite_stat1`` (written by ``ANALYZE``) on SQLite.
+Filtered querysets, tables without statistics and tables smaller than
+``ESTIMATED_COUNT_MIN_ROWS`` are still counted exactly.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+
+def estimated_row_count(model, using='default'):
+    """Approximate row count of ``model``'s table, or None if unknown."""
+    connection = connections[using]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)',
+                    [connection.ops.quote_name(table)],
+                )
+            elif connection.vendor == 'sqlite':
+                # The first number of any stat row is the table's row count
+                cursor.execute(
+                    'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table]
+                )
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        # No sqlite_stat1 until the database has been analysed
+        return None
+    if row is None or row[0] is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    # reltuples is -1 for tables PostgreSQL has never analysed
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator using ``estimated_row_count`` for unfiltered querysets."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is not None and not query.where and not query.distinct:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= settings.ESTIMATED_COUNT_MIN_ROWS:
+                return estimate
+        return super().count
@@ -0,0 +1,89 @@
+"""
+Searchable, paginated pickers for choosing one catalogue row.
+
+The update and delete pages used to render every artist or album into a
+``<select>``. A ``Picker`` instead returns one page of rows matching a name
+prefix, or the row with a given id, ordered by ``(name, id)``. Pages are
+addressed by a keyset cursor (the last row's id and name) rather than an
+offset, so every page is an index range scan over the indexes created in
+migration 0003, however deep the user pages.
+
+The same pickers back the server-rendered list on each page and the JSON
+endpoints under ``/api/picker/`` that ``script.js`` queries as the user
+types.
+"""
+from django.db.models import Q
+
+from .models import Artist, Album
+
+PICKER_PAGE_SIZE = 20
+
+
+class Picker:
+    """Prefix/id search over ``queryset`` ordered by ``field`` then pk."""
+
+    def __init__(self, queryset, field, label, page_size=PICKER_PAGE_SIZE):
+        self.queryset = queryset
+        self.field = field
+        self.label = label
+        self.page_size = page_size
+
+    def cursor(self, obj):
+        return f'{obj.pk}:{getattr(obj, self.field)}'
+
+    def _after(self, queryset, cursor):
+        pk, sep, value = (cursor or '').partition(':')
+        if not sep or not pk.isdigit():
+            return queryset
+        return queryset.filter(
+            Q(**{f'{self.field}__gt': value})
+            | Q(**{self.field: value, 'pk__gt': int(pk)})
+        )
+
+    def search(self, term='', after=None):
+        """
+        Return ``{'query', 'results', 'next'}`` for one page of matches.
+
+        ``results`` holds ``{'id', 'label'}`` dicts; ``next`` is the cursor
+        for the following page, or None on the last page. A numeric term
+        also matches the row with that id, listed first.
+        """
+        term = (term or '').strip()
+        queryset = self.queryset.order_by(self.field, 'pk')
+        if term:
+            queryset = queryset.filter(**{f'{self.field}__istartswith': term})
+        rows = list(self._after(queryset, after)[:self.page_size + 1])
+        next_cursor = self.cursor(rows[self.page_size - 1]) if len(rows) > self.page_size else None
+        rows = rows[:self.page_size]
+
+        if term.isdigit() and not after:
+            exact = self.queryset.filter(pk=int(term)).first()
+            if exact is not None and exact.pk not in {row.pk for row in rows}:
+                rows.insert(0, exact)
+
+        return {
+            'query': term,
+            'results': [{'id': row.pk, 'label': self.label(row)} for row in rows],
+            'next': next_cursor,
+        }
+
+    def get(self, pk):
+        """The row with primary key ``pk``, or None."""
+        try:
+            return self.queryset.filter(pk=int(pk)).first()
+        except (TypeError, ValueError):
+            return None
+
+
+def _album_label(album):
+    artist = album.ArtistId
+    return f'"{album.Title}" by {artist.Name}' if artist else album.Title
+
+
+ARTIST_PICKER = Picker(
+    Artist.objects.all(), 'Name',
+    lambda artist: f'{artist.Name} (ID: {artist.ArtistId})',
+)
+ALBUM_PICKER = Picker(
+    Album.objects.select_related('ArtistId'), 'Title', _album_label,
+)
@@ -0,0 +1,243 @@
+"""
+Declarative, concurrent data loading for views.
+
+A view lists the independent queries it needs on a ``QueryPlan`` and runs
+them together::
+
+    plan = QueryPlan()
+    plan.get('album', Album.objects.filter(AlbumId=album_id))
+    plan.page('tracks', tracks, 15, request.GET.get('page'))
+    plan.aggregate('stats', tracks, total=Sum('Milliseconds'))
+    data = plan.run()          # or: data = await plan.arun()
+
+Aggregates declared over the same base queryset, including the count a
+page needs, are merged into a single ``aggregate()`` statement through an
+``AggregateBundle``. The
+remaining statements run concurrently, each on a worker thread with its
+own database connection, so the page waits for roughly its slowest query
+instead of the sum of all of them. A worker closes its connection after
+each statement (with the pooled backend, it goes back to the pool), so
+idle worker threads hold no connections.
+"""
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Avg, Count, Max, Min, Sum
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'QUERY_PLAN_WORKERS', 8),
+            thread_name_prefix='query-plan',
+        )
+    return _executor
+
+
+def _closing(func):
+    def run():
+        try:
+            return func()
+        finally:
+            # Worker threads live outside the request cycle, so their
+            # connections are never closed by request_finished; closing
+            # only old ones would keep up to QUERY_PLAN_WORKERS persistent
+            # connections open per process, outside the pool's limit.
+            connections.close_all()
+    return run
+
+
+async def gather_queries(*funcs):
+    """Run independent sync ORM callables concurrently; return their results."""
+    return await asyncio.gather(*(
+        sync_to_async(_closing(func), thread_sensitive=False)() for func in funcs
+    ))
+
+
+def run_concurrently(*funcs):
+    """
+    Sync counterpart of ``gather_queries``.
+
+    The first callable runs on the calling thread while the others run on
+    the shared pool. Inside a transaction everything runs on the calling
+    thread, because other connections cannot see uncommitted rows.
+    """
+    if (len(funcs) < 2 or not getattr(settings, 'QUERY_PLAN_WORKERS', 8)
+            or any(conn.in_atomic_block for conn in connections.all(initialized_only=True))):
+        return [func() for func in funcs]
+
+    executor = _get_executor()
+    futures = [
+        executor.submit(contextvars.copy_context().run, _closing(func))
+        for func in funcs[1:]
+    ]
+    first = funcs[0]()
+    return [first] + [future.result() for future in futures]
+
+
+def _page_rows(page):
+    per_page = page.paginator.per_page
+    bottom = (page.number - 1) * per_page
+    return page.paginator.object_list[bottom:bottom + per_page]
+
+
+def _aggregate_key(queryset):
+    # Ordering does not change an aggregate, so ignore it when merging.
+    base = queryset.order_by()
+    return (base.db, base.model, str(base.query))
+
+
+class AggregateBundle:
+    """
+    Several aggregates over one base queryset, fetched in one statement.
+
+    Counts and sums over subsets of the base use conditional aggregates
+    (``Count(..., filter=Q(...))``) instead of one query per subset::
+
+        stats = (
+            AggregateBundle(User.objects.all())
+            .count('total')
+            .count('active', filter=Q(is_active=True))
+            .fetch()
+        )
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset.order_by()
+        self.expressions = {}
+
+    def add(self, name, expression):
+        self.expressions[name] = expression
+        return self
+
+    def count(self, name, field='pk', filter=None, distinct=False):
+        return self.add(name, Count(field, filter=filter, distinct=distinct))
+
+    def sum(self, name, field, filter=None):
+        return self.add(name, Sum(field, filter=filter))
+
+    def avg(self, name, field, filter=None):
+        return self.add(name, Avg(field, filter=filter))
+
+    def min(self, name, field, filter=None):
+        return self.add(name, Min(field, filter=filter))
+
+    def max(self, name, field, filter=None):
+        return self.add(name, Max(field, filter=filter))
+
+    def fetch(self):
+        """Return a dict of all aggregates from a single query."""
+        if not self.expressions:
+            return {}
+        return self.queryset.aggregate(**self.expressions)
+
+    async def afetch(self):
+        if not self.expressions:
+            return {}
+        return await self.queryset.aaggregate(**self.expressions)
+
+
+class QueryPlan:
+    """Collects a view's independent queries and runs them as one batch."""
+
+    def __init__(self):
+        self._tasks = {}
+        self._aggregates = {}
+        self._pages = {}
+
+    def call(self, name, func):
+        """Run an arbitrary callable; its return value becomes ``name``."""
+        self._tasks[name] = func
+        return self
+
+    def get(self, name, queryset):
+        """The first row of ``queryset``, or None."""
+        return self.call(name, queryset.first)
+
+    def list(self, name, queryset):
+        """All rows of ``queryset`` as a list."""
+        return self.call(name, lambda: list(queryset))
+
+    def aggregate(self, name, queryset, **expressions):
+        """A dict of aggregates over ``queryset``, merged with others on it."""
+        bundle = self._aggregates.get(_aggregate_key(queryset))
+        if bundle is None:
+            bundle = self._aggregates[_aggregate_key(queryset)] = AggregateBundle(queryset)
+        for alias, expression in expressions.items():
+            bundle.add(f'{name}__{alias}', expression)
+        return self
+
+    def page(self, name, queryset, per_page, page_number):
+        """
+        A ``Page`` of ``queryset`` as ``Paginator.get_page`` would return it.
+
+        The count joins the aggregate statement for ``queryset`` and the rows
+        of the requested page are fetched at the same time; only an
+        out-of-range page number costs a second fetch.
+        """
+        try:
+            number = max(int(page_number or 1), 1)
+        except (TypeError, ValueError):
+            number = 1
+        bottom = (number - 1) * per_page
+        self.aggregate(f'_{name}', queryset, count=Count('pk'))
+        self.call(f'_{name}_rows', lambda: list(queryset[bottom:bottom + per_page]))
+        self._pages[name] = (queryset, per_page, page_number, number)
+        return self
+
+    def _callables(self):
+        funcs = dict(self._tasks)
+        for index, bundle in enumerate(self._aggregates.values()):
+            funcs[f'_aggregate_{index}'] = bundle.fetch
+        return funcs
+
+    def _collect(self, names, values):
+        """Return (results, pages whose rows must be fetched again)."""
+        results = {}
+        for name, value in zip(names, values):
+            if name.startswith('_aggregate_'):
+                for merged, result in value.items():
+                    owner, alias = merged.rsplit('__', 1)
+                    results.setdefault(owner, {})[alias] = result
+            else:
+                results[name] = value
+
+        stale = []
+        for name, (queryset, per_page, page_number, fetched) in self._pages.items():
+            paginator = Paginator(queryset, per_page)
+            # Pre-fill the cached_property so the paginator never counts again.
+            paginator.count = results.pop(f'_{name}')['count']
+            try:
+                number = paginator.validate_number(page_number or 1)
+            except PageNotAnInteger:
+                number = 1
+            except EmptyPage:
+                number = paginator.num_pages
+            results[name] = Page(results.pop(f'_{name}_rows'), number, paginator)
+            if number != fetched:
+                stale.append(results[name])
+        return results, stale
+
+    def run(self):
+        """Execute the plan and return a dict of results by name."""
+        funcs = self._callables()
+        results, stale = self._collect(list(funcs), run_concurrently(*funcs.values()))
+        for page in stale:
+            page.object_list = list(_page_rows(page))
+        return results
+
+    async def arun(self):
+        """Async version of ``run``."""
+        funcs = self._callables()
+        results, stale = self._collect(list(funcs), await gather_queries(*funcs.values()))
+        for page in stale:
+            page.object_list = [row async for row in _page_rows(page)]
+        return results
@@ -0,0 +1,213 @@
+"""
+Sliding-window rate limiting for login and password recovery views.
+
+Each protected view has a rule in ``settings.RATE_LIMITS``: for every key
+kind (``ip``, ``username``) at most ``limit`` attempts per ``window``
+seconds. Attempts are counted per fixed window in the cache tier, which
+is shared by all workers once ``REDIS_URL`` is set. The previous
+window's count is weighted by how much of it still overlaps the sliding
+window, so ``previous * (1 - elapsed) + current`` approximates the
+attempts made in the last ``window`` seconds without storing timestamps.
+
+The check runs in the decorator, before the view, and reads only the
+request, the session and the cache. Blocked attempts get a 429 response
+with ``Retry-After`` and never reach the ORM. Only methods listed in the
+rule (POST by default) are counted.
+
+Per-process counters are kept in ``RATE_LIMIT_STATS``.
+"""
+import logging
+import math
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'ratelimit:'
+
+
+class RateLimitStats:
+    """Thread-safe per-process counts of checked and blocked attempts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._scopes = {}
+
+    def record(self, scope, blocked_by=None):
+        with self._lock:
+            counts = self._scopes.setdefault(
+                scope, {'checked': 0, 'allowed': 0, 'blocked': 0, 'blocked_by': {}}
+            )
+            counts['checked'] += 1
+            if blocked_by is None:
+                counts['allowed'] += 1
+            else:
+                counts['blocked'] += 1
+                counts['blocked_by'][blocked_by] = counts['blocked_by'].get(blocked_by, 0) + 1
+
+    def stats(self):
+        """Return ``{scope: counts}`` for this process."""
+        with self._lock:
+            return {
+                scope: dict(counts, blocked_by=dict(counts['blocked_by']))
+                for scope, counts in self._scopes.items()
+            }
+
+
+RATE_LIMIT_STATS = RateLimitStats()
+
+
+def client_ip(request):
+    """
+    The client address, looking through ``RATE_LIMIT_TRUSTED_PROXIES``
+    reverse proxies' ``X-Forwarded-For`` entries.
+    """
+    proxies = settings.RATE_LIMIT_TRUSTED_PROXIES
+    if proxies:
+        forwarded = [
+            part.strip()
+            for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+            if part.strip()
+        ]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def post_field(name):
+    """Key function reading the username from POST field ``name``."""
+    def key(request):
+        return request.POST.get(name, '').strip().lower()
+    return key
+
+
+def session_field(name):
+    """Key function reading the username from session key ``name``."""
+    def key(request):
+        return str(request.session.get(name, '')).strip().lower()
+    return key
+
+
+# The signed-in user's id, read from the session without loading the user
+session_user = session_field(SESSION_KEY)
+
+
+class SlidingWindow:
+    """Sliding-window counter for one ``limit`` per ``window`` seconds."""
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+
+    def hit(self, cache, key, now=None):
+        """
+        Count one attempt for ``key`` unless over the limit.
+
+        Return 0 if the attempt is allowed, or else the seconds to wait.
+        """
+        now = time.time() if now is None else now
+        index, offset = divmod(now, self.window)
+        index = int(index)
+        current_key = f'{key}:{index}'
+        previous_key = f'{key}:{index - 1}'
+        counts = cache.get_many([previous_key, current_key])
+        previous = counts.get(previous_key, 0)
+        current = counts.get(current_key, 0)
+        weight = 1 - offset / self.window
+        if previous * weight + current >= self.limit:
+            return self._retry_after(previous, current, offset)
+        # Kept for two windows: the next one still reads it as "previous"
+        if not cache.add(current_key, 1, timeout=self.window * 2):
+            try:
+                cache.incr(current_key)
+            except ValueError:
+                cache.set(current_key, 1, timeout=self.window * 2)
+        return 0
+
+    def _retry_after(self, previous, current, offset):
+        if current >= self.limit:
+            # Wait for this window to become the previous one and decay:
+            # current * (1 - t) < limit
+            wait = self.window - offset + self.window * (1 - self.limit / current)
+        else:
+            # Wait for the previous window's weight to decay:
+            # previous * (1 - t) + current < limit
+            wait = (1 - (self.limit - current) / previous) * self.window - offset
+        return max(1, math.ceil(wait))
+
+
+def _rules(scope):
+    rules = settings.RATE_LIMITS.get(scope, {})
+    return {
+        kind: SlidingWindow(limit, window)
+        for kind, (limit, window) in rules.items()
+        if kind != 'methods'
+    }
+
+
+def check(request, scope, username=None):
+    """
+    Count an attempt on ``scope`` and return the seconds to wait, or 0.
+
+    ``username`` is a key function returning the account the attempt is
+    for; blank values are not counted under ``username``.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return 0
+    cache = caches[settings.RATE_LIMIT_CACHE_ALIAS]
+    idents = {'ip': client_ip(request)}
+    if username is not None:
+        idents['username'] = username(request)
+    for kind, window in _rules(scope).items():
+        ident = idents.get(kind)
+        if not ident:
+            continue
+        retry_after = window.hit(cache, f'{KEY_PREFIX}{scope}:{kind}:{ident}')
+        if retry_after:
+            RATE_LIMIT_STATS.record(scope, blocked_by=kind)
+            logger.warning(
+                'Rate limit %s hit for %s %s; retry in %ss', scope, kind, ident, retry_after
+            )
+            return retry_after
+    RATE_LIMIT_STATS.record(scope)
+    return 0
+
+
+def too_many_requests(retry_after):
+    """429 response rendered without context processors (no ORM access)."""
+    response = HttpResponse(
+        render_to_string('429.html', {'retry_after': retry_after}), status=429
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limit(scope, username=None):
+    """
+    Decorator applying the ``RATE_LIMITS[scope]`` rule to a view.
+
+    Works on function views and, with ``method_decorator``, on class-based
+    views' ``dispatch``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            methods = settings.RATE_LIMITS.get(scope, {}).get('methods', ('POST',))
+            if request.method in methods:
+                retry_after = check(request, scope, username)
+                if retry_after:
+                    return too_many_requests(retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
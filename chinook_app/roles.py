@@ -0,0 +1,225 @@
+"""
+Role resolution shared by the admin permission hooks, view decorators and
+templates.
+
+Permission checks used to ask the database ``user.groups.filter(...)``
+every time, and the admin calls them for every registered model on every
+page. ``group_names`` instead loads a user's group names once:
+
+* per request, memoized on the user object;
+* across requests, in the cache under a key carrying a global roles
+  version, for ``ROLE_CACHE_TIMEOUT`` seconds. 0 turns this off; it is the
+  default without a shared cache, since invalidation would only reach the
+  worker that made the change.
+
+Adding or removing a user's groups deletes that user's entry; renaming or
+deleting a group bumps the version, which retires every entry at once.
+Both happen after the transaction commits.
+
+The same membership signals keep ``GroupMemberCount`` current, so the group
+admin can show member counts without counting the membership table.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import GroupMemberCount
+
+ROLES_VERSION_KEY = 'roles:version'
+
+# Groups that may manage catalogue content
+CONTENT_MANAGER_GROUPS = frozenset(['Admin', 'Superuser', 'Staff'])
+
+# The built-in account that only it may modify
+PROTECTED_USERNAME = 'admin'
+
+_MEMO_ATTR = '_role_group_names'
+_REMOVED_ATTR = '_member_count_removed'
+
+
+def _fresh_version():
+    # Time-based, so a version lost from the cache is never reused
+    return int(time.time() * 1000)
+
+
+def _roles_version():
+    version = cache.get(ROLES_VERSION_KEY)
+    if version is None:
+        cache.add(ROLES_VERSION_KEY, _fresh_version(), timeout=None)
+        version = cache.get(ROLES_VERSION_KEY)
+    return version
+
+
+def _cache_key(user_id):
+    return f'roles:{_roles_version()}:user:{user_id}'
+
+
+def group_names(user):
+    """Frozen set of the names of ``user``'s groups (empty for anonymous)."""
+    if user is None or not user.is_authenticated:
+        return frozenset()
+    names = getattr(user, _MEMO_ATTR, None)
+    if names is not None:
+        return names
+    prefetched = getattr(user, '_prefetched_objects_cache', {})
+    if 'groups' in prefetched:
+        names = frozenset(group.name for group in prefetched['groups'])
+    elif not settings.ROLE_CACHE_TIMEOUT:
+        names = frozenset(user.groups.values_list('name', flat=True))
+    else:
+        key = _cache_key(user.pk)
+        names = cache.get(key)
+        if names is None:
+            names = frozenset(user.groups.values_list('name', flat=True))
+            cache.set(key, names, settings.ROLE_CACHE_TIMEOUT)
+    setattr(user, _MEMO_ATTR, names)
+    return names
+
+
+def in_group(user, *names):
+    """True if ``user`` belongs to any of the groups ``names``."""
+    return not group_names(user).isdisjoint(names)
+
+
+def is_protected_user(user):
+    """True for the protected built-in admin account."""
+    return user.username.lower() == PROTECTED_USERNAME
+
+
+def is_content_manager(user):
+    """True if ``user`` may manage catalogue content."""
+    return in_group(user, *CONTENT_MANAGER_GROUPS)
+
+
+def can_access_admin(user):
+    """
+    True if ``user`` may use the Django admin.
+
+    Superuser group members are kept out; the protected admin account,
+    Admin group members and real Django superusers are let in.
+    """
+    if user is None or not user.is_authenticated:
+        return False
+    if in_group(user, 'Superuser'):
+        return False
+    if is_protected_user(user):
+        return True
+    return in_group(user, 'Admin') or user.is_superuser
+
+
+# ===== INVALIDATION =====
+def forget_user(user_id):
+    """Drop the cached group names of one user once the write commits."""
+    transaction.on_commit(lambda: cache.delete(_cache_key(user_id)))
+
+
+def bump_roles_version():
+    """Retire every cached entry once the write commits."""
+    def bump():
+        try:
+            cache.incr(ROLES_VERSION_KEY)
+        except ValueError:
+            cache.set(ROLES_VERSION_KEY, _fresh_version(), timeout=None)
+    transaction.on_commit(bump)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, User):
+        forget_user(instance.pk)
+    else:
+        # Changed from the group side: pk_set holds user ids (None on clear)
+        bump_roles_version()
+
+
+@receiver([post_save, post_delete], sender=Group)
+def group_changed(sender, instance, **kwargs):
+    bump_roles_version()
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+# ===== MEMBER COUNTS =====
+def _memberships(**filters):
+    return User.groups.through.objects.filter(**filters)
+
+
+def adjust_member_counts(deltas):
+    """
+    Apply ``{group_id: delta}`` to the maintained member counters.
+
+    Call after the membership rows changed: a group without a counter yet
+    gets one holding its current, already adjusted, member count.
+    """
+    for group_id, delta in deltas.items():
+        if not delta:
+            continue
+        updated = GroupMemberCount.objects.filter(group_id=group_id).update(
+            user_count=F('user_count') + delta
+        )
+        if not updated:
+            GroupMemberCount.objects.get_or_create(
+                group_id=group_id,
+                defaults={'user_count': _memberships(group_id=group_id).count()},
+            )
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def group_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # pk_set holds group ids when changed from the user side, user ids from
+    # the group side. Removals may name rows that do not exist, so the rows
+    # really removed are looked up before they go.
+    if reverse:
+        if action == 'post_add':
+            adjust_member_counts({instance.pk: len(pk_set)})
+        elif action == 'pre_remove':
+            removed = _memberships(group_id=instance.pk, user_id__in=pk_set).count()
+            setattr(instance, _REMOVED_ATTR, {instance.pk: -removed})
+        elif action == 'post_clear':
+            GroupMemberCount.objects.update_or_create(
+                group_id=instance.pk, defaults={'user_count': 0}
+            )
+    else:
+        if action == 'post_add':
+            adjust_member_counts(dict.fromkeys(pk_set, 1))
+        elif action in ('pre_remove', 'pre_clear'):
+            rows = _memberships(user_id=instance.pk)
+            if pk_set is not None:
+                rows = rows.filter(group_id__in=pk_set)
+            group_ids = rows.values_list('group_id', flat=True)
+            setattr(instance, _REMOVED_ATTR, dict.fromkeys(group_ids, -1))
+    if action in ('post_remove', 'post_clear'):
+        removed = instance.__dict__.pop(_REMOVED_ATTR, None)
+        if removed:
+            adjust_member_counts(removed)
+
+
+@receiver(post_save, sender=Group)
+def group_created(sender, instance, created, **kwargs):
+    if created:
+        GroupMemberCount.objects.get_or_create(group=instance)
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    # Deleting a user drops its membership rows without m2m_changed
+    group_ids = _memberships(user_id=instance.pk).values_list('group_id', flat=True)
+    setattr(instance, _REMOVED_ATTR, dict.fromkeys(group_ids, -1))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted_from_groups(sender, instance, **kwargs):
+    removed = instance.__dict__.pop(_REMOVED_ATTR, None)
+    if removed:
+        adjust_member_counts(removed)
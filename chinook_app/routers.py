@@ -0,0 +1,330 @@
+"""
+Read-replica routing for the Chinook catalogue.
+
+``CatalogueReplicaRouter`` sends reads of catalogue models (artists, albums,
+tracks, reviews, the track listing read model and the genre and media type
+lookups) to one of the aliases in ``DATABASE_REPLICAS``; every
+write, and every other model, stays on ``default``. Replica reads only
+happen inside a request routed by ``ReplicaRoutingMiddleware``: management
+commands, the shell and migrations always read the primary.
+
+Within a request one replica is chosen and reused so the page sees a single
+consistent snapshot. The choice lives in the request's routing state,
+which ``QueryPlan`` and ``gather_queries`` carry into their worker threads
+with the rest of the request's context, so concurrent reads share it too.
+
+A request that writes, and any request from a client that wrote within
+``DATABASE_PRIMARY_PIN_SECONDS``, reads from the primary. POST views that
+only read, such as the search forms, are marked with ``replica_reads`` so
+they are routed like a GET.
+Replicas are checked for replication lag every
+``DATABASE_REPLICA_CHECK_INTERVAL`` seconds and skipped while lagging more
+than ``DATABASE_REPLICA_MAX_LAG`` seconds or after a connection error. A
+GET whose view fails on a replica connection error is run once more
+against the primary.
+"""
+import asyncio
+import contextvars
+import logging
+import random
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import DatabaseError, InterfaceError, OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = 'default'
+CATALOGUE_MODELS = {
+    'artist', 'album', 'track', 'review', 'tracklisting', 'genre', 'mediatype',
+}
+PIN_COOKIE = 'db_primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Routing state of the current request; None outside routed requests.
+_request_state = contextvars.ContextVar('replica_routing', default=None)
+
+
+class _RequestState:
+    __slots__ = ('pinned', 'sticky', 'read_only', 'replica', 'lock')
+
+    def __init__(self, pinned, sticky):
+        self.pinned = pinned
+        # Pinned by the cookie of an earlier write, not by this request
+        self.sticky = sticky
+        self.read_only = False
+        self.replica = None
+        # Worker threads of one request may route their first reads at once
+        self.lock = threading.Lock()
+
+
+class ReplicaSet:
+    """Per-process view of replica health, lag and load."""
+
+    def __init__(self, replicas, policy='weighted', max_lag=10.0,
+                 check_interval=5.0, retry_after=30.0):
+        self.weights = {
+            alias: float(options.get('WEIGHT', 1))
+            for alias, options in replicas.items()
+        }
+        self.policy = policy
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.retry_after = retry_after
+
+        self._lock = threading.Lock()
+        self._in_flight = dict.fromkeys(self.weights, 0)
+        self._latency = dict.fromkeys(self.weights, 0.0)
+        self._down_until = dict.fromkeys(self.weights, 0.0)
+        self._next_check = dict.fromkeys(self.weights, 0.0)
+        self._lag = dict.fromkeys(self.weights, 0.0)
+
+    def choose(self):
+        """Return a healthy replica alias, or None to use the primary."""
+        healthy = [alias for alias in self.weights if self._is_healthy(alias)]
+        if not healthy:
+            return None
+        if self.policy == 'least_loaded':
+            with self._lock:
+                return min(healthy, key=lambda alias: (
+                    self._in_flight[alias] / self.weights[alias],
+                    self._latency[alias],
+                ))
+        return random.choices(
+            healthy, weights=[self.weights[alias] for alias in healthy]
+        )[0]
+
+    def mark_down(self, alias, reason):
+        with self._lock:
+            self._down_until[alias] = time.monotonic() + self.retry_after
+        logger.warning("Replica '%s' disabled for %ss: %s", alias, self.retry_after, reason)
+
+    def stats(self):
+        """Return lag, load and availability per replica."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                alias: {
+                    'weight': self.weights[alias],
+                    'in_flight': self._in_flight[alias],
+                    'latency_ms': round(self._latency[alias] * 1000, 2),
+                    'lag_seconds': self._lag[alias],
+                    'available': self._down_until[alias] <= now,
+                }
+                for alias in self.weights
+            }
+
+    def _is_healthy(self, alias):
+        now = time.monotonic()
+        with self._lock:
+            if self._down_until[alias] > now:
+                return False
+            due = self._next_check[alias] <= now
+            if due:
+                # Claim the check so concurrent requests don't repeat it.
+                self._next_check[alias] = now + self.check_interval
+        if due:
+            return self._check_lag(alias)
+        return True
+
+    def _check_lag(self, alias):
+        try:
+            lag = replication_lag(connections[alias])
+        except DatabaseError as exc:
+            self.mark_down(alias, exc)
+            return False
+        with self._lock:
+            self._lag[alias] = lag
+        if lag > self.max_lag:
+            self.mark_down(alias, f'replication lag {lag:.1f}s')
+            return False
+        return True
+
+    def __call__(self, execute, sql, params, many, context):
+        """Execute wrapper tracking in-flight queries and latency."""
+        alias = context['connection'].alias
+        with self._lock:
+            self._in_flight[alias] += 1
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        except (OperationalError, InterfaceError) as exc:
+            self.mark_down(alias, exc)
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._in_flight[alias] -= 1
+                self._latency[alias] = 0.8 * self._latency[alias] + 0.2 * elapsed
+
+
+def replication_lag(connection):
+    """Seconds the replica behind ``connection`` trails the primary."""
+    if connection.vendor != 'postgresql':
+        # SQLite stand-ins have no replication to lag behind.
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT CASE WHEN pg_is_in_recovery() "
+            "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+            "ELSE 0 END"
+        )
+        return float(cursor.fetchone()[0])
+
+
+_replica_set = None
+_replica_set_lock = threading.Lock()
+
+
+def get_replica_set():
+    """Return the process-wide ReplicaSet built from settings."""
+    global _replica_set
+    if _replica_set is None:
+        with _replica_set_lock:
+            if _replica_set is None:
+                _replica_set = ReplicaSet(
+                    getattr(settings, 'DATABASE_REPLICAS', {}),
+                    policy=getattr(settings, 'DATABASE_REPLICA_POLICY', 'weighted'),
+                    max_lag=getattr(settings, 'DATABASE_REPLICA_MAX_LAG', 10.0),
+                    check_interval=getattr(settings, 'DATABASE_REPLICA_CHECK_INTERVAL', 5.0),
+                )
+    return _replica_set
+
+
+def pin_to_primary():
+    """Send the rest of the current request's reads to the primary."""
+    state = _request_state.get()
+    if state is not None:
+        state.pinned = True
+        state.read_only = False
+
+
+def replica_reads(view):
+    """
+    Route a POST view that only reads (a search form) like a GET.
+
+    Its reads may use a replica and the client is not pinned to the primary
+    afterwards. A write during the view pins the request as usual.
+    """
+    def release():
+        state = _request_state.get()
+        if state is not None and not state.sticky:
+            state.pinned = False
+            state.read_only = True
+
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            release()
+            return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        release()
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+class CatalogueReplicaRouter:
+    """Route catalogue reads to replicas and everything else to the primary."""
+
+    def _is_catalogue(self, model):
+        return (model._meta.app_label == 'chinook_app'
+                and model._meta.model_name in CATALOGUE_MODELS)
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state is None or state.pinned or not self._is_catalogue(model):
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            # Reads inside a transaction must see its writes.
+            return PRIMARY
+        if state.replica is None:
+            with state.lock:
+                if state.replica is None:
+                    state.replica = get_replica_set().choose() or PRIMARY
+        replica = state.replica
+        if replica != PRIMARY:
+            # Connections are per thread: track this thread's one as well
+            replicas = get_replica_set()
+            wrappers = connections[replica].execute_wrappers
+            if replicas not in wrappers:
+                wrappers.append(replicas)
+        return replica
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive their schema through replication.
+        return db == PRIMARY
+
+
+async def _awaited(coroutine):
+    return await coroutine
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Scope replica routing to a request and keep writers on the primary.
+
+    Unsafe methods read from the primary and set a short-lived cookie so the
+    same client keeps reading from the primary until replicas have caught up
+    with its write; views marked with ``replica_reads`` are exempt.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'DATABASE_PRIMARY_PIN_SECONDS', 10)
+
+    def __call__(self, request):
+        sticky = self._is_pinned(request)
+        state = _RequestState(
+            pinned=sticky or request.method not in SAFE_METHODS, sticky=sticky
+        )
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if request.method not in SAFE_METHODS and not state.read_only:
+            response.set_cookie(
+                PIN_COOKIE, str(int(time.time() + self.pin_seconds)),
+                max_age=self.pin_seconds, httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_exception(self, request, exception):
+        """Run a read that failed on a replica again against the primary."""
+        state = _request_state.get()
+        if (not isinstance(exception, (OperationalError, InterfaceError))
+                or state is None or state.replica in (None, PRIMARY)
+                or request.method not in SAFE_METHODS):
+            return None
+        # The wrapper has already taken the replica out of rotation
+        logger.warning(
+            "Retrying %s on the primary after replica '%s' failed: %s",
+            request.path, state.replica, exception,
+        )
+        state.pinned = True
+        state.replica = None
+        match = request.resolver_match
+        response = match.func(request, *match.args, **match.kwargs)
+        if asyncio.iscoroutine(response):
+            response = async_to_sync(_awaited)(response)
+        return response
+
+    def _is_pinned(self, request):
+        try:
+            return int(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
@@ -0,0 +1,207 @@
+"""
+Database-backed session engine with a read-through cache.
+
+Enabled with ``SESSION_ENGINE = 'chinook_app.sessions'``. Compared with
+Django's ``db`` backend:
+
+* loads read the cache first and only fall back to a ``SELECT`` on a miss;
+  entries live for ``SESSION_CACHE_TIMEOUT`` seconds (0 disables the cache,
+  which is the default without a shared cache such as Redis, since a
+  per-process cache would serve other workers stale sessions);
+* saves write the database first, then refresh the cache entry;
+* a save whose data is unchanged since it was loaded or last written is
+  skipped, unless it would push the stored expiry forward by at least
+  ``SESSION_TOUCH_INTERVAL`` seconds;
+* ``clear_expired`` (run by ``clearsessions`` and ``purge_sessions``)
+  deletes expired rows ``SESSION_PURGE_BATCH_SIZE`` at a time.
+
+Load and save times, cache hits and skipped writes are counted per process
+in ``SESSION_STATS``.
+"""
+import hashlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.cache import caches
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'chinook.session:'
+
+
+class SessionStats:
+    """Thread-safe per-process session counters and timings."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stats = {
+                'loads': 0,
+                'cache_hits': 0,
+                'load_time_total': 0.0,
+                'load_time_max': 0.0,
+                'saves': 0,
+                'writes_skipped': 0,
+                'save_time_total': 0.0,
+                'save_time_max': 0.0,
+                'purged': 0,
+            }
+
+    def record(self, operation, elapsed, **counts):
+        """Add one ``load`` or ``save`` taking ``elapsed`` seconds."""
+        with self._lock:
+            self._stats[f'{operation}s'] += 1
+            self._stats[f'{operation}_time_total'] += elapsed
+            self._stats[f'{operation}_time_max'] = max(
+                self._stats[f'{operation}_time_max'], elapsed
+            )
+            for name, count in counts.items():
+                self._stats[name] += count
+
+    def add(self, **counts):
+        with self._lock:
+            for name, count in counts.items():
+                self._stats[name] += count
+
+    def stats(self):
+        """Return the counters with average load and save times."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['load_time_avg'] = stats['load_time_total'] / (stats['loads'] or 1)
+        stats['save_time_avg'] = stats['save_time_total'] / (stats['saves'] or 1)
+        stats['cache_hit_rate'] = stats['cache_hits'] / (stats['loads'] or 1)
+        return stats
+
+
+SESSION_STATS = SessionStats()
+
+
+@contextmanager
+def _timed(operation, counts):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        SESSION_STATS.record(operation, elapsed, **counts)
+        logger.debug('Session %s took %.2f ms %s', operation, elapsed * 1000, counts)
+
+
+class SessionStore(DBStore):
+    """Cached, write-through database session store."""
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # (session key, data fingerprint, expiry) as last read or written
+        self._stored = None
+
+    @property
+    def _cache(self):
+        return caches[settings.SESSION_CACHE_ALIAS]
+
+    @staticmethod
+    def _cache_key(session_key):
+        return KEY_PREFIX + session_key
+
+    def _fingerprint(self, data):
+        return hashlib.sha1(self.serializer().dumps(data)).hexdigest()
+
+    def _cache_set(self, data, expire_date):
+        timeout = min(
+            settings.SESSION_CACHE_TIMEOUT,
+            int((expire_date - timezone.now()).total_seconds()),
+        )
+        if timeout > 0:
+            self._cache.set(self._cache_key(self.session_key), (data, expire_date), timeout)
+
+    def load(self):
+        counts = {'cache_hits': 0}
+        with _timed('load', counts):
+            cached = None
+            if settings.SESSION_CACHE_TIMEOUT and self.session_key:
+                try:
+                    cached = self._cache.get(self._cache_key(self.session_key))
+                except Exception:
+                    logger.warning('Session cache read failed', exc_info=True)
+            if cached is not None and cached[1] > timezone.now():
+                counts['cache_hits'] = 1
+                data, expire_date = cached
+            else:
+                session = self._get_session_from_db()
+                if session is None:
+                    return {}
+                data, expire_date = self.decode(session.session_data), session.expire_date
+                self._cache_set(data, expire_date)
+            self._stored = (self.session_key, self._fingerprint(data), expire_date)
+            return data
+
+    def _is_unchanged(self, data):
+        if self._stored is None:
+            return False
+        session_key, fingerprint, stored_expiry = self._stored
+        if session_key != self.session_key or fingerprint != self._fingerprint(data):
+            return False
+        touch = timedelta(seconds=settings.SESSION_TOUCH_INTERVAL)
+        return self.get_expiry_date() - stored_expiry < touch
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        counts = {'writes_skipped': 0}
+        with _timed('save', counts):
+            data = self._get_session(no_load=must_create)
+            if not must_create and self._is_unchanged(data):
+                counts['writes_skipped'] = 1
+                return
+            super().save(must_create=must_create)
+            expire_date = self.get_expiry_date()
+            self._cache_set(data, expire_date)
+            self._stored = (self.session_key, self._fingerprint(data), expire_date)
+
+    def exists(self, session_key):
+        if settings.SESSION_CACHE_TIMEOUT and self._cache.get(self._cache_key(session_key)):
+            return True
+        return super().exists(session_key)
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        super().delete(session_key)
+        self._cache.delete(self._cache_key(session_key))
+        if self._stored is not None and self._stored[0] == session_key:
+            self._stored = None
+
+    @classmethod
+    def clear_expired(cls, batch_size=None):
+        """
+        Delete expired sessions in batches and return how many were removed.
+
+        Short deletes keep row locks brief on busy tables. Cached copies
+        expire on their own and are never served past their expiry.
+        """
+        batch_size = batch_size or settings.SESSION_PURGE_BATCH_SIZE
+        model = cls.get_model_class()
+        cutoff = timezone.now()
+        expired = model.objects.filter(expire_date__lt=cutoff).values_list(
+            'session_key', flat=True
+        )
+        total = 0
+        while True:
+            keys = list(expired[:batch_size])
+            if not keys:
+                break
+            deleted, _ = model.objects.filter(session_key__in=keys).delete()
+            total += deleted
+        SESSION_STATS.add(purged=total)
+        return total
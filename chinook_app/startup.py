@@ -0,0 +1,36 @@
+"""
+Work done once per process before it serves requests.
+
+``preload`` is called by ``wsgi.py`` and ``asgi.py``. Django otherwise
+imports the URLconf, and with it every view, on the first request, builds
+the resolver's reverse lookup tables on the first ``reverse()`` or
+``{% url %}``, compiles each template on first use and builds the facet
+index on the first track browser request. Views import their forms (and so
+allauth's account forms) when first called, which keeps them out of
+management commands; a web process loads them here instead. Doing all of
+it up front keeps that cost off the first requests. Under gunicorn's
+``preload_app`` (see ``gunicorn.conf.py``) it runs once in the master, and
+the forked workers share the result copy-on-write.
+"""
+from importlib import import_module
+
+from django.conf import settings
+from django.urls import get_resolver
+
+
+def preload():
+    """
+    Load the URLconf and forms; with ``TEMPLATE_WARMUP`` compile the
+    templates and with ``FACET_WARMUP`` build the facet index.
+    """
+    resolver = get_resolver()
+    resolver.url_patterns
+    # Populated per language on first use; built here for LANGUAGE_CODE
+    resolver.reverse_dict
+    import_module('chinook_app.forms')
+    if settings.TEMPLATE_WARMUP:
+        from .templating import warm_templates
+        warm_templates()
+    if settings.FACET_WARMUP:
+        from .facets import TRACK_FACETS
+        TRACK_FACETS.warm()
@@ -0,0 +1,20 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from chinook_app.assets import asset_url, critical_style
+
+register = template.Library()
+
+
+@register.simple_tag
+def asset_bundle(name):
+    """Return the URL of built bundle ``name`` ('' if not built; see build_assets)."""
+    return asset_url(name)
+
+
+@register.simple_tag(takes_context=True)
+def critical_css(context):
+    """Return the page template's critical CSS ('' if none; see build_critical_css)."""
+    page = context.template.name if context.template else None
+    # Close no <style> element early, whatever the CSS contains
+    return mark_safe(critical_style(page).replace('</', '<\\/')) if page else ''
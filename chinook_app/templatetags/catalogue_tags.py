@@ -0,0 +1,11 @@
+from django import template
+
+from chinook_app.cache import get_catalogue_version
+
+register = template.Library()
+
+
+@register.simple_tag
+def catalogue_version():
+    """Return the catalogue version for use in {% cache %} keys."""
+    return get_catalogue_version()
@@ -0,0 +1,157 @@
+"""
+Template warm-up and render profiling.
+
+Templates are loaded through Django's cached loader (see ``TEMPLATES`` in
+settings), which compiles each template once per process. ``warm_templates``
+compiles all of them when a worker boots: every template under the
+``DIRS`` of the template engines, and those of the apps in
+``TEMPLATE_WARM_APPS`` (the crispy-forms template pack). The first
+requests a worker serves then never pay for parsing.
+
+The profiler wraps ``Template._render`` the way Django's test runner
+instruments it. Every render is timed, whether of a page, of the
+``base.html`` it extends, of an ``{% include %}`` or of a crispy form
+or field template. ``TEMPLATE_STATS`` keeps per-template render counts,
+cumulative time and self time (excluding nested templates). It also keeps
+the same figures for each parent > child pair, so an include is reported
+where it is used. ``{% block %}`` content is rendered by the parent
+that ``{% extends %}`` names, so it counts toward the parent's self time.
+The profiler is installed at startup with
+``TEMPLATE_PROFILER=True`` (counters at ``/ops/metrics/``) or on demand by
+``manage.py profile_templates``.
+"""
+import logging
+import threading
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+
+# ===== WARM-UP =====
+def _warm_dirs(engine):
+    dirs = [Path(directory) for directory in engine.engine.dirs]
+    for label in getattr(settings, 'TEMPLATE_WARM_APPS', []):
+        try:
+            app = apps.get_app_config(label)
+        except LookupError:
+            continue
+        dirs.append(Path(app.path) / 'templates')
+    return dirs
+
+
+def warm_templates():
+    """
+    Compile every template into the cached loaders.
+
+    Return ``(compiled, failed)``; templates that do not compile are
+    logged and left to fail on use as before.
+    """
+    compiled = failed = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for directory in _warm_dirs(engine):
+            for path in sorted(directory.rglob('*.html')):
+                name = path.relative_to(directory).as_posix()
+                try:
+                    engine.get_template(name)
+                except (TemplateDoesNotExist, TemplateSyntaxError) as exc:
+                    logger.warning('Could not precompile template %s: %s', name, exc)
+                    failed += 1
+                else:
+                    compiled += 1
+    return compiled, failed
+
+
+# ===== RENDER PROFILER =====
+class TemplateRenderStats:
+    """Thread-safe per-process render timings by template and by include."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._templates = {}
+            self._includes = {}
+
+    @staticmethod
+    def _add(table, key, elapsed, own):
+        entry = table.setdefault(key, {'renders': 0, 'total': 0.0, 'self': 0.0, 'max': 0.0})
+        entry['renders'] += 1
+        entry['total'] += elapsed
+        entry['self'] += own
+        entry['max'] = max(entry['max'], elapsed)
+
+    def record(self, name, parent, elapsed, own):
+        with self._lock:
+            self._add(self._templates, name, elapsed, own)
+            if parent is not None:
+                self._add(self._includes, f'{parent} > {name}', elapsed, own)
+
+    @staticmethod
+    def _report(table):
+        return {
+            key: {
+                'renders': entry['renders'],
+                'total_ms': round(entry['total'] * 1000, 3),
+                'self_ms': round(entry['self'] * 1000, 3),
+                'mean_ms': round(entry['total'] * 1000 / entry['renders'], 3),
+                'max_ms': round(entry['max'] * 1000, 3),
+            }
+            for key, entry in table.items()
+        }
+
+    def stats(self):
+        """Return ``{'templates': {...}, 'includes': {...}}`` for this process."""
+        with self._lock:
+            return {
+                'templates': self._report(self._templates),
+                'includes': self._report(self._includes),
+            }
+
+
+TEMPLATE_STATS = TemplateRenderStats()
+
+_original_render = Template._render
+_local = threading.local()
+
+
+def _profiled_render(self, context):
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    name = self.name or '<string>'
+    parent = stack[-1] if stack else None
+    frame = [name, 0.0]  # name, time spent in nested templates
+    stack.append(frame)
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        stack.pop()
+        if parent is not None:
+            parent[1] += elapsed
+        TEMPLATE_STATS.record(name, parent[0] if parent else None, elapsed, elapsed - frame[1])
+
+
+def install_profiler():
+    """Start timing template renders in this process."""
+    Template._render = _profiled_render
+
+
+def uninstall_profiler():
+    Template._render = _original_render
+
+
+def profiler_installed():
+    return Template._render is _profiled_render
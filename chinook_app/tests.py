@@ -0,0 +1,378 @@
+"""
+Tests for the Chinook Music Database application.
+"""
+from importlib import import_module
+
+from django.apps import apps
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .cache import bump_catalogue_version
+from .facets import BitmapIds, FacetIndex, _set_bits
+from .listing import refresh_tracks
+from .answers import is_answer_digest
+from .models import Album, Artist, Genre, MediaType, SecurityQuestion, Track
+from .ratelimit import SlidingWindow
+from .roles import group_names
+
+
+# Static files are not collected for tests, so skip the manifest lookup
+@override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class ChinookTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+
+class CatalogueTestCase(ChinookTestCase):
+    """
+    TestCase with a small catalogue: one artist with 12 albums, the first
+    of which has 20 tracks.
+
+    Album and Track are unmanaged (they come from the Chinook sample), so
+    the test database does not have them; they are created here.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # Outside the class-level transaction: SQLite cannot alter the
+        # schema inside one
+        tables = connection.introspection.table_names()
+        with connection.schema_editor() as editor:
+            for model in (Album, Track):
+                if model._meta.db_table not in tables:
+                    editor.create_model(model)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.artist = Artist.objects.create(Name='AC/DC')
+        cls.albums = [
+            Album.objects.create(Title=f'Album {number:02d}', ArtistId=cls.artist)
+            for number in range(12)
+        ]
+        genre = Genre.objects.first()
+        media_type = MediaType.objects.first()
+        tracks = [
+            Track.objects.create(
+                Name=f'Track {number}', AlbumId=cls.albums[0], GenreId=genre,
+                MediaTypeId=media_type, Milliseconds=200000 + number, UnitPrice='0.99',
+            )
+            for number in range(20)
+        ]
+        refresh_tracks([track.TrackId for track in tracks])
+
+
+# Render every request, instead of serving it from the anonymous page cache
+@override_settings(PAGE_CACHE_VIEWS=[])
+class DetailQueryCountTests(CatalogueTestCase):
+    """Artist and album pages load their data through one QueryPlan."""
+
+    def test_album_detail(self):
+        # Album with artist, the page's tracks, and one aggregate for the
+        # page count, total duration and rating
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse('album_detail', args=[self.albums[0].AlbumId])
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['track_count'], 20)
+        self.assertEqual(response.context['total_duration'], 20 * 200000 + 190)
+
+    def test_album_detail_second_page(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse('album_detail', args=[self.albums[0].AlbumId]), {'page': 2}
+            )
+        self.assertEqual(len(response.context['tracks']), 5)
+
+    def test_artist_detail(self):
+        # Artist, the page's albums with their track counts, top tracks and
+        # the album count; nothing per album
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('artist_detail', args=[self.artist.ArtistId]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['album_count'], 12)
+        albums = list(response.context['albums'])
+        self.assertEqual(len(albums), 10)
+        self.assertEqual(albums[0].num_tracks, 20)
+        self.assertContains(response, '20 tracks')
+
+    def test_missing_album(self):
+        response = self.client.get(reverse('album_detail', args=[999]))
+        self.assertEqual(response.status_code, 404)
+
+
+class FacetIndexTests(CatalogueTestCase):
+
+    def test_build(self):
+        snapshot = FacetIndex().build()
+        track_ids = sorted(Track.objects.values_list('TrackId', flat=True))
+        self.assertEqual(_set_bits(snapshot.everything), track_ids)
+        genre = str(Genre.objects.first().pk)
+        self.assertEqual(snapshot.bitmaps['genre'][genre], snapshot.everything)
+        self.assertEqual(snapshot.bitmaps['duration'], {'2-4': snapshot.everything})
+
+    def test_updated(self):
+        snapshot = FacetIndex().build()
+        track = Track.objects.order_by('TrackId').first()
+        Track.objects.filter(pk=track.pk).update(Milliseconds=30000)
+        rows = FacetIndex()._rows(Track.objects.filter(pk=track.pk))
+        updated = snapshot.updated({track.pk}, rows, snapshot.last_change + 1)
+        self.assertEqual(_set_bits(updated.bitmaps['duration']['0-2']), [track.pk])
+        self.assertEqual(updated.bitmaps['duration']['2-4'].bit_count(), 19)
+        self.assertEqual(updated.everything, snapshot.everything)
+
+    def test_set_bits(self):
+        positions = [0, 3, 64, 65535, 65536, 65537, 200000, 1000003]
+        bitmap = sum(1 << position for position in positions)
+        self.assertEqual(_set_bits(bitmap), positions)
+        for offset in range(len(positions) + 1):
+            self.assertEqual(_set_bits(bitmap, offset, 3), positions[offset:offset + 3])
+        self.assertEqual(BitmapIds(bitmap)[2:5], positions[2:5])
+        self.assertEqual(len(BitmapIds(bitmap)), len(positions))
+        self.assertEqual(_set_bits(0), [])
+
+
+@override_settings(PAGE_CACHE_VIEWS=[])
+class CatalogueFragmentCacheTests(CatalogueTestCase):
+
+    def rename_first_album(self):
+        # A write another worker made: this process's version is not bumped
+        Album.objects.filter(pk=self.albums[0].pk).update(Title='Renamed')
+
+    @override_settings(CATALOGUE_CACHE_TIMEOUT=0)
+    def test_off_without_shared_cache(self):
+        self.assertContains(self.client.get(reverse('all_albums')), 'Album 00')
+        self.rename_first_album()
+        self.assertContains(self.client.get(reverse('all_albums')), 'Renamed')
+
+    @override_settings(CATALOGUE_CACHE_TIMEOUT=60)
+    def test_cached_until_version_bump(self):
+        self.assertContains(self.client.get(reverse('all_albums')), 'Album 00')
+        self.rename_first_album()
+        self.assertContains(self.client.get(reverse('all_albums')), 'Album 00')
+        bump_catalogue_version()
+        self.assertContains(self.client.get(reverse('all_albums')), 'Renamed')
+
+
+class AnonymousPageCacheTests(CatalogueTestCase):
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_off_without_shared_cache(self):
+        response = self.client.get(reverse('all_albums'))
+        self.assertNotIn('X-Page-Cache', response)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=60)
+    def test_served_from_cache(self):
+        self.assertEqual(self.client.get(reverse('all_albums'))['X-Page-Cache'], 'MISS')
+        self.assertEqual(self.client.get(reverse('all_albums'))['X-Page-Cache'], 'HIT')
+
+
+class UserManagementQueryCountTests(ChinookTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='x')
+        cls.admin.groups.add(Group.objects.get_or_create(name='Admin')[0])
+        for number in range(5):
+            User.objects.create_user(
+                f'user{number}', is_staff=number % 2 == 0, is_active=number != 4
+            )
+
+    def test_statistics_in_one_query(self):
+        self.client.force_login(self.admin)
+        # Session, user and groups for the request; the four user counts in
+        # one aggregate; the admin's profile; the user list
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('user_management'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_users'], 6)
+        self.assertEqual(response.context['active_users'], 5)
+        self.assertEqual(response.context['staff_users'], 3)
+        self.assertEqual(response.context['superusers'], 0)
+
+
+class MetricsTests(ChinookTestCase):
+
+    def test_pool_and_replica_stats(self):
+        admin = User.objects.create_user('admin', password='x')
+        admin.groups.add(Group.objects.get_or_create(name='Admin')[0])
+        self.client.force_login(admin)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertIn('db_pools', data)
+        self.assertIn('replicas', data)
+
+
+class RoleCacheTests(ChinookTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(name='Staff')
+        cls.user = User.objects.create_user('staffer')
+        cls.user.groups.add(cls.group)
+
+    def fresh_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    @override_settings(ROLE_CACHE_TIMEOUT=0)
+    def test_uncached_without_shared_cache(self):
+        self.assertEqual(group_names(self.fresh_user()), {'Staff'})
+        # Revoked behind the signals' back, as another worker would see it
+        User.groups.through.objects.filter(user=self.user).delete()
+        self.assertEqual(group_names(self.fresh_user()), frozenset())
+
+    @override_settings(ROLE_CACHE_TIMEOUT=60)
+    def test_cached_across_requests(self):
+        self.assertEqual(group_names(self.fresh_user()), {'Staff'})
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertEqual(group_names(user), {'Staff'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.remove(self.group)
+        self.assertEqual(group_names(self.fresh_user()), frozenset())
+
+
+@override_settings(RATE_LIMIT_ENABLED=True, RATE_LIMITS={
+    'login': {'ip': (5, 300), 'username': (2, 300)},
+    'security_question_reset': {'ip': (5, 300), 'username': (2, 300)},
+})
+class RateLimitTests(ChinookTestCase):
+
+    def post(self, url, field, username, ip='10.0.0.1'):
+        return self.client.post(url, {field: username, 'password': 'wrong'}, REMOTE_ADDR=ip)
+
+    def assert_limits(self, url, field):
+        for _ in range(2):
+            self.assertNotEqual(self.post(url, field, 'alice').status_code, 429)
+        # Blocked in the decorator: no session, user or ORM access
+        with self.assertNumQueries(0):
+            response = self.post(url, field, 'alice')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        # The username is locked out from every address...
+        self.assertEqual(self.post(url, field, 'ALICE ', ip='10.0.0.2').status_code, 429)
+        # ...while other accounts may still try from this one until the
+        # address uses up its own allowance, which every attempt counts against
+        self.assertNotEqual(self.post(url, field, 'bob').status_code, 429)
+        self.assertNotEqual(self.post(url, field, 'carol').status_code, 429)
+        self.assertEqual(self.post(url, field, 'dave').status_code, 429)
+        self.assertNotEqual(self.post(url, field, 'dave', ip='10.0.0.2').status_code, 429)
+
+    def test_login(self):
+        with self.assertLogs('chinook_app.ratelimit', 'WARNING') as logs:
+            self.assert_limits(reverse('account_login'), 'login')
+        self.assertEqual(len(logs.records), 3)
+
+    def test_security_question_reset(self):
+        with self.assertLogs('chinook_app.ratelimit', 'WARNING') as logs:
+            self.assert_limits(reverse('security_question_reset'), 'username')
+        self.assertEqual(len(logs.records), 3)
+
+    def test_get_not_counted(self):
+        for _ in range(5):
+            self.assertEqual(self.client.get(reverse('account_login')).status_code, 200)
+
+    def test_sliding_window(self):
+        window = SlidingWindow(2, 60)
+        start = 60 * 1000
+        self.assertEqual(window.hit(cache, 'key', start), 0)
+        self.assertEqual(window.hit(cache, 'key', start + 1), 0)
+        self.assertEqual(window.hit(cache, 'key', start + 2), 58)
+        # Halfway through the next window the two attempts count as one
+        self.assertGreater(window.hit(cache, 'key', start + 60), 0)
+        self.assertEqual(window.hit(cache, 'key', start + 90), 0)
+        self.assertGreater(window.hit(cache, 'key', start + 90), 0)
+        # Once a full window has passed, only the newer attempt counts
+        self.assertEqual(window.hit(cache, 'key', start + 120), 0)
+
+
+class SecurityAnswerTests(ChinookTestCase):
+
+    ANSWERS = {
+        'birth_year': '1970',
+        'father_birth_year': '1940',
+        'mother_name': 'Mary Ann',
+        'father_name': 'John',
+        'favourite_colour': 'Blue',
+    }
+
+    def form_data(self):
+        data = {}
+        for number, (question, answer) in enumerate(self.ANSWERS.items(), start=1):
+            data[f'question_{number}'] = question
+            data[f'answer_{number}'] = answer
+        return data
+
+    def create(self, username='alice'):
+        user = User.objects.create_user(username)
+        row = SecurityQuestion.from_answers(user, self.form_data())
+        row.save()
+        return SecurityQuestion.objects.get(pk=row.pk)
+
+    def test_stored_as_digests(self):
+        row = self.create()
+        for _, answer_field in SecurityQuestion.QUESTION_FIELDS:
+            digest = getattr(row, answer_field)
+            self.assertTrue(is_answer_digest(digest))
+            self.assertNotIn(self.ANSWERS['mother_name'], digest)
+        # Salted: the same answers give different digests
+        other = self.create('bob')
+        self.assertNotEqual(row.answer_1, other.answer_1)
+
+    def test_case_and_whitespace_normalised(self):
+        row = self.create()
+        self.assertTrue(row.check_answers([
+            ('mother_name', '  mary   ANN '), ('favourite_colour', 'bLUE'),
+        ]))
+
+    def test_wrong_answer_rejected(self):
+        row = self.create()
+        self.assertFalse(row.check_answers([
+            ('mother_name', 'Mary Ann'), ('favourite_colour', 'Red'),
+        ]))
+        self.assertFalse(row.check_answers([('mother_name', 'Mary')]))
+        # Repeating one right answer does not stand in for another question
+        self.assertFalse(row.check_answers([
+            ('mother_name', 'Mary Ann'), ('mother_name', 'Mary Ann'),
+        ]))
+        self.assertFalse(row.check_answers([]))
+
+    def test_saving_again_does_not_rehash(self):
+        row = self.create()
+        digests = row.answer_digests
+        row.save()
+        row.refresh_from_db()
+        self.assertEqual(row.answer_digests, digests)
+        self.assertTrue(row.check_answers([('father_name', 'john')]))
+
+    def test_migration_hashes_plaintext_rows(self):
+        row = self.create()
+        # Written with update(), as rows were stored before the migration
+        SecurityQuestion.objects.filter(pk=row.pk).update(**{
+            answer_field: answer
+            for (_, answer_field), answer in zip(
+                SecurityQuestion.QUESTION_FIELDS, self.ANSWERS.values()
+            )
+        })
+        migration = import_module('chinook_app.migrations.0008_hash_security_answers')
+        migration.hash_answers(apps, None)
+        row.refresh_from_db()
+        for _, answer_field in SecurityQuestion.QUESTION_FIELDS:
+            self.assertTrue(is_answer_digest(getattr(row, answer_field)))
+        self.assertTrue(row.check_answers([
+            ('birth_year', '1970'), ('mother_name', 'mary ann'),
+        ]))
+        # Running it again leaves the digests alone
+        digests = row.answer_digests
+        migration.hash_answers(apps, None)
+        row.refresh_from_db()
+        self.assertEqual(row.answer_digests, digests)
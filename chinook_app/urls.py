@@ -1,8 +1,12 @@
 # chinook_app/urls.py
+from django.conf import settings
 from django.urls import path, include
-from . import views
+from . import api, async_views, views
 from django.contrib.auth import views as auth_views
 
+# Read-only pages are served by their async versions when ASYNC_READ_VIEWS is on
+read_views = async_views if settings.ASYNC_READ_VIEWS else views
+
 urlpatterns = [
     # ===== OVERRIDE ALLAUTH PASSWORD RESET WITH SECURITY QUESTIONS =====
     path(
@@ -41,24 +45,31 @@ urlpatterns = [
     ),
 
     # ===== HOME & CORE PAGES =====
-    path('', views.index, name='home'),
+    path('', read_views.index, name='home'),
 
     # ===== NAVIGATION PAGES =====
-    path('artist/<int:artist_id>/', views.artist_detail, name='artist_detail'),
-    path('album/<int:album_id>/', views.album_detail, name='album_detail'),
+    path('artist/<int:artist_id>/', read_views.artist_detail, name='artist_detail'),
+    path('album/<int:album_id>/', read_views.album_detail, name='album_detail'),
     path('artist/<int:artist_id>/albums/', views.artist_albums_detailed, name='artist_albums_detailed'),
     path('album/<int:album_id>/tracks/', views.album_tracks_detailed, name='album_tracks_detailed'),
 
     # ===== BROWSE PAGES =====
-    path('artists/', views.all_artists, name='all_artists'),
-    path('albums/', views.all_albums, name='all_albums'),
+    path('artists/', read_views.all_artists, name='all_artists'),
+    path('albums/', read_views.all_albums, name='all_albums'),
+    path('genres/', read_views.genres, name='genres'),
+    path('genres/<int:genre_id>/', read_views.genre_tracks, name='genre_tracks'),
+    path('media-types/', read_views.media_types, name='media_types'),
+    path('media-types/<int:media_type_id>/', read_views.media_type_tracks, name='media_type_tracks'),
+    path('browse/tracks/', read_views.track_browser, name='track_browser'),
 
     # ===== SEARCH & FILTER PAGES =====
-    path('search-artist/', views.search_artist, name='search_artist'),
-    path('search-album/', views.search_album, name='search_album'),
-    path('search-track/', views.search_track, name='search_track'),
+    path('search-artist/', read_views.search_artist, name='search_artist'),
+    path('search-album/', read_views.search_album, name='search_album'),
+    path('search-track/', read_views.search_track, name='search_track'),
     path('artist-albums/', views.artist_albums, name='artist_albums'),
+    path('artist-albums/<int:artist_id>/', views.artist_albums, name='artist_albums'),
     path('album-tracks/', views.album_tracks, name='album_tracks'),
+    path('album-tracks/<int:album_id>/', views.album_tracks, name='album_tracks'),
 
     # ===== CREATE OPERATIONS =====
     path('add-artist/', views.add_artist, name='add_artist'),
@@ -75,7 +86,7 @@ urlpatterns = [
     path('album/<int:album_id>/delete/', views.delete_album_frontend, name='delete_album_frontend'),
 
     # ===== TRACK & REVIEW SYSTEM =====
-    path('track/<int:track_id>/', views.track_detail, name='track_detail'),
+    path('track/<int:track_id>/', read_views.track_detail, name='track_detail'),
     path('track/<int:track_id>/review/', views.add_review, name='add_review'),
     path('review/<int:review_id>/update/', views.update_review, name='update_review'),
     path('review/<int:review_id>/delete/', views.delete_review, name='delete_review'),
@@ -87,6 +98,19 @@ urlpatterns = [
 
     # ===== ADMIN USER MANAGEMENT =====
     path('user-management/', views.user_management, name='user_management'),
+    path('ops/metrics/', views.metrics, name='metrics'),
+
+    # ===== JSON API =====
+    path('api/artists/', api.artist_list, name='api_artist_list'),
+    path('api/artists/<int:artist_id>/', api.artist, name='api_artist'),
+    path('api/albums/<int:album_id>/', api.album, name='api_album'),
+    path('api/tracks/<int:track_id>/', api.track, name='api_track'),
+    path('api/search/', api.search, name='api_search'),
+    path('api/batch/artists/', api.batch_artists, name='api_batch_artists'),
+    path('api/batch/albums/', api.batch_albums, name='api_batch_albums'),
+    path('api/batch/tracks/', api.batch_tracks, name='api_batch_tracks'),
+    path('api/picker/artists/', api.artist_picker, name='api_artist_picker'),
+    path('api/picker/albums/', api.album_picker, name='api_album_picker'),
 
     # ===== INCLUDE DJANGO-ALLAUTH URLS =====
     path('accounts/', include('allauth.urls')),
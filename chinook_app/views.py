@@ -1,12 +1,14 @@
 """
 Views for the Chinook Music Database application.
 """
+import hashlib
 import os
 import random
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Avg, Sum
+from django.db.models import Q, Avg, Count
 from django.core.paginator import Paginator
 from django.db import connection
 from django.contrib.auth.models import User
@@ -14,23 +16,45 @@ from django.contrib.auth import (
     get_user_model, login, update_session_auth_hash
 )
 from django.contrib.auth.views import PasswordResetView
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.views.generic import View
 from django.views.decorators.csrf import csrf_protect
 from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth.forms import PasswordChangeForm
-from django.http import JsonResponse
-from .models import Artist, Album, Track, Review, UserProfile, SecurityQuestion
-from .forms import (
-    ArtistForm, AlbumForm, ReviewForm, CustomLoginForm,
-    UserProfileForm, UserEmailForm, SecurityQuestionResetForm,
-    SecurityQuestionVerificationForm, CustomResetPasswordForm,
-    SetNewPasswordForm
+from django.core.exceptions import BadRequest
+from django.http import Http404, JsonResponse
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
 )
+from django.utils.http import quote_etag
+from .models import (
+    Artist, Album, Track, TrackListing, Review, UserProfile, SecurityQuestion
+)
+from .cache import (
+    GLOBAL_TAG, add_cache_tags, album_tags, artist_tags, catalogue_changed,
+    get_tag_versions
+)
+from .middleware import is_anonymous_request
+from .db.pool import pool_stats
+from .facets import FACETS, TRACK_FACETS, BitmapIds, facet_groups
+from .listing import ALBUM_LISTING_STATS, album_rating
+from .lookups import GENRES, MEDIA_TYPES
+from .pickers import ALBUM_PICKER, ARTIST_PICKER
+from .queries import AggregateBundle, QueryPlan
+from .ratelimit import (
+    RATE_LIMIT_STATS, post_field, rate_limit, session_field, session_user
+)
+from .roles import in_group, is_content_manager
+from .routers import get_replica_set, replica_reads
+from .sessions import SESSION_STATS
+from .templating import TEMPLATE_STATS, profiler_installed
 
 User = get_user_model()
 
+# Rows per page on the artist and album browse pages
+LIST_PAGE_SIZE = 20
+
 
 # ===== ERROR HANDLER VIEWS =====
 def custom_400(request, exception=None):
@@ -57,9 +81,7 @@ def custom_500(request):
 def admin_required(function=None):
     """Decorator for views that checks if the user is in Admin group."""
     actual_decorator = user_passes_test(
-        lambda u: u.is_authenticated and u.groups.filter(
-            name='Admin'
-        ).exists(),
+        lambda u: in_group(u, 'Admin'),
         login_url='/accounts/login/'
     )
     if function:
@@ -70,9 +92,7 @@ def admin_required(function=None):
 def staff_required(function=None):
     """Decorator for views that checks if the user is in Staff group."""
     actual_decorator = user_passes_test(
-        lambda u: u.is_authenticated and u.groups.filter(
-            name='Staff'
-        ).exists(),
+        lambda u: in_group(u, 'Staff'),
         login_url='/accounts/login/'
     )
     if function:
@@ -82,60 +102,76 @@ def staff_required(function=None):
 
 def can_delete_content(user):
     """Check if user has permission to delete content."""
-    return user.is_authenticated and (
-        user.groups.filter(name__in=['Admin', 'Superuser', 'Staff']).exists()
-    )
+    return is_content_manager(user)
 
 
 # ===== NAVIGATION VIEWS =====
 def artist_detail(request, artist_id):
     """Display artist details and their albums."""
-    artist = get_object_or_404(Artist, ArtistId=artist_id)
-    albums = Album.objects.filter(ArtistId=artist_id).order_by('Title')
-    
-    # Paginate albums
-    paginator = Paginator(albums, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # Get top tracks from artist's albums
-    album_ids = albums.values_list('AlbumId', flat=True)
-    top_tracks = Track.objects.filter(AlbumId__in=album_ids)[:5]
+    # Track counts come with the page's rows instead of one query per album
+    albums = Album.objects.filter(ArtistId=artist_id).annotate(
+        num_tracks=Count('track')
+    ).order_by('Title')
+    data = (
+        QueryPlan()
+        .get('artist', Artist.objects.filter(ArtistId=artist_id))
+        .page('albums', albums, 10, request.GET.get('page'))
+        # Top tracks from the artist's albums
+        .list('top_tracks', TrackListing.objects.filter(artist_id=artist_id)[:5])
+        .run()
+    )
+    if data['artist'] is None:
+        raise Http404('No Artist matches the given query.')
+    page_obj = data['albums']
+
+    add_cache_tags(request, f'artist:{artist_id}', *(
+        f'album:{album.AlbumId}' for album in page_obj
+    ), *(
+        f'album:{track.album_id}' for track in data['top_tracks']
+    ))
     
     return render(request, 'chinook_app/artist_detail.html', {
-        'artist': artist,
+        'artist': data['artist'],
         'albums': page_obj,
-        'top_tracks': top_tracks,
-        'album_count': albums.count()
+        'top_tracks': data['top_tracks'],
+        'album_count': page_obj.paginator.count,
+        'ordering': 'Title'
     })
 
 
 def album_detail(request, album_id):
     """Display album details and tracks."""
-    album = get_object_or_404(Album, AlbumId=album_id)
-    tracks = Track.objects.filter(AlbumId=album_id).order_by('TrackId')
-    
-    # Paginate tracks
-    paginator = Paginator(tracks, 15)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # Calculate album statistics
-    total_duration = tracks.aggregate(Sum('Milliseconds'))['Milliseconds__sum'] or 0
-    avg_rating = Review.objects.filter(track__AlbumId=album_id).aggregate(Avg('rating'))['rating__avg']
+    tracks = TrackListing.objects.filter(album_id=album_id).order_by('track_id')
+    # Track count, duration and rating share one statement with the page count
+    data = (
+        QueryPlan()
+        .get('album', Album.objects.select_related('ArtistId').filter(AlbumId=album_id))
+        .page('tracks', tracks, 15, request.GET.get('page'))
+        .aggregate('tracks_stats', tracks, **ALBUM_LISTING_STATS)
+        .run()
+    )
+    album = data['album']
+    if album is None:
+        raise Http404('No Album matches the given query.')
+    page_obj = data['tracks']
     
     # Format duration
+    total_duration = data['tracks_stats']['duration'] or 0
     minutes = total_duration // 60000
     seconds = (total_duration % 60000) // 1000
     duration_formatted = f"{minutes}:{seconds:02d}"
+
+    add_cache_tags(
+        request, f'album:{album_id}', f'artist:{album.ArtistId_id}'
+    )
     
     return render(request, 'chinook_app/album_detail.html', {
         'album': album,
         'tracks': page_obj,
         'total_duration': total_duration,
         'duration_formatted': duration_formatted,
-        'avg_rating': avg_rating,
-        'track_count': tracks.count()
+        'avg_rating': album_rating(data['tracks_stats']),
+        'track_count': page_obj.paginator.count
     })
 
 
@@ -162,6 +198,7 @@ def album_tracks_detailed(request, album_id):
 
 
 # ===== CORE VIEWS =====
+@rate_limit('change_password', username=session_user)
 @login_required
 def change_password_with_security_questions(request):
     """Handle password change with security question verification."""
@@ -184,34 +221,13 @@ def change_password_with_security_questions(request):
             # Verify security questions
             question1_id = request.POST.get('question1_id')
             question2_id = request.POST.get('question2_id')
-            answer1 = request.POST.get('answer1', '').strip().lower()
-            answer2 = request.POST.get('answer2', '').strip().lower()
-
-            # Verify answers
-            correct_answers = 0
-            question_fields = [
-                ('question_1', 'answer_1'),
-                ('question_2', 'answer_2'),
-                ('question_3', 'answer_3'),
-                ('question_4', 'answer_4'),
-                ('question_5', 'answer_5')
-            ]
-
-            # Check first question
-            for q_field, a_field in question_fields:
-                if getattr(user_questions, q_field) == question1_id:
-                    if getattr(user_questions, a_field).lower() == answer1:
-                        correct_answers += 1
-                    break
-
-            # Check second question
-            for q_field, a_field in question_fields:
-                if getattr(user_questions, q_field) == question2_id:
-                    if getattr(user_questions, a_field).lower() == answer2:
-                        correct_answers += 1
-                    break
-
-            if correct_answers == 2:
+            answer1 = request.POST.get('answer1', '')
+            answer2 = request.POST.get('answer2', '')
+
+            # Verify answers against the stored digests
+            if user_questions.check_answers(
+                [(question1_id, answer1), (question2_id, answer2)]
+            ):
                 # Answers are correct, proceed to password change
                 form = PasswordChangeForm(request.user, request.POST)
                 if form.is_valid():
@@ -257,17 +273,7 @@ def change_password_with_security_questions(request):
 
     else:
         # GET request - show security questions
-        # Get all available questions
-        available_questions = []
-        question_fields = [
-            'question_1', 'question_2', 'question_3',
-            'question_4', 'question_5'
-        ]
-
-        for field in question_fields:
-            question_value = getattr(user_questions, field)
-            if question_value:  # Only include questions that have values
-                available_questions.append(question_value)
+        available_questions = user_questions.questions()
 
         if len(available_questions) < 2:
             messages.error(
@@ -307,21 +313,8 @@ def setup_security_questions(request):
         from .forms import SecurityQuestionSetupForm
         form = SecurityQuestionSetupForm(request.POST)
         if form.is_valid():
-            # Create security questions for user
-            security_questions = SecurityQuestion(
-                user=request.user,
-                question_1=form.cleaned_data['question_1'],
-                answer_1=form.cleaned_data['answer_1'].lower().strip(),
-                question_2=form.cleaned_data['question_2'],
-                answer_2=form.cleaned_data['answer_2'].lower().strip(),
-                question_3=form.cleaned_data['question_3'],
-                answer_3=form.cleaned_data['answer_3'].lower().strip(),
-                question_4=form.cleaned_data['question_4'],
-                answer_4=form.cleaned_data['answer_4'].lower().strip(),
-                question_5=form.cleaned_data['question_5'],
-                answer_5=form.cleaned_data['answer_5'].lower().strip(),
-            )
-            security_questions.save()
+            # Create security questions for user (answers are hashed on save)
+            SecurityQuestion.from_answers(request.user, form.cleaned_data).save()
             
             messages.success(
                 request,
@@ -341,6 +334,7 @@ def setup_security_questions(request):
 @login_required
 def profile_view(request):
     """Handle user profile updates including security questions."""
+    from .forms import UserEmailForm, UserProfileForm
     try:
         user_profile = UserProfile.objects.get(user=request.user)
     except UserProfile.DoesNotExist:
@@ -438,18 +432,19 @@ def user_management(request):
 
         return redirect('user_management')
 
-    # Calculate statistics
-    total_users = users.count()
-    active_users = users.filter(is_active=True).count()
-    staff_users = users.filter(is_staff=True).count()
-    superusers = users.filter(is_superuser=True).count()
+    # Calculate statistics in a single query
+    stats = (
+        AggregateBundle(users)
+        .count('total_users')
+        .count('active_users', filter=Q(is_active=True))
+        .count('staff_users', filter=Q(is_staff=True))
+        .count('superusers', filter=Q(is_superuser=True))
+        .fetch()
+    )
 
     return render(request, 'chinook_app/user_management.html', {
         'users': users,
-        'total_users': total_users,
-        'active_users': active_users,
-        'staff_users': staff_users,
-        'superusers': superusers
+        **stats
     })
 
 
@@ -472,17 +467,15 @@ def index(request):
         
         # Get recent tracks if table exists
         try:
-            recent_tracks = Track.objects.select_related(
-                'AlbumId', 'AlbumId__ArtistId'
-            ).all()[:10]
+            recent_tracks = TrackListing.objects.all()[:10]
         except:
             recent_tracks = []
         
         # Get top rated tracks if table exists
         try:
-            top_rated_tracks = Track.objects.annotate(
-                avg_rating=Avg('review__rating')
-            ).filter(avg_rating__gte=4).order_by('-avg_rating')[:5]
+            top_rated_tracks = TrackListing.objects.filter(
+                avg_rating__gte=4
+            ).order_by('-avg_rating')[:5]
         except:
             top_rated_tracks = []
             
@@ -496,6 +489,7 @@ def index(request):
         recent_tracks = []
         top_rated_tracks = []
     
+    add_cache_tags(request, 'artists', 'albums', 'tracks', 'reviews')
     stats = {
         'artists_count': artists_count,
         'albums_count': albums_count,
@@ -511,31 +505,152 @@ def all_artists(request):
     """Display paginated list of all artists."""
     try:
         artists = Artist.objects.all().order_by('Name')
-        paginator = Paginator(artists, 20)
+        paginator = Paginator(artists, LIST_PAGE_SIZE)
         page_number = request.GET.get('page')
         page_obj = paginator.get_page(page_number)
     except:
         # If table doesn't exist, show empty page
         page_obj = []
-    
-    return render(request, 'chinook_app/artists.html', {'artists': page_obj})
+
+    add_cache_tags(request, 'artists')
+    return render(request, 'chinook_app/artists.html', {
+        'artists': page_obj,
+        'ordering': 'Name'
+    })
 
 
 def all_albums(request):
     """Display paginated list of all albums."""
     try:
         albums = Album.objects.select_related('ArtistId').all().order_by('Title')
-        paginator = Paginator(albums, 20)
+        paginator = Paginator(albums, LIST_PAGE_SIZE)
         page_number = request.GET.get('page')
         page_obj = paginator.get_page(page_number)
     except:
         # If table doesn't exist, show empty page
         page_obj = []
-    
-    return render(request, 'chinook_app/albums.html', {'albums': page_obj})
+
+    add_cache_tags(request, 'albums', 'artists')
+    return render(request, 'chinook_app/albums.html', {
+        'albums': page_obj,
+        'ordering': 'Title'
+    })
+
+
+# ===== GENRE AND MEDIA TYPE BROWSE =====
+# Names come from the in-process lookup tables (see lookups.py), so these
+# pages never join or query Genre and MediaType. Counts and track pages
+# are range scans over the listing's genre and media type indexes.
+def _dimension_entries(lookup, field):
+    """Every row of ``lookup`` with its track count, ordered by name."""
+    counts = dict(
+        TrackListing.objects.order_by().values_list(field).annotate(Count('track_id'))
+    )
+    return [
+        {'id': pk, 'name': name, 'track_count': counts.get(pk, 0)}
+        for pk, name in lookup.get().choices()
+    ]
+
+
+def _dimension_tracks(lookup, field, pk):
+    """Return the name of row ``pk`` and its tracks ordered by name."""
+    table = lookup.get()
+    if pk not in table:
+        raise Http404('No such genre or media type.')
+    return table.name(pk), TrackListing.objects.filter(
+        **{field: pk}
+    ).order_by('name', 'track_id')
+
+
+def genres(request):
+    """List genres with their track counts."""
+    add_cache_tags(request, 'genres', 'tracks')
+    return render(request, 'chinook_app/dimension_list.html', {
+        'title': 'Genres',
+        'entries': _dimension_entries(GENRES, 'genre_id'),
+        'detail_url': 'genre_tracks',
+    })
+
+
+def genre_tracks(request, genre_id):
+    """Display paginated tracks of one genre."""
+    name, tracks = _dimension_tracks(GENRES, 'genre_id', genre_id)
+    page_obj = Paginator(tracks, LIST_PAGE_SIZE).get_page(request.GET.get('page'))
+    add_cache_tags(request, f'genre:{genre_id}', 'tracks')
+    return render(request, 'chinook_app/dimension_tracks.html', {
+        'title': name,
+        'kind': 'Genre',
+        'tracks': page_obj,
+        'list_url': 'genres',
+    })
+
+
+def media_types(request):
+    """List media types with their track counts."""
+    add_cache_tags(request, 'media_types', 'tracks')
+    return render(request, 'chinook_app/dimension_list.html', {
+        'title': 'Media Types',
+        'entries': _dimension_entries(MEDIA_TYPES, 'media_type_id'),
+        'detail_url': 'media_type_tracks',
+    })
+
+
+def media_type_tracks(request, media_type_id):
+    """Display paginated tracks of one media type."""
+    name, tracks = _dimension_tracks(MEDIA_TYPES, 'media_type_id', media_type_id)
+    page_obj = Paginator(tracks, LIST_PAGE_SIZE).get_page(request.GET.get('page'))
+    add_cache_tags(request, f'media_type:{media_type_id}', 'tracks')
+    return render(request, 'chinook_app/dimension_tracks.html', {
+        'title': name,
+        'kind': 'Media Type',
+        'tracks': page_obj,
+        'list_url': 'media_types',
+    })
+
+
+# ===== FACETED TRACK BROWSER =====
+def _facet_browse(params):
+    """
+    Context for the track browser filtered by the facets in ``params``.
+
+    Matches and counts come from the in-memory bitmap index (facets.py);
+    only the current page of tracks is read from the listing table.
+    """
+    selected = {facet: set(params.getlist(facet)) for facet, _ in FACETS}
+    matches, counts = TRACK_FACETS.get().search(selected)
+    page_obj = Paginator(BitmapIds(matches), LIST_PAGE_SIZE).get_page(params.get('page'))
+    rows = TrackListing.objects.in_bulk(page_obj.object_list)
+    page_obj.object_list = [rows[pk] for pk in page_obj.object_list if pk in rows]
+
+    groups = facet_groups(counts, selected)
+    for group in groups:
+        for value in group['values']:
+            query = params.copy()
+            query.pop('page', None)
+            chosen = query.getlist(group['name'])
+            if value['selected']:
+                chosen.remove(value['key'])
+            else:
+                chosen.append(value['key'])
+            query.setlist(group['name'], chosen)
+            value['query'] = query.urlencode()
+    filters = params.copy()
+    filters.pop('page', None)
+    return {
+        'tracks': page_obj,
+        'facets': groups,
+        'filtered': any(selected.values()),
+        'filter_query': filters.urlencode(),
+    }
+
+
+def track_browser(request):
+    """Browse tracks by genre, media type, price, duration, size and composer."""
+    return render(request, 'chinook_app/track_browser.html', _facet_browse(request.GET))
 
 
 # ===== SEARCH AND FILTER VIEWS =====
+@replica_reads
 def search_artist(request):
     """Search artists by name."""
     artists = None
@@ -557,6 +672,7 @@ def search_artist(request):
     })
 
 
+@replica_reads
 def search_album(request):
     """Search albums by title."""
     albums = None
@@ -578,6 +694,7 @@ def search_album(request):
     })
 
 
+@replica_reads
 def search_track(request):
     """Search tracks by name."""
     tracks = None
@@ -587,9 +704,9 @@ def search_track(request):
         search_term = request.POST.get('search_term', '')
         if search_term:
             try:
-                tracks = Track.objects.filter(
-                    Q(Name__icontains=search_term)
-                ).select_related('AlbumId', 'AlbumId__ArtistId').order_by('Name')
+                tracks = TrackListing.objects.filter(
+                    Q(name__icontains=search_term)
+                ).order_by('name')
             except:
                 tracks = []
 
@@ -599,56 +716,169 @@ def search_track(request):
     })
 
 
-def artist_albums(request):
-    """Display albums by selected artist."""
-    albums = None
-    artist = None
+def _parse_ids(values):
+    """
+    Collect ids from repeated and comma-separated query values.
+
+    Returns them sorted and de-duplicated, so every spelling of the same
+    lookup shares one canonical URL.
+    """
+    ids = set()
+    for value in values:
+        for part in value.split(','):
+            part = part.strip()
+            if part.isdigit():
+                ids.add(int(part))
+    if len(ids) > settings.BROWSE_BATCH_MAX_IDS:
+        raise BadRequest(f'At most {settings.BROWSE_BATCH_MAX_IDS} ids per request.')
+    return sorted(ids)
+
+
+def _canonical_browse_url(url_name, param, ids):
+    if len(ids) == 1:
+        return reverse(url_name, args=[ids[0]])
+    url = reverse(url_name)
+    if ids:
+        url += f"?{param}={','.join(map(str, ids))}"
+    return url
+
+
+def _browse_etag(request, tags):
+    """
+    Validator for a browse page, computed from its cache tag versions.
+
+    It needs no database query, so a matching ``If-None-Match`` is answered
+    before the page is loaded or rendered. Pages showing pending messages
+    get no ETag.
+    """
+    if 'messages' in request.COOKIES:
+        return None
+    viewer = ''
+    if not is_anonymous_request(request) and request.user.is_authenticated:
+        viewer = request.user.pk
+    versions = sorted(get_tag_versions([GLOBAL_TAG, *tags]).items())
+    return quote_etag(hashlib.md5(repr((versions, viewer)).encode()).hexdigest())
+
+
+def _browse_response(request, tags, render_page):
+    """Serve an id-addressed browse page with conditional GET and caching."""
+    etag = _browse_etag(request, tags)
+    response = etag and get_conditional_response(request, etag=etag)
+    if not response:
+        add_cache_tags(request, *tags)
+        response = render_page()
+    if etag:
+        response['ETag'] = etag
+    if is_anonymous_request(request):
+        patch_cache_control(response, public=True, max_age=settings.BROWSE_CACHE_MAX_AGE)
+    else:
+        patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
+def _group_by(rows, key):
+    groups = {}
+    for row in rows:
+        groups.setdefault(getattr(row, key), []).append(row)
+    return groups
+
 
+def artist_albums(request, artist_id=None):
+    """
+    Display the albums of one or more artists.
+
+    Addressed by id: ``/artist-albums/<id>/`` for one artist and
+    ``/artist-albums/?artist_id=1,2,3`` for several, which load every
+    artist's albums in a single ``IN`` query.
+    """
     if request.method == 'POST':
-        artist_id = request.POST.get('artist_id')
-        if artist_id:
-            try:
-                artist = get_object_or_404(Artist, ArtistId=artist_id)
-                albums = Album.objects.filter(ArtistId=artist_id).order_by('Title')
-            except:
-                artist = None
-                albums = []
+        # Old select form: send it to the cacheable GET resource.
+        ids = _parse_ids(request.POST.getlist('artist_id'))
+        return redirect(_canonical_browse_url('artist_albums', 'artist_id', ids), permanent=False)
+
+    ids = [artist_id] if artist_id is not None else _parse_ids(request.GET.getlist('artist_id'))
+    canonical = _canonical_browse_url('artist_albums', 'artist_id', ids)
+    if ids and request.get_full_path() != canonical:
+        return redirect(canonical, permanent=True)
+    if not ids:
+        return render(request, 'chinook_app/artist_albums.html', {
+            'picker': ARTIST_PICKER.search(request.GET.get('q'), request.GET.get('after')),
+            'results': None,
+        })
 
-    artists = Artist.objects.all().order_by('Name') if hasattr(Artist.objects, 'all') else []
-    return render(request, 'chinook_app/artist_albums.html', {
-        'artists': artists,
-        'albums': albums,
-        'artist': artist
-    })
+    def render_page():
+        data = (
+            QueryPlan()
+            .list('artists', Artist.objects.filter(ArtistId__in=ids).order_by('ArtistId'))
+            .list('albums', Album.objects.filter(ArtistId__in=ids).order_by('Title', 'AlbumId'))
+            .run()
+        )
+        if not data['artists']:
+            raise Http404('No Artist matches the given query.')
+        albums = _group_by(data['albums'], 'ArtistId_id')
+        return render(request, 'chinook_app/artist_albums.html', {
+            'results': [
+                {'artist': artist, 'albums': albums.get(artist.ArtistId, [])}
+                for artist in data['artists']
+            ],
+        })
 
+    return _browse_response(
+        request, ['albums', *(f'artist:{pk}' for pk in ids)], render_page
+    )
 
-def album_tracks(request):
-    """Display tracks by selected album."""
-    tracks = None
-    album = None
 
+def album_tracks(request, album_id=None):
+    """
+    Display the tracks of one or more albums.
+
+    Addressed by id like ``artist_albums``: ``/album-tracks/<id>/`` or
+    ``/album-tracks/?album_id=1,2,3``.
+    """
     if request.method == 'POST':
-        album_id = request.POST.get('album_id')
-        if album_id:
-            try:
-                album = get_object_or_404(Album, AlbumId=album_id)
-                tracks = Track.objects.filter(AlbumId=album_id).order_by('TrackId')
-            except:
-                album = None
-                tracks = []
+        ids = _parse_ids(request.POST.getlist('album_id'))
+        return redirect(_canonical_browse_url('album_tracks', 'album_id', ids), permanent=False)
+
+    ids = [album_id] if album_id is not None else _parse_ids(request.GET.getlist('album_id'))
+    canonical = _canonical_browse_url('album_tracks', 'album_id', ids)
+    if ids and request.get_full_path() != canonical:
+        return redirect(canonical, permanent=True)
+    if not ids:
+        return render(request, 'chinook_app/album_tracks.html', {
+            'picker': ALBUM_PICKER.search(request.GET.get('q'), request.GET.get('after')),
+            'results': None,
+        })
 
-    albums = Album.objects.select_related('ArtistId').all().order_by('Title') if hasattr(Album.objects, 'all') else []
-    return render(request, 'chinook_app/album_tracks.html', {
-        'albums': albums,
-        'tracks': tracks,
-        'album': album
-    })
+    def render_page():
+        data = (
+            QueryPlan()
+            .list('albums', Album.objects.select_related('ArtistId').filter(
+                AlbumId__in=ids
+            ).order_by('AlbumId'))
+            .list('tracks', TrackListing.objects.filter(album_id__in=ids).order_by('track_id'))
+            .run()
+        )
+        if not data['albums']:
+            raise Http404('No Album matches the given query.')
+        tracks = _group_by(data['tracks'], 'album_id')
+        return render(request, 'chinook_app/album_tracks.html', {
+            'results': [
+                {'album': album, 'tracks': tracks.get(album.AlbumId, [])}
+                for album in data['albums']
+            ],
+        })
+
+    return _browse_response(
+        request, ['artists', *(f'album:{pk}' for pk in ids)], render_page
+    )
 
 
 # ===== CREATE OPERATIONS =====
 @login_required
 def add_artist(request):
     """Add new artist to the database."""
+    from .forms import ArtistForm
     if request.method == 'POST':
         form = ArtistForm(request.POST)
         if form.is_valid():
@@ -663,6 +893,7 @@ def add_artist(request):
                         [artist_name]
                     )
                     artist_id = cursor.fetchone()[0]
+                catalogue_changed(*artist_tags(artist_id))
 
                 msg = 'Artist "{}" added with ID: {}!'.format(
                     artist_name, artist_id
@@ -682,6 +913,7 @@ def add_artist(request):
 @login_required
 def add_album(request):
     """Add new album to the database."""
+    from .forms import AlbumForm
     if request.method == 'POST':
         form = AlbumForm(request.POST)
         if form.is_valid():
@@ -697,6 +929,7 @@ def add_album(request):
                         [album_title, artist_id]
                     )
                     album_id = cursor.fetchone()[0]
+                catalogue_changed(*album_tags(album_id, artist_id))
 
                 messages.success(
                     request, f'Album "{album_title}" added successfully!'
@@ -720,17 +953,12 @@ def add_album(request):
 @login_required
 def update_artist(request):
     """Update existing artist information."""
-    artists = Artist.objects.all().order_by('Name') if hasattr(Artist.objects, 'all') else []
     selected_artist = None
 
     if request.method == 'POST':
         if 'select_artist' in request.POST:
             artist_id = request.POST.get('artist_id')
-            if artist_id:
-                try:
-                    selected_artist = get_object_or_404(Artist, ArtistId=artist_id)
-                except:
-                    selected_artist = None
+            selected_artist = ARTIST_PICKER.get(artist_id)
 
         elif 'update_artist' in request.POST:
             artist_id = request.POST.get('artist_id')
@@ -743,6 +971,7 @@ def update_artist(request):
                             'WHERE "ArtistId" = %s',
                             [new_name, artist_id]
                         )
+                    catalogue_changed(*artist_tags(artist_id))
 
                     messages.success(
                         request,
@@ -756,7 +985,7 @@ def update_artist(request):
                     )
 
     return render(request, 'chinook_app/update_artist.html', {
-        'artists': artists,
+        'picker': ARTIST_PICKER.search(request.GET.get('q'), request.GET.get('after')),
         'selected_artist': selected_artist
     })
 
@@ -764,17 +993,12 @@ def update_artist(request):
 @login_required
 def update_album(request):
     """Update existing album information."""
-    albums = Album.objects.select_related('ArtistId').all().order_by('Title') if hasattr(Album.objects, 'all') else []
     selected_album = None
 
     if request.method == 'POST':
         if 'select_album' in request.POST:
             album_id = request.POST.get('album_id')
-            if album_id:
-                try:
-                    selected_album = get_object_or_404(Album, AlbumId=album_id)
-                except:
-                    selected_album = None
+            selected_album = ALBUM_PICKER.get(album_id)
 
         elif 'update_album' in request.POST:
             album_id = request.POST.get('album_id')
@@ -787,6 +1011,7 @@ def update_album(request):
                             'WHERE "AlbumId" = %s',
                             [new_title, album_id]
                         )
+                    catalogue_changed(*album_tags(album_id))
 
                     messages.success(
                         request,
@@ -800,7 +1025,7 @@ def update_album(request):
                     )
 
     return render(request, 'chinook_app/update_album.html', {
-        'albums': albums,
+        'picker': ALBUM_PICKER.search(request.GET.get('q'), request.GET.get('after')),
         'selected_album': selected_album
     })
 
@@ -810,24 +1035,19 @@ def update_album(request):
 @staff_required
 def delete_artist(request):
     """Delete artist from the database (with validation)."""
-    artists = Artist.objects.all().order_by('Name') if hasattr(Artist.objects, 'all') else []
     selected_artist = None
     error = None
 
     if request.method == 'POST':
         if 'select_artist' in request.POST:
             artist_id = request.POST.get('artist_id')
-            if artist_id:
-                try:
-                    selected_artist = get_object_or_404(Artist, ArtistId=artist_id)
-                    # Check if artist has albums
-                    if Album.objects.filter(ArtistId=artist_id).exists():
-                        error = (
-                            "Cannot delete artist with existing albums. "
-                            "Please delete the albums first."
-                        )
-                except:
-                    selected_artist = None
+            selected_artist = ARTIST_PICKER.get(artist_id)
+            # Check if artist has albums
+            if selected_artist and Album.objects.filter(ArtistId=artist_id).exists():
+                error = (
+                    "Cannot delete artist with existing albums. "
+                    "Please delete the albums first."
+                )
 
         elif 'delete_artist' in request.POST:
             artist_id = request.POST.get('artist_id')
@@ -849,7 +1069,7 @@ def delete_artist(request):
                     error = "Artist not found or cannot be deleted."
 
     return render(request, 'chinook_app/delete_artist.html', {
-        'artists': artists,
+        'picker': ARTIST_PICKER.search(request.GET.get('q'), request.GET.get('after')),
         'selected_artist': selected_artist,
         'error': error
     })
@@ -859,24 +1079,19 @@ def delete_artist(request):
 @staff_required
 def delete_album(request):
     """Delete album from the database (with validation)."""
-    albums = Album.objects.select_related('ArtistId').all().order_by('Title') if hasattr(Album.objects, 'all') else []
     selected_album = None
     error = None
 
     if request.method == 'POST':
         if 'select_album' in request.POST:
             album_id = request.POST.get('album_id')
-            if album_id:
-                try:
-                    selected_album = get_object_or_404(Album, AlbumId=album_id)
-                    # Check if album has tracks
-                    if Track.objects.filter(AlbumId=album_id).exists():
-                        error = (
-                            "Cannot delete album with existing tracks. "
-                            "Please delete the tracks first."
-                        )
-                except:
-                    selected_album = None
+            selected_album = ALBUM_PICKER.get(album_id)
+            # Check if album has tracks
+            if selected_album and Track.objects.filter(AlbumId=album_id).exists():
+                error = (
+                    "Cannot delete album with existing tracks. "
+                    "Please delete the tracks first."
+                )
 
         elif 'delete_album' in request.POST:
             album_id = request.POST.get('album_id')
@@ -898,7 +1113,7 @@ def delete_album(request):
                     error = "Album not found or cannot be deleted."
 
     return render(request, 'chinook_app/delete_album.html', {
-        'albums': albums,
+        'picker': ALBUM_PICKER.search(request.GET.get('q'), request.GET.get('after')),
         'selected_album': selected_album,
         'error': error
     })
@@ -952,6 +1167,7 @@ def delete_artist_frontend(request, artist_id):
 @login_required
 def add_review(request, track_id):
     """Add a review for a specific track."""
+    from .forms import ReviewForm
     try:
         track = get_object_or_404(Track, TrackId=track_id)
     except:
@@ -981,6 +1197,7 @@ def add_review(request, track_id):
 @login_required
 def update_review(request, review_id):
     """Update an existing review."""
+    from .forms import ReviewForm
     try:
         review = get_object_or_404(Review, id=review_id, user=request.user)
     except:
@@ -1039,6 +1256,11 @@ def track_detail(request, track_id):
             ).first()
 
         average_rating = reviews.aggregate(Avg('rating'))['rating__avg']
+        album = track.AlbumId
+        add_cache_tags(request, f'track:{track_id}', *(
+            [f'album:{album.AlbumId}', f'artist:{album.ArtistId_id}']
+            if album else []
+        ))
     except:
         # If track doesn't exist or there's an error
         track = None
@@ -1056,6 +1278,10 @@ def track_detail(request, track_id):
 
 
 # ===== SECURITY QUESTION PASSWORD RESET VIEWS =====
+@method_decorator(
+    rate_limit('security_question_reset', username=post_field('username')),
+    name='dispatch'
+)
 @method_decorator(csrf_protect, name='dispatch')
 class SecurityQuestionPasswordResetView(View):
     """Handle password reset using security questions - step 1."""
@@ -1063,49 +1289,37 @@ class SecurityQuestionPasswordResetView(View):
     template_name = 'account/security_question_reset.html'
 
     def get(self, request):
+        from .forms import SecurityQuestionResetForm
         form = SecurityQuestionResetForm()
         return render(request, self.template_name, {'form': form})
 
     def post(self, request):
+        from .forms import SecurityQuestionResetForm
         form = SecurityQuestionResetForm(request.POST)
         if form.is_valid():
             username = form.cleaned_data['username']
             try:
-                user = User.objects.get(username=username)
+                # One indexed fetch of the row, joined on the unique username
+                security_questions = SecurityQuestion.objects.get(
+                    user__username=username
+                )
                 self.request.session['reset_username'] = username
 
-                # Select 2 random questions from user's security questions
-                security_questions = SecurityQuestion.objects.get(user=user)
-                all_questions = [
-                    (security_questions.question_1,
-                     security_questions.answer_1, 1),
-                    (security_questions.question_2,
-                     security_questions.answer_2, 2),
-                    (security_questions.question_3,
-                     security_questions.answer_3, 3),
-                    (security_questions.question_4,
-                     security_questions.answer_4, 4),
-                    (security_questions.question_5,
-                     security_questions.answer_5, 5),
-                ]
-
-                # Randomly select 2 questions
-                selected_questions = random.sample(all_questions, 2)
-
-                # Store questions and answers in session
+                # Randomly select 2 questions; only their keys go into the
+                # session, never the answers
+                selected_questions = random.sample(security_questions.questions(), 2)
                 self.request.session['security_questions'] = [
-                    {'question': q[0], 'correct_answer': q[1], 'number': q[2]}
-                    for q in selected_questions
+                    {
+                        'question': SecurityQuestion.QUESTION_TEXT.get(key, key),
+                        'key': key,
+                    }
+                    for key in selected_questions
                 ]
                 self.request.session['questions_verified'] = False
-                self.request.session['reset_user_id'] = user.id
+                self.request.session['reset_user_id'] = security_questions.user_id
 
                 return redirect('security_question_verify')
 
-            except User.DoesNotExist:
-                messages.error(
-                    self.request, 'User not found. Please check the username.'
-                )
             except SecurityQuestion.DoesNotExist:
                 messages.error(
                     self.request,
@@ -1116,6 +1330,10 @@ class SecurityQuestionPasswordResetView(View):
         return render(request, self.template_name, {'form': form})
 
 
+@method_decorator(
+    rate_limit('security_question_verify', username=session_field('reset_username')),
+    name='dispatch'
+)
 @method_decorator(csrf_protect, name='dispatch')
 class SecurityQuestionVerificationView(View):
     """Handle password reset using security questions - step 2."""
@@ -1132,6 +1350,7 @@ class SecurityQuestionVerificationView(View):
             )
             return redirect('security_question_reset')
 
+        from .forms import SecurityQuestionVerificationForm
         form = SecurityQuestionVerificationForm(
             security_questions=security_questions
         )
@@ -1142,38 +1361,34 @@ class SecurityQuestionVerificationView(View):
 
     def post(self, request):
         security_questions = self.request.session.get('security_questions', [])
-        username = self.request.session.get('reset_username')
+        user_id = self.request.session.get('reset_user_id')
 
-        if not username or not security_questions:
+        # Sessions from before answers were hashed carry no question keys
+        if (not user_id or not security_questions
+                or not all('key' in q for q in security_questions)):
             messages.error(
                 self.request, 'Session expired. Please start over.'
             )
             return redirect('security_question_reset')
 
+        from .forms import SecurityQuestionVerificationForm
         form = SecurityQuestionVerificationForm(
             request.POST, security_questions=security_questions
         )
 
         if form.is_valid():
             try:
-                user = User.objects.get(username=username)
-                correct_answers = 0
-
-                for i, question_data in enumerate(security_questions):
-                    user_answer = form.cleaned_data[
-                        f'answer_{i+1}'
-                    ].lower().strip()
-                    correct_answer = question_data[
-                        'correct_answer'
-                    ].lower().strip()
-
-                    if user_answer == correct_answer:
-                        correct_answers += 1
+                # A single fetch through the unique user_id index
+                user_questions = SecurityQuestion.objects.get(user_id=user_id)
+                attempts = [
+                    (question_data['key'], form.cleaned_data[f'answer_{i+1}'])
+                    for i, question_data in enumerate(security_questions)
+                ]
 
                 # Require both answers to be correct
-                if correct_answers >= 2:
+                if user_questions.check_answers(attempts):
                     self.request.session['questions_verified'] = True
-                    self.request.session['verified_user_id'] = user.id
+                    self.request.session['verified_user_id'] = user_id
                     messages.success(
                         self.request,
                         'Security questions verified successfully! '
@@ -1186,7 +1401,7 @@ class SecurityQuestionVerificationView(View):
                         'Incorrect answers. Please try again or contact admin.'
                     )
 
-            except User.DoesNotExist:
+            except SecurityQuestion.DoesNotExist:
                 messages.error(self.request, 'User not found.')
 
         return render(request, self.template_name, {
@@ -1208,6 +1423,7 @@ class QuestionBasedPasswordResetView(View):
             )
             return redirect('security_question_reset')
 
+        from .forms import SetNewPasswordForm
         form = SetNewPasswordForm()
         return render(request, self.template_name, {'form': form})
 
@@ -1227,6 +1443,7 @@ class QuestionBasedPasswordResetView(View):
 
         try:
             user = User.objects.get(id=user_id)
+            from .forms import SetNewPasswordForm
             form = SetNewPasswordForm(request.POST)
 
             if form.is_valid():
@@ -1268,7 +1485,9 @@ class QuestionBasedPasswordResetView(View):
 class CustomPasswordResetView(PasswordResetView):
     """Override allauth password reset to redirect to security questions."""
 
-    form_class = CustomResetPasswordForm
+    def get_form_class(self):
+        from .forms import CustomResetPasswordForm
+        return CustomResetPasswordForm
 
     def form_valid(self, form):
         # Redirect to security question flow instead of sending email
@@ -1288,6 +1507,30 @@ class CustomPasswordResetView(PasswordResetView):
         return self.form_invalid(form)
 
 
+# ===== THROTTLED LOGIN =====
+# Routed in place of allauth's login view (see chinook_project/urls.py)
+@rate_limit('login', username=post_field('login'))
+def throttled_login(request, *args, **kwargs):
+    from allauth.account.views import login
+    return login(request, *args, **kwargs)
+
+
+# ===== OPERATIONS METRICS =====
+@admin_required
+def metrics(request):
+    """
+    Session, rate limiter, template, connection pool and replica counters of
+    the process serving the request.
+    """
+    return JsonResponse({
+        'sessions': SESSION_STATS.stats(),
+        'rate_limits': RATE_LIMIT_STATS.stats(),
+        'templates': TEMPLATE_STATS.stats() if profiler_installed() else None,
+        'db_pools': pool_stats(),
+        'replicas': get_replica_set().stats(),
+    })
+
+
 @login_required
 def delete_avatar(request):
     """Handle avatar deletion for user profile."""
@@ -3,4 +3,10 @@ from django.core.asgi import get_asgi_application
  
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'chinook_project.settings') 
  
-application = get_asgi_application() 
+application = get_asgi_application()
+
+# URLconf and templates are loaded before the first request (in the
+# gunicorn master with preload_app; see gunicorn.conf.py)
+from chinook_app.startup import preload  # noqa: E402
+
+preload()
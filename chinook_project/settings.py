@@ -1,10 +1,14 @@
 import os
 from pathlib import Path
-from dotenv import load_dotenv
 
-load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Local development reads a .env file; deployments set real environment
+# variables, so python-dotenv is only imported when the file exists
+if (BASE_DIR / '.env').exists():
+    from dotenv import load_dotenv
+    load_dotenv(BASE_DIR / '.env')
+
 SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', 'django-insecure-dev-key-change-in-production')
 DEBUG = os.environ.get('DEBUG', 'True') == 'True'
 ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', 'localhost,127.0.0.1,.herokuapp.com').split(',')
@@ -29,6 +33,8 @@ SITE_ID = 1
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'chinook_app.middleware.StaticSnapshotMiddleware',
+    'chinook_app.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -45,29 +51,59 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,  # این خط برای جستجوی خودکار در پوشه‌های apps
         'OPTIONS': {
+            # Compiled templates are kept per process (cleared by runserver's
+            # autoreloader when a template changes); APP_DIRS is the second loader
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'chinook_app.context_processors.site_settings',
+                'chinook_app.context_processors.viewer_role',
             ],
         },
     },
 ]
 # ===== پایان تنظیمات تمپلیت =====
+# Compile every template (and TEMPLATE_WARM_APPS' templates) when a worker
+# loads the WSGI/ASGI application (see chinook_app.templating)
+TEMPLATE_WARMUP = os.environ.get('TEMPLATE_WARMUP', str(not DEBUG)) == 'True'
+TEMPLATE_WARM_APPS = ['crispy_bootstrap5']
+# Time every template and include render; counters at /ops/metrics/
+TEMPLATE_PROFILER = os.environ.get('TEMPLATE_PROFILER', 'False') == 'True'
 
 WSGI_APPLICATION = 'chinook_project.wsgi.application'
 
 # دیتابیس
-import dj_database_url
 DATABASE_URL = os.environ.get('DATABASE_URL')
+# Per-process connection pool (chinook_app.db.backends.postgresql_pool)
+DB_POOL = os.environ.get('DB_POOL', 'False') == 'True'
 if DATABASE_URL:
+    import dj_database_url
     DATABASES = {
-        'default': dj_database_url.config(default=DATABASE_URL, conn_max_age=600, ssl_require=True)
+        'default': dj_database_url.config(
+            default=DATABASE_URL,
+            # Pooled connections go back to the pool at the end of each request
+            conn_max_age=0 if DB_POOL else 600,
+            conn_health_checks=True,
+            ssl_require=True,
+        )
     }
+    if DB_POOL:
+        DATABASES['default']['ENGINE'] = 'chinook_app.db.backends.postgresql_pool'
+        DATABASES['default']['POOL'] = {
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'MAX_LIFETIME': float(os.environ.get('DB_POOL_MAX_LIFETIME', 3600)),
+        }
 else:
     DATABASES = {
         'default': {
@@ -76,6 +112,125 @@ else:
         }
     }
 
+# Read replicas for catalogue reads (chinook_app.routers)
+DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()
+]
+DATABASE_REPLICA_WEIGHTS = [
+    float(weight) for weight in os.environ.get('DATABASE_REPLICA_WEIGHTS', '').split(',') if weight.strip()
+]
+DATABASE_REPLICAS = {}
+for index, replica_url in enumerate(DATABASE_REPLICA_URLS, start=1):
+    import dj_database_url
+    alias = f'replica{index}'
+    DATABASES[alias] = dj_database_url.parse(
+        replica_url,
+        conn_max_age=0 if DB_POOL else 600,
+        conn_health_checks=True,
+        ssl_require=replica_url.startswith('postgres'),
+    )
+    if DB_POOL and replica_url.startswith('postgres'):
+        DATABASES[alias]['ENGINE'] = 'chinook_app.db.backends.postgresql_pool'
+    # Tests read replica aliases through the primary's connection
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    weight = DATABASE_REPLICA_WEIGHTS[index - 1] if index <= len(DATABASE_REPLICA_WEIGHTS) else 1
+    DATABASE_REPLICAS[alias] = {'WEIGHT': weight}
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['chinook_app.routers.CatalogueReplicaRouter']
+    # Must run before the page cache so cache misses are routed too
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('chinook_app.middleware.AnonymousPageCacheMiddleware'),
+        'chinook_app.routers.ReplicaRoutingMiddleware',
+    )
+# 'weighted' (random by weight) or 'least_loaded' (fewest in-flight queries)
+DATABASE_REPLICA_POLICY = os.environ.get('DATABASE_REPLICA_POLICY', 'weighted')
+DATABASE_REPLICA_MAX_LAG = float(os.environ.get('DATABASE_REPLICA_MAX_LAG', 10))
+DATABASE_REPLICA_CHECK_INTERVAL = float(os.environ.get('DATABASE_REPLICA_CHECK_INTERVAL', 5))
+# Seconds a client that just wrote keeps reading from the primary
+DATABASE_PRIMARY_PIN_SECONDS = int(os.environ.get('DATABASE_PRIMARY_PIN_SECONDS', 10))
+
+# Cache
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'chinook',
+        }
+    }
+
+# Seconds a rendered catalogue list fragment stays cached; off without a
+# shared cache (Redis), where a version bump would only reach one worker
+CATALOGUE_CACHE_TIMEOUT = int(os.environ.get('CATALOGUE_CACHE_TIMEOUT', 60 * 15 if REDIS_URL else 0))
+
+# Full-page cache for anonymous visitors (see chinook_app.middleware); off
+# without a shared cache (Redis), where a tag purge would only reach one worker
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', 60 * 10 if REDIS_URL else 0))
+PAGE_CACHE_VIEWS = [
+    'home', 'all_artists', 'all_albums',
+    'artist_detail', 'album_detail', 'track_detail',
+    'artist_albums', 'album_tracks',
+    'genres', 'genre_tracks', 'media_types', 'media_type_tracks',
+]
+
+# Browser/proxy max-age for id-addressed browse pages (revalidated by ETag)
+BROWSE_CACHE_MAX_AGE = int(os.environ.get('BROWSE_CACHE_MAX_AGE', 60))
+
+# Seconds between checks that the cached genre/media type tables are current
+LOOKUP_REFRESH_SECONDS = int(os.environ.get('LOOKUP_REFRESH_SECONDS', 5))
+
+# Seconds between checks for track changes by the faceted browser's index
+FACET_REFRESH_SECONDS = int(os.environ.get('FACET_REFRESH_SECONDS', 5))
+
+# Build the facet index when a worker loads the WSGI/ASGI application
+FACET_WARMUP = os.environ.get('FACET_WARMUP', str(not DEBUG)) == 'True'
+
+# Most credited composers offered as a facet in the track browser
+FACET_COMPOSER_LIMIT = int(os.environ.get('FACET_COMPOSER_LIMIT', 25))
+
+# Smallest table whose unfiltered admin changelist uses an estimated count
+ESTIMATED_COUNT_MIN_ROWS = int(os.environ.get('ESTIMATED_COUNT_MIN_ROWS', 10000))
+
+# Seconds a user's group names stay cached (see chinook_app.roles); off
+# without a shared cache (Redis), where a revoke would only reach one worker
+ROLE_CACHE_TIMEOUT = int(os.environ.get('ROLE_CACHE_TIMEOUT', 60 * 60 if REDIS_URL else 0))
+
+# Group changelist reads the maintained member counters instead of counting
+GROUP_MEMBER_COUNTER = os.environ.get('GROUP_MEMBER_COUNTER', 'False') == 'True'
+
+# Sessions: database-backed, read through the cache (see chinook_app.sessions)
+SESSION_ENGINE = 'chinook_app.sessions'
+# Seconds a session stays cached; off without a shared cache (Redis)
+SESSION_CACHE_TIMEOUT = int(os.environ.get('SESSION_CACHE_TIMEOUT', 60 * 60 if REDIS_URL else 0))
+# Unchanged sessions are rewritten only to extend their expiry by this much
+SESSION_TOUCH_INTERVAL = int(os.environ.get('SESSION_TOUCH_INTERVAL', 60 * 60))
+# Expired session rows deleted per statement by purge_sessions/clearsessions
+SESSION_PURGE_BATCH_SIZE = int(os.environ.get('SESSION_PURGE_BATCH_SIZE', 1000))
+
+# Throttling of login and password recovery (see chinook_app.ratelimit)
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True') == 'True'
+RATE_LIMIT_CACHE_ALIAS = os.environ.get('RATE_LIMIT_CACHE_ALIAS', 'default')
+# Reverse proxies in front of the app whose X-Forwarded-For entries are trusted
+RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', 0))
+# Per view: {key kind: (attempts, window seconds)}; only POSTs are counted
+RATE_LIMITS = {
+    'login': {'ip': (20, 300), 'username': (10, 300)},
+    'security_question_reset': {'ip': (10, 300), 'username': (5, 300)},
+    'security_question_verify': {'ip': (10, 300), 'username': (5, 900)},
+    'change_password': {'ip': (10, 300), 'username': (5, 900)},
+}
+
+# Most ids accepted by one batch lookup such as ?artist_id=1,2,3
+BROWSE_BATCH_MAX_IDS = int(os.environ.get('BROWSE_BATCH_MAX_IDS', 50))
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator', 'OPTIONS': {'min_length': 8}},
@@ -92,6 +247,29 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Bundles written by manage.py build_assets; base.html falls back to the CDNs
+# when they have not been built (or ASSET_BUNDLES=False)
+ASSET_BUILD_DIR = BASE_DIR / 'static' / 'dist'
+# Pinned Bootstrap/Font Awesome downloads; outside STATICFILES_DIRS so
+# collectstatic never publishes (or post-processes) the unbundled copies
+ASSET_VENDOR_DIR = BASE_DIR / 'assets' / 'vendor'
+ASSET_BUNDLES = os.environ.get('ASSET_BUNDLES', 'True') == 'True'
+# Inline each page's above-the-fold CSS (manage.py build_critical_css) and
+# load app.css without blocking the first paint
+CRITICAL_CSS = os.environ.get('CRITICAL_CSS', 'True') == 'True'
+
+# Serve read-only catalogue pages with the async views (best under ASGI)
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS', 'False') == 'True'
+
+# Most ids accepted by one /api/batch/ request
+BATCH_API_MAX_IDS = int(os.environ.get('BATCH_API_MAX_IDS', 200))
+
+# Threads running a view's independent queries concurrently (0 = sequential)
+QUERY_PLAN_WORKERS = int(os.environ.get('QUERY_PLAN_WORKERS', 8))
+
+# Pre-rendered catalogue pages (manage.py build_static_site)
+STATIC_SITE_ROOT = Path(os.environ.get('STATIC_SITE_ROOT', BASE_DIR / 'static_site'))
+STATIC_SNAPSHOT_MODE = os.environ.get('STATIC_SNAPSHOT_MODE', 'False') == 'True'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -114,5 +292,3 @@ CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
-
-print(f"✅ Settings loaded: DEBUG={DEBUG}, ALLOWED_HOSTS={ALLOWED_HOSTS}")
\ No newline at end of file
@@ -17,6 +17,8 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     
     # ===== AUTHENTICATION (Django Allauth) =====
+    # Login is rate limited; it must come before allauth's own route
+    path('accounts/login/', chinook_views.throttled_login, name='account_login'),
     path('accounts/', include('allauth.urls')),
     
     # ===== APPLICATION ROUTES =====
@@ -19,4 +19,91 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         });
     });
-});
\ No newline at end of file
+});
+
+// Searchable pickers on the update/delete pages: fetch one page of
+// matches from the picker API as the user types instead of reloading.
+function initPicker(picker) {
+    const url = picker.dataset.pickerUrl;
+    const field = picker.dataset.pickerField;
+    const multiple = 'pickerMultiple' in picker.dataset;
+    const form = picker.querySelector('.picker-search');
+    const input = picker.querySelector('.picker-input');
+    const results = picker.querySelector('.picker-results');
+    const more = picker.querySelector('.picker-more');
+    let timer = null;
+    let latest = 0;
+
+    function option(item) {
+        const label = document.createElement('label');
+        label.className = 'list-group-item list-group-item-action';
+        const radio = document.createElement('input');
+        radio.className = 'form-check-input me-2';
+        radio.type = multiple ? 'checkbox' : 'radio';
+        radio.name = field;
+        radio.value = item.id;
+        radio.required = !multiple;
+        label.append(radio, document.createTextNode(item.label));
+        return label;
+    }
+
+    function load(after) {
+        const params = new URLSearchParams({ q: input.value.trim() });
+        if (after) {
+            params.set('after', after);
+        }
+        const current = ++latest;
+        fetch(url + '?' + params, { headers: { 'Accept': 'application/json' } })
+            .then(function(response) {
+                return response.ok ? response.json() : Promise.reject(response.status);
+            })
+            .then(function(data) {
+                if (current !== latest) {
+                    return;  // superseded by a newer search
+                }
+                if (!after) {
+                    // Keep rows already ticked so a new search adds to them.
+                    results.querySelectorAll('.list-group-item').forEach(function(row) {
+                        const box = row.querySelector('input');
+                        if (!box || !box.checked) {
+                            row.remove();
+                        }
+                    });
+                }
+                data.results.forEach(function(item) {
+                    if (!results.querySelector('input[value="' + item.id + '"]')) {
+                        results.appendChild(option(item));
+                    }
+                });
+                if (!results.children.length) {
+                    const empty = document.createElement('div');
+                    empty.className = 'list-group-item text-muted picker-empty';
+                    empty.textContent = 'No matches found.';
+                    results.appendChild(empty);
+                }
+                more.dataset.after = data.next || '';
+                more.classList.toggle('d-none', !data.next);
+            })
+            .catch(function() {
+                // Leave the server-rendered results in place.
+            });
+    }
+
+    input.addEventListener('input', function() {
+        clearTimeout(timer);
+        timer = setTimeout(function() { load(null); }, 250);
+    });
+    form.addEventListener('submit', function(e) {
+        e.preventDefault();
+        clearTimeout(timer);
+        load(null);
+    });
+    more.addEventListener('click', function(e) {
+        e.preventDefault();
+        load(more.dataset.after);
+    });
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.catalogue-picker').forEach(initPicker);
+});